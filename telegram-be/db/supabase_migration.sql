@@ -168,6 +168,10 @@ ON tickets(updated_at DESC);
 CREATE INDEX IF NOT EXISTS idx_tickets_priority 
 ON tickets(priority);
 
+-- Index 6: Board columns (status + keyset pagination on updated_at, id)
+CREATE INDEX IF NOT EXISTS idx_tickets_status_updated 
+ON tickets(status, updated_at DESC, id DESC);
+
 -- ================================================================
 -- PART 6: AUTO-UPDATE TRIGGER (updated_at timestamp)
 -- ================================================================
@@ -279,7 +283,94 @@ GRANT ALL ON tickets TO service_role;
 GRANT ALL ON tickets TO anon;
 
 -- ================================================================
--- PART 10: VERIFICATION QUERIES (Uncomment to test)
+-- PART 10: BATCH SESSION UPDATE (RPC)
+-- ================================================================
+
+-- Function: Save refreshed (already encrypted) session strings for
+-- many accounts in one call
+-- Payload: [{"id": "<uuid>", "session_string": "<encrypted>"}, ...]
+CREATE OR REPLACE FUNCTION update_session_strings(p_sessions JSONB)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE telegram_accounts AS a
+    SET session_string = s.session_string
+    FROM jsonb_to_recordset(p_sessions) AS s(id UUID, session_string TEXT)
+    WHERE a.id = s.id;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION update_session_strings(JSONB) TO service_role;
+
+-- ================================================================
+-- PART 11: TICKET SUMMARY (RPC)
+-- ================================================================
+
+-- Function: Ticket counts by status and priority, aggregated in the
+-- database so the API never downloads the tickets themselves.
+-- p_bucket ('day' | 'week') adds a per-period breakdown for charts.
+-- Returns: {"total": n, "by_status": {...}, "by_priority": {...},
+--           "buckets": [{"start": ts, "total": n, "by_status": {...}, "by_priority": {...}}]}
+CREATE OR REPLACE FUNCTION ticket_summary(
+    p_start TIMESTAMPTZ DEFAULT NULL,
+    p_end TIMESTAMPTZ DEFAULT NULL,
+    p_account_id UUID DEFAULT NULL,
+    p_bucket TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+    WITH counts AS (
+        SELECT
+            CASE WHEN p_bucket IN ('day', 'week') THEN date_trunc(p_bucket, created_at) END AS bucket,
+            status,
+            priority,
+            COUNT(*) AS n
+        FROM tickets
+        WHERE (p_start IS NULL OR created_at >= p_start)
+          AND (p_end IS NULL OR created_at <= p_end)
+          AND (p_account_id IS NULL OR account_id = p_account_id)
+        GROUP BY 1, 2, 3
+    ),
+    buckets AS (
+        SELECT
+            b.bucket,
+            SUM(b.n) AS total,
+            (SELECT jsonb_object_agg(status, n) FROM (
+                SELECT status, SUM(n) AS n FROM counts c
+                WHERE c.bucket = b.bucket GROUP BY status
+            ) s) AS by_status,
+            (SELECT jsonb_object_agg(priority, n) FROM (
+                SELECT priority, SUM(n) AS n FROM counts c
+                WHERE c.bucket = b.bucket GROUP BY priority
+            ) p) AS by_priority
+        FROM counts b
+        WHERE b.bucket IS NOT NULL
+        GROUP BY b.bucket
+    )
+    SELECT jsonb_build_object(
+        'total', COALESCE((SELECT SUM(n) FROM counts), 0),
+        'by_status', COALESCE((
+            SELECT jsonb_object_agg(status, n)
+            FROM (SELECT status, SUM(n) AS n FROM counts GROUP BY status) s
+        ), '{}'::jsonb),
+        'by_priority', COALESCE((
+            SELECT jsonb_object_agg(priority, n)
+            FROM (SELECT priority, SUM(n) AS n FROM counts GROUP BY priority) p
+        ), '{}'::jsonb),
+        'buckets', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'start', bucket,
+                'total', total,
+                'by_status', by_status,
+                'by_priority', by_priority
+            ) ORDER BY bucket)
+            FROM buckets
+        ), '[]'::jsonb)
+    );
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION ticket_summary(TIMESTAMPTZ, TIMESTAMPTZ, UUID, TEXT) TO service_role;
+
+-- ================================================================
+-- PART 12: VERIFICATION QUERIES (Uncomment to test)
 -- ================================================================
 
 -- Test 1: Check all tables exist
@@ -328,12 +419,14 @@ GRANT ALL ON tickets TO anon;
 -- ✅ telegram_accounts table (if not exists)
 -- ✅ tickets table with updated_at column
 -- ✅ ticket_history table (NEW - audit trail)
--- ✅ Performance indexes (5 total)
+-- ✅ Performance indexes (6 total)
 -- ✅ Auto-update trigger for updated_at
 -- ✅ Auto-log trigger for ticket changes (NEW)
 -- ✅ Auto-log trigger for ticket creation (NEW)
 -- ✅ Row Level Security enabled for all tables
 -- ✅ Proper permissions granted
+-- ✅ update_session_strings() RPC for batched session saves
+-- ✅ ticket_summary() RPC for server-side ticket counts
 --
 -- Features:
 -- 🔹 Every ticket status/priority change is automatically logged
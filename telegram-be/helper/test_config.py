@@ -48,7 +48,8 @@ def test_dependencies():
         ("supabase", "Supabase"),
         ("cryptography", "Cryptography"),
         ("aiosqlite", "aiosqlite"),
-        ("websockets", "WebSockets")
+        ("websockets", "WebSockets"),
+        ("orjson", "orjson")
     ]
     
     all_installed = True
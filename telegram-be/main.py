@@ -1,9 +1,10 @@
 """Main application entry point."""
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from src.api.test import router as test_router
 
 from src.config import config
@@ -12,8 +13,12 @@ from src.database.supabase_client import supabase_client
 from src.telegram import telegram_manager
 from src.api.routes import router
 from src.api.health import health_router
-from src.services.messaging import handle_incoming_message
+from src.api.websocket import connection_manager
+from src.services.tickets import ticket_store
+from src.services.outbox import outbox
+from src.services.messaging import handle_incoming_message, handle_message_edited, handle_message_deleted
 from src.middleware.auth import verify_secret_key
+from src.utils.leader import leader_lock
 
 # Configure logging
 logging.basicConfig(
@@ -55,11 +60,54 @@ async def migrate_database_if_needed():
                     await db.conn.commit()
                     logger.info(f"Added {field} column")
             
+            # ✅ Migrate media / edit / delete / peer type fields on messages if missing
+            cursor = await db.conn.execute("PRAGMA table_info(messages)")
+            message_columns = [col[1] for col in await cursor.fetchall()]
+            
+            message_fields = {
+                'media_type': 'TEXT',
+                'media_mime_type': 'TEXT',
+                'media_size': 'INTEGER',
+                'media_file_name': 'TEXT',
+                'media_sha256': 'TEXT',
+                'edited_at': 'TIMESTAMP',
+                'deleted_at': 'TIMESTAMP',
+                'chat_type': 'TEXT'
+            }
+            
+            for field, field_type in message_fields.items():
+                if field not in message_columns:
+                    logger.info(f"Migrating database: Adding messages.{field} column...")
+                    await db.conn.execute(f"ALTER TABLE messages ADD COLUMN {field} {field_type}")
+                    await db.conn.commit()
+                    logger.info(f"Added messages.{field} column")
+            
             logger.info("✅ Database migration completed.")
     except Exception as e:
         logger.error(f"Database migration check failed: {e}")
 
 
+async def broadcast_account_health(health: dict) -> None:
+    """Push an account health change to connected dashboards."""
+    await connection_manager.broadcast({
+        "type": "account_health",
+        "data": health
+    })
+
+
+def register_telegram_handlers():
+    """Attach handlers before any client starts, so catch-up replays reach them."""
+    telegram_manager.register_message_handler(handle_incoming_message)
+    telegram_manager.register_edit_handler(handle_message_edited)
+    telegram_manager.register_delete_handler(handle_message_deleted)
+    
+    # Save refreshed sessions (auth key / DC migrations) back to Supabase
+    telegram_manager.register_session_handler(supabase_client.update_session_strings)
+    
+    # Publish connection health changes to the dashboard
+    telegram_manager.register_status_handler(broadcast_account_health)
+
+
 async def initialize_telegram_clients():
     """Initialize active Telegram clients from Supabase."""
     try:
@@ -76,14 +124,29 @@ async def initialize_telegram_clients():
                 )
             except Exception as e:
                 logger.error(f"Failed to init account {account.get('account_label')}: {e}")
-        
-        # Register the cleaned-up handler
-        telegram_manager.register_message_handler(handle_incoming_message)
     
     except Exception as e:
         logger.error(f"Error initializing Telegram clients: {e}")
 
 
+async def start_owned_services():
+    """Telegram, the outbox flusher and ticket sync (the lock holder only)."""
+    await ticket_store.promote()
+    await outbox.start()
+    register_telegram_handlers()
+    await telegram_manager.start()
+    await initialize_telegram_clients()
+    await telegram_manager.start_bridge()
+
+
+async def wait_for_leadership():
+    """Standby worker: take over once the owning worker exits."""
+    while not leader_lock.acquire():
+        await asyncio.sleep(config.LEADER_RETRY_INTERVAL)
+    logger.info("Took over Telegram from a stopped worker")
+    await start_owned_services()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
@@ -94,16 +157,34 @@ async def lifespan(app: FastAPI):
     config.ensure_data_dir()
     await db.connect()
     await migrate_database_if_needed()
+    await connection_manager.start()
+    await ticket_store.start(sync=False)
     
-    # 2. Telegram Setup
-    await initialize_telegram_clients()
+    # 2. Telegram Setup (one worker; the others only serve the API and the event bus)
+    standby = None
+    if leader_lock.acquire():
+        await start_owned_services()
+    else:
+        logger.info("Telegram is owned by another worker, running as standby")
+        await telegram_manager.start_bridge()
+        standby = asyncio.create_task(wait_for_leadership())
     
     yield
     
     # 3. Shutdown
     logger.info("Shutting down...")
-    await telegram_manager.disconnect_all()
+    if standby:
+        standby.cancel()
+        await asyncio.gather(standby, return_exceptions=True)
+    await telegram_manager.stop_bridge()
+    if leader_lock.held:
+        await telegram_manager.disconnect_all()
+        await outbox.stop()
+    await ticket_store.stop()
+    await connection_manager.stop()
     await db.close()
+    supabase_client.close()
+    leader_lock.release()
     logger.info("Shutdown complete")
 
 
@@ -111,7 +192,8 @@ async def lifespan(app: FastAPI):
 app = FastAPI(
     title="Telegram API",
     version="0.2.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # orjson instead of the stdlib encoder
 )
 
 # Protected API routes
@@ -0,0 +1,113 @@
+"""Event buses that carry dashboard events to every API process."""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, Set
+from src.database import db
+from src.utils.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# deliver(seq, message, topics) -> None, called in every process for every event
+Deliver = Callable[[int, dict, Set[str]], None]
+
+
+class EventBus(ABC):
+    """
+    Interface between ``ConnectionManager.broadcast`` and the fan-out.
+
+    ``publish`` hands an event to the bus; the bus assigns it a global
+    sequence number and calls ``deliver`` in every subscribed process, in
+    sequence order. An external broker (Redis, NATS, ...) can be plugged in
+    by implementing ``start`` and ``publish`` (and ``stop`` if it holds
+    resources).
+    """
+
+    # Whether published events are already persisted for replay
+    persistent = False
+
+    @abstractmethod
+    async def start(self, deliver: Deliver, last_seq: int) -> None:
+        """Begin delivering events numbered after ``last_seq``."""
+
+    @abstractmethod
+    async def publish(self, message: dict, topics: Set[str]) -> None:
+        """Hand one event to the bus (delivered asynchronously or inline)."""
+
+    async def stop(self) -> None:
+        pass
+
+
+class LocalEventBus(EventBus):
+    """Single process: deliver immediately, number events with a counter."""
+
+    def __init__(self):
+        """Initialize bus."""
+        self._deliver: Optional[Deliver] = None
+        self._seq = 0
+
+    async def start(self, deliver: Deliver, last_seq: int) -> None:
+        self._deliver = deliver
+        self._seq = last_seq
+
+    async def publish(self, message: dict, topics: Set[str]) -> None:
+        self._seq += 1
+        self._deliver(self._seq, message, topics)
+
+
+class SQLiteEventBus(EventBus):
+    """
+    Several processes on one box (e.g. ``uvicorn --workers N``).
+
+    Events are appended to the shared ``ws_events`` table, whose row ID is
+    the global sequence number, and every process tails the table every
+    ``poll_interval`` seconds. The table doubles as the replay log.
+    """
+
+    persistent = True
+
+    def __init__(self, poll_interval: float, batch_size: int = 500):
+        """Initialize bus."""
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._deliver: Optional[Deliver] = None
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver, last_seq: int) -> None:
+        self._deliver = deliver
+        self._cursor = last_seq
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def publish(self, message: dict, topics: Set[str]) -> None:
+        await db.append_ws_event(dumps(sorted(topics)), dumps(message))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                rows = await db.get_ws_events_after(self._cursor, self.batch_size)
+                for row in rows:
+                    self._cursor = row["seq"]
+                    self._deliver(row["seq"], loads(row["payload"]), set(loads(row["topics"])))
+                if len(rows) == self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event bus poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+
+def create_event_bus(backend: str, poll_interval: float) -> EventBus:
+    """Build the configured bus (``local`` or ``sqlite``)."""
+    if backend == "sqlite":
+        return SQLiteEventBus(poll_interval)
+    if backend != "local":
+        logger.warning(f"Unknown event bus backend '{backend}', using local")
+    return LocalEventBus()
@@ -2,6 +2,9 @@
 from fastapi import APIRouter
 from src.database import db
 from src.telegram import telegram_manager
+from src.api.websocket import connection_manager
+from src.services.outbox import outbox
+from src.utils.leader import leader_lock
 
 health_router = APIRouter()
 
@@ -14,16 +17,27 @@ async def health_check():
         db_status = "connected" if db.conn else "disconnected"
         
         # Check active Telegram clients
-        active_clients = len(telegram_manager.clients)
+        account_ids = telegram_manager.get_account_ids()
+        active_clients = len(account_ids)
         
         return {
             "status": "healthy",
             "database": db_status,
+            # Only this worker runs Telegram, the outbox and ticket sync
+            "telegram_owner": leader_lock.held,
             "telegram_clients": active_clients,
             "clients_connected": {
                 account_id: telegram_manager.is_connected(account_id)
-                for account_id in telegram_manager.clients.keys()
-            }
+                for account_id in account_ids
+            },
+            "clients_hibernating": [
+                account_id for account_id in account_ids
+                if telegram_manager.is_hibernating(account_id)
+            ],
+            "account_health": telegram_manager.get_health(),
+            "inbound_dispatcher": telegram_manager.dispatcher.get_metrics(),
+            "websocket": connection_manager.get_metrics(),
+            "outbox": await outbox.get_metrics()
         }
     except Exception as e:
         return {
@@ -36,8 +50,8 @@ async def health_check():
 async def list_accounts():
     """List all active Telegram accounts."""
     try:
-        from src.database.supabase_client import supabase_client
-        accounts = await supabase_client.get_active_accounts()
+        from src.services.accounts import account_registry
+        accounts = await account_registry.list(active_only=True)
         
         # Remove sensitive data
         safe_accounts = []
@@ -47,7 +61,8 @@ async def list_accounts():
                 "account_label": account["account_label"],
                 "is_active": account["is_active"],
                 "created_at": account["created_at"],
-                "connected": telegram_manager.is_connected(account["id"])
+                "connected": telegram_manager.is_connected(account["id"]),
+                "hibernating": telegram_manager.is_hibernating(account["id"])
             })
         
         return {"accounts": safe_accounts}
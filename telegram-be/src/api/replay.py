@@ -0,0 +1,102 @@
+"""Replay log that lets reconnecting WebSocket clients resume from a sequence number."""
+import asyncio
+import bisect
+import logging
+from collections import deque
+from typing import Deque, List, Optional, Set, Tuple
+from src.config import config
+from src.database import db
+from src.utils.serialization import Frame, dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# How often buffered events are written to SQLite (seconds)
+SPILL_INTERVAL = 1.0
+
+Entry = Tuple[int, Frame, Set[str]]
+
+
+class ReplayLog:
+    """
+    Recent broadcast events by sequence number.
+
+    The newest ``buffer_size`` events are kept in memory. Every event is also
+    spilled to SQLite in the background (one batch per second), so gaps longer
+    than the ring buffer, and restarts, can still be served from disk. Only
+    ``retention`` events are kept on disk. With ``spill=False`` the events
+    are already on disk (the SQLite event bus writes them) and are only pruned.
+    """
+
+    def __init__(self, buffer_size: int, retention: int, max_replay: int, spill: bool = True):
+        """Initialize replay log."""
+        self.ring: Deque[Entry] = deque(maxlen=buffer_size)
+        self.retention = retention
+        self.max_replay = max_replay
+        self.spill = spill
+        self.last_seq = 0
+        self._pending: List[tuple] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Continue numbering after the last persisted event."""
+        _, newest = await db.get_ws_event_bounds()
+        self.last_seq = newest or 0
+        self._task = asyncio.create_task(self._spill_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def append(self, seq: int, frame: Frame, topics: Set[str]) -> None:
+        self.ring.append((seq, frame, topics))
+        self.last_seq = max(self.last_seq, seq)
+        if self.spill:
+            self._pending.append((seq, dumps(sorted(topics)), frame.text))
+
+    async def since(self, seq: int) -> Optional[List[Entry]]:
+        """
+        Events after ``seq``, oldest first.
+
+        None means the gap cannot be replayed (too old, too large, or from a
+        sequence we never issued) and the client must resync.
+        """
+        if seq > self.last_seq:
+            return None
+        if seq == self.last_seq:
+            return []
+
+        if self.ring and self.ring[0][0] <= seq + 1:
+            entries = list(self.ring)
+            start = bisect.bisect_right([entry[0] for entry in entries], seq)
+            return entries[start:]
+
+        # Older than the ring buffer: read what was spilled
+        await self.flush()
+        oldest, _ = await db.get_ws_event_bounds()
+        if oldest is None or oldest > seq + 1 or self.last_seq - seq > self.max_replay:
+            return None
+
+        rows = await db.get_ws_events_after(seq, self.max_replay)
+        return [
+            (row["seq"], Frame({**loads(row["payload"]), "seq": row["seq"]}), set(loads(row["topics"])))
+            for row in rows
+        ]
+
+    async def flush(self) -> None:
+        """Write buffered events to SQLite and prune old ones."""
+        batch, self._pending = self._pending, []
+        try:
+            if batch:
+                await db.save_ws_events(batch)
+            if self.last_seq > self.retention:
+                await db.prune_ws_events(self.last_seq - self.retention)
+        except Exception as e:
+            logger.error(f"Failed to spill WebSocket events: {e}")
+
+    async def _spill_loop(self) -> None:
+        while True:
+            await asyncio.sleep(SPILL_INTERVAL)
+            await self.flush()
@@ -1,14 +1,23 @@
 """API routes for the dashboard."""
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect # type: ignore
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect # type: ignore
+from fastapi.responses import StreamingResponse # type: ignore
 from pydantic import BaseModel # type: ignore
-from typing import Optional
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+from datetime import datetime
 import logging
 
+from src.config import config
 from src.utils.priority_detector import PriorityDetector
+from src.utils.serialization import dumps, loads
 from src.database import db
-from src.database.supabase_client import supabase_client
+from src.database.supabase_client import supabase_client, TICKET_FIELDS, TICKET_STATUSES
 from src.telegram import telegram_manager
 from src.api.websocket import connection_manager
+from src.services.media import media_cache
+from src.services.bulk import BulkSendJob
+from src.services.accounts import account_registry
+from src.services.tickets import ticket_store
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +40,13 @@ class ReplyRequest(BaseModel):
     text: str
 
 
+class BulkSendRequest(BaseModel):
+    text: str
+    conversation_ids: Optional[List[int]] = None
+    account_id: Optional[str] = None
+    since: Optional[str] = None  # last_message_at >= since (ISO 8601)
+
+
 class VerifyAccountRequest(BaseModel):
     phone: str
     code: str
@@ -68,21 +84,10 @@ class AgentAttributesRequest(BaseModel):
 async def add_account(request: AddAccountRequest):
     """Add a new Telegram account."""
     try:
-        from telethon import TelegramClient # type: ignore
-        from telethon.sessions import StringSession # type: ignore
-        
-        temp_session = StringSession()
-        temp_client = TelegramClient(
-            temp_session,
-            request.api_id,
-            request.api_hash
-        )
-        
-        await temp_client.connect()
+        login = await telegram_manager.start_login(request.api_id, request.api_hash, request.phone)
         
-        if await temp_client.is_user_authorized():
-            session_string = temp_client.session.save()
-            await temp_client.disconnect()
+        if "session_string" in login:
+            session_string = login["session_string"]
             
             account = await supabase_client.create_account(
                 account_label=request.label,
@@ -90,6 +95,7 @@ async def add_account(request: AddAccountRequest):
                 api_hash=request.api_hash,
                 session_string=session_string
             )
+            account_registry.invalidate()
             
             await telegram_manager.add_client(
                 account_id=account["id"],
@@ -112,46 +118,25 @@ async def add_account(request: AddAccountRequest):
                 "account": account
             }
         
-        sent_code = await temp_client.send_code_request(request.phone)
-        temp_id = f"temp_{request.phone}"
-        telegram_manager.clients[temp_id] = temp_client
-        
         return {
             "status": "code_sent",
             "message": "Verification code sent to your phone",
             "phone": request.phone,
-            "phone_code_hash": sent_code.phone_code_hash
+            "phone_code_hash": login["phone_code_hash"]
         }
     
     except Exception as e:
         logger.error(f"Error adding account: {e}")
-        if 'temp_client' in locals() and temp_client:
-            try:
-                await temp_client.disconnect()
-            except:
-                pass
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/accounts/verify")
 async def verify_account(request: VerifyAccountRequest):
     """Verify phone code and complete account setup."""
     try:
-        temp_id = f"temp_{request.phone}"
-        temp_client = telegram_manager.clients.get(temp_id)
-        
-        if not temp_client:
-            raise HTTPException(status_code=400, detail="No pending verification for this phone.")
-        
         try:
-            await temp_client.sign_in(request.phone, request.code)
-        except Exception as e:
-            if "password" in str(e).lower() or "2fa" in str(e).lower():
-                raise HTTPException(status_code=400, detail="2FA password required. Not supported in Phase 1.")
-            raise
-        
-        session_string = temp_client.session.save()
-        await temp_client.disconnect()
-        del telegram_manager.clients[temp_id]
+            session_string = await telegram_manager.complete_login(request.phone, request.code)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         account = await supabase_client.create_account(
             account_label=request.label,
@@ -159,6 +144,7 @@ async def verify_account(request: VerifyAccountRequest):
             api_hash=request.api_hash,
             session_string=session_string
         )
+        account_registry.invalidate()
         
         await telegram_manager.add_client(
             account_id=account["id"],
@@ -194,6 +180,7 @@ async def update_account(account_id: str, request: UpdateAccountRequest):
         account = await supabase_client.update_account_label(account_id, request.label)
         if not account:
             raise HTTPException(status_code=404, detail="Account not found")
+        account_registry.invalidate()
             
         await connection_manager.broadcast({
             "type": "account_status",
@@ -212,12 +199,13 @@ async def update_account(account_id: str, request: UpdateAccountRequest):
 async def delete_account(account_id: str):
     """Delete an account."""
     try:
-        # 1. Disconnect client from Telegram Manager if active
-        if telegram_manager.is_connected(account_id):
-            await telegram_manager.remove_client(account_id)
+        # 1. Disconnect client from Telegram Manager (running or hibernated)
+        await telegram_manager.remove_client(account_id)
         
         # 2. Delete from Supabase
         await supabase_client.delete_account(account_id)
+        account_registry.invalidate()
+        await ticket_store.forget_account(account_id)
         
         # 3. Broadcast deletion
         await connection_manager.broadcast({
@@ -254,6 +242,81 @@ async def get_messages(conversation_id: int, limit: int = 100):
         logger.error(f"Error getting messages: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=start-end`` range into inclusive offsets."""
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    
+    spec = range_header[len("bytes="):].split(",")[0].strip()
+    start_str, _, end_str = spec.partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # Suffix range: last N bytes
+            start = max(0, size - int(end_str))
+            end = size - 1
+    except ValueError:
+        return None
+    
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable")
+    return start, min(end, size - 1)
+
+
+def _iter_file(path, start: int, end: int, chunk_size: int = 256 * 1024):
+    """Yield a byte range of a file in chunks (runs in the threadpool)."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@router.get("/messages/{message_id}/media")
+async def get_message_media(message_id: int, request: Request):
+    """Stream a message's media file (supports HTTP Range requests)."""
+    try:
+        message = await db.get_message_by_id(message_id)
+        if not message or not message.get("media_type"):
+            raise HTTPException(status_code=404, detail="Media not found")
+        
+        path = await media_cache.get_file(message)
+        if not path:
+            raise HTTPException(status_code=404, detail="Media no longer available on Telegram")
+        
+        size = path.stat().st_size
+        byte_range = _parse_range(request.headers.get("range"), size)
+        start, end = byte_range if byte_range else (0, size - 1)
+        
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(end - start + 1),
+            "ETag": f'"{path.name}"',
+            "Cache-Control": "private, max-age=31536000, immutable",
+        }
+        if message.get("media_file_name"):
+            headers["Content-Disposition"] = f"inline; filename*=UTF-8''{quote(message['media_file_name'])}"
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        
+        return StreamingResponse(
+            _iter_file(path, start, end),
+            status_code=206 if byte_range else 200,
+            media_type=message.get("media_mime_type") or "application/octet-stream",
+            headers=headers
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming media: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/conversations/{conversation_id}/reply")
 async def send_reply(conversation_id: int, request: ReplyRequest):
     """Send a reply to a conversation."""
@@ -283,18 +346,21 @@ async def send_reply(conversation_id: int, request: ReplyRequest):
             status=status
         )
         
-        await connection_manager.broadcast({
-            "type": "message_sent",
-            "data": {
-                "conversation_id": conversation_id,
-                "account_id": account_id,
-                "chat_id": chat_id,
-                "message_id": msg_id_str,
-                "text": request.text,
-                "status": status,
-                "id": saved_id
-            }
-        })
+        # None: Telegram's own update for this message was stored (and
+        # broadcast) first, so the dashboard already has it
+        if saved_id is not None:
+            await connection_manager.broadcast({
+                "type": "message_sent",
+                "data": {
+                    "conversation_id": conversation_id,
+                    "account_id": account_id,
+                    "chat_id": chat_id,
+                    "message_id": msg_id_str,
+                    "text": request.text,
+                    "status": status,
+                    "id": saved_id
+                }
+            })
         
         if status == "failed":
             raise HTTPException(status_code=500, detail="Failed to send message")
@@ -307,13 +373,62 @@ async def send_reply(conversation_id: int, request: ReplyRequest):
         logger.error(f"Error sending reply: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/messages/bulk")
+async def send_bulk(request: BulkSendRequest):
+    """
+    Send one message to many conversations.
+    
+    Streams NDJSON progress (started, result per chat, progress, completed).
+    The job keeps running if the client disconnects; completion is also
+    broadcast over the WebSocket.
+    """
+    try:
+        if not request.text.strip():
+            raise HTTPException(status_code=400, detail="Text is required")
+        if not (request.conversation_ids or request.account_id or request.since):
+            raise HTTPException(status_code=400, detail="Provide conversation_ids or a filter (account_id, since)")
+        if request.conversation_ids and len(request.conversation_ids) > config.BULK_SEND_MAX_RECIPIENTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many conversations (max {config.BULK_SEND_MAX_RECIPIENTS})"
+            )
+        
+        since = None
+        if request.since:
+            try:
+                since = datetime.fromisoformat(request.since)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="since must be an ISO 8601 timestamp")
+        
+        conversations = await db.find_conversations(
+            conversation_ids=request.conversation_ids,
+            account_id=request.account_id,
+            since=since,
+            limit=config.BULK_SEND_MAX_RECIPIENTS
+        )
+        if not conversations:
+            raise HTTPException(status_code=404, detail="No matching conversations")
+        
+        job = BulkSendJob(conversations, request.text).start()
+        
+        async def stream():
+            async for event in job.progress():
+                yield dumps(event) + "\n"
+        
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting bulk send: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/accounts")
 async def list_accounts():
     """List all Telegram accounts (active and inactive)."""
     try:
-        from src.database.supabase_client import supabase_client
         # CHANGED: Now fetching ALL accounts so inactive ones show up in dashboard
-        accounts = await supabase_client.get_all_accounts()
+        accounts = await account_registry.list()
         
         safe_accounts = []
         for account in accounts:
@@ -322,7 +437,8 @@ async def list_accounts():
                 "account_label": account["account_label"],
                 "is_active": account["is_active"],
                 "created_at": account["created_at"],
-                "connected": telegram_manager.is_connected(account["id"])
+                "connected": telegram_manager.is_connected(account["id"]),
+                "hibernating": telegram_manager.is_hibernating(account["id"])
             })
         
         return {"accounts": safe_accounts}
@@ -337,7 +453,7 @@ async def toggle_account(account_id: str, request: ToggleAccountRequest):
         is_active = request.is_active
         
         if is_active:
-            # Activate account
+            # Activate account (the only place the session is fetched and decrypted)
             account = await supabase_client.get_account_by_id(account_id)
             if not account:
                 raise HTTPException(status_code=404, detail="Account not found")
@@ -358,6 +474,7 @@ async def toggle_account(account_id: str, request: ToggleAccountRequest):
             await supabase_client.deactivate_account(account_id)
             await telegram_manager.remove_client(account_id)
             status = "disconnected"
+        account_registry.invalidate()
             
         await connection_manager.broadcast({
             "type": "account_status",
@@ -409,19 +526,14 @@ async def create_ticket(request: TicketCreateRequest):
                 if request.description:
                     texts_to_analyze.append(request.description)
                 
-                # Get recent messages from conversation
-                conv = await supabase_client.get_conversation_by_chat(
-                    request.account_id, 
-                    request.chat_id
+                # Get recent customer messages from the local store
+                recent_texts = await db.get_recent_message_texts(
+                    request.account_id,
+                    request.chat_id,
+                    direction="incoming",
+                    limit=5
                 )
-                
-                if conv:
-                    messages_data = await supabase_client.get_messages(conv['id'])
-                    recent_texts = [
-                        msg['text'] for msg in messages_data[-5:]
-                        if msg.get('text') and msg.get('direction') == 'incoming'
-                    ]
-                    texts_to_analyze.extend(recent_texts)
+                texts_to_analyze.extend(recent_texts)
                 
                 # ✅ ALWAYS detect if we have texts
                 if texts_to_analyze:
@@ -446,8 +558,8 @@ async def create_ticket(request: TicketCreateRequest):
         else:
             logger.info(f"ℹ️ Using manually set priority: {request.priority}")
         
-        # Create ticket
-        new_ticket = await supabase_client.create_ticket({
+        # Create ticket (one request: the label comes from the account registry)
+        new_ticket = await ticket_store.create_ticket({
             "account_id": request.account_id,
             "chat_id": request.chat_id,
             "subject": request.subject,
@@ -455,7 +567,7 @@ async def create_ticket(request: TicketCreateRequest):
             "description": request.description,
             "source": getattr(request, 'source', 'manual'),
             "status": "open"
-        })
+        }, account_label=await account_registry.label(request.account_id))
         
         await connection_manager.broadcast({
             "type": "ticket_created",
@@ -468,12 +580,32 @@ async def create_ticket(request: TicketCreateRequest):
         logger.error(f"Error creating ticket: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _ticket_page_params(limit: Optional[int], fields: str) -> int:
+    """Validate listing params; returns the page size to use."""
+    if fields not in TICKET_FIELDS:
+        raise HTTPException(status_code=400, detail=f"fields must be one of: {list(TICKET_FIELDS)}")
+    if limit is None:
+        return config.TICKET_PAGE_SIZE
+    if limit < 1 or limit > config.TICKET_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {config.TICKET_PAGE_MAX}")
+    return limit
+
 @router.get("/tickets")
-async def get_tickets(status: Optional[str] = None):
-    """List all tickets (optional status filter)."""
+async def get_tickets(
+    status: Optional[str] = None,
+    agent_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: str = "detail"
+):
+    """List tickets, most recently updated first (optional status filter, paginated)."""
     try:
-        tickets = await supabase_client.list_all_tickets(status)
-        return {"tickets": tickets}
+        limit = _ticket_page_params(limit, fields)
+        return await ticket_store.list_all_tickets(status, agent_id, limit, cursor, fields)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -483,7 +615,7 @@ async def update_ticket(ticket_id: str, request: TicketUpdateRequest):
     try:
         updates = request.model_dump(exclude_unset=True) # Only take sent fields
         
-        updated_ticket = await supabase_client.update_ticket(ticket_id, updates)
+        updated_ticket = await ticket_store.update_ticket(ticket_id, updates)
         
         if not updated_ticket:
             raise HTTPException(status_code=404, detail="Ticket not found")
@@ -505,7 +637,7 @@ async def update_ticket(ticket_id: str, request: TicketUpdateRequest):
 async def delete_ticket(ticket_id: str):
     """Delete a ticket permanently."""
     try:
-        success = await supabase_client.delete_ticket(ticket_id)
+        success = await ticket_store.delete_ticket(ticket_id)
         if not success:
             raise HTTPException(status_code=404, detail="Ticket not found or delete failed")
             
@@ -526,42 +658,71 @@ async def delete_ticket(ticket_id: str):
 async def get_ticket_summary(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    agent_id: Optional[str] = None
+    agent_id: Optional[str] = None,
+    bucket: Optional[str] = None
 ):
-    """Get ticket summary/stats"""
+    """Get ticket summary/stats, optionally broken down per day or week"""
     try:
         from datetime import datetime, timezone
         
+        if bucket and bucket not in ("day", "week"):
+            raise HTTPException(status_code=400, detail="bucket must be one of: ['day', 'week']")
+        
         if not start_date:
             now = datetime.now(timezone.utc)
             start_date = now.replace(day=1).isoformat()
         if not end_date:
             end_date = datetime.now(timezone.utc).isoformat()
         
-        summary = await supabase_client.get_ticket_summary(start_date, end_date, agent_id)
+        summary = await ticket_store.get_ticket_summary(start_date, end_date, agent_id, bucket)
         
         return {
             "period": {"start": start_date, "end": end_date},
             "summary": summary
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting ticket summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/tickets/board")
+async def get_ticket_board(agent_id: Optional[str] = None, limit: Optional[int] = None):
+    """First page of card fields for every status column in one call"""
+    try:
+        limit = _ticket_page_params(limit, "card")
+        columns = await ticket_store.get_ticket_board(agent_id, limit)
+        return {"columns": columns}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting ticket board: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/tickets/by-status/{status}")
-async def get_tickets_by_status(status: str, agent_id: Optional[str] = None):
-    """Get tickets filtered by status"""
+async def get_tickets_by_status(
+    status: str,
+    agent_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: str = "detail"
+):
+    """Get tickets filtered by status (paginated)"""
     try:
-        valid_statuses = ["open", "in_progress", "resolved", "closed"]
+        valid_statuses = list(TICKET_STATUSES)
         if status not in valid_statuses:
             raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
+        limit = _ticket_page_params(limit, fields)
         
-        tickets = await supabase_client.get_tickets_by_status(status, agent_id)
+        page = await ticket_store.list_all_tickets(status, agent_id, limit, cursor, fields)
         
-        return {"status": status, "tickets": tickets}
+        return {"status": status, **page}
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting tickets by status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -570,12 +731,27 @@ async def get_tickets_by_status(status: str, agent_id: Optional[str] = None):
 async def get_ticket_history(ticket_id: str):
     """Get audit history for a ticket"""
     try:
-        history = await supabase_client.get_ticket_history(ticket_id)
+        history = await ticket_store.get_ticket_history(ticket_id)
         return {"status": "success", "history": history}
     except Exception as e:
         logger.error(f"Error getting ticket history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/tickets/{ticket_id}")
+async def get_ticket(ticket_id: str, fields: str = "detail"):
+    """Get a single ticket"""
+    try:
+        _ticket_page_params(None, fields)
+        ticket = await ticket_store.get_ticket(ticket_id, fields)
+        if not ticket:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return {"ticket": ticket}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting ticket: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/accounts/{account_id}/attributes")
 async def get_agent_attributes(account_id: str):
     """Get agent attributes (persona, knowledge, schedule, integration, ticketing_settings)"""
@@ -734,13 +910,50 @@ async def update_agent_attributes(account_id: str, request: AgentAttributesReque
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates."""
-    await connection_manager.connect(websocket)
+    if not await connection_manager.connect(websocket):
+        return
     try:
         while True:
-            # Keep connection alive
+            # Any message proves the client is alive
             data = await websocket.receive_text()
-            # Echo back for heartbeat
-            await websocket.send_json({"type": "pong"})
+            connection_manager.touch(websocket)
+            try:
+                command = loads(data)
+            except ValueError:
+                command = None
+            if not isinstance(command, dict):
+                command = {}
+            
+            # Subscription protocol; anything else is a heartbeat
+            if command.get("type") == "subscribe":
+                topics = connection_manager.subscribe(
+                    websocket, command.get("topics", []), replace=bool(command.get("replace"))
+                )
+                await connection_manager.send_personal_message(
+                    {"type": "subscribed", "topics": topics}, websocket
+                )
+            elif command.get("type") == "resume":
+                try:
+                    last_seq = int(command.get("last_seq") or 0)
+                except (TypeError, ValueError):
+                    last_seq = -1
+                if last_seq >= 0:
+                    await connection_manager.resume(websocket, last_seq)
+                else:
+                    # No usable position to resume from: the client refetches
+                    await connection_manager.send_personal_message(
+                        {"type": "resync_required", "seq": connection_manager.replay.last_seq}, websocket
+                    )
+            elif command.get("type") == "pong":
+                pass  # answer to our heartbeat ping
+            elif command.get("type") == "unsubscribe":
+                topics = connection_manager.unsubscribe(websocket, command.get("topics", []))
+                await connection_manager.send_personal_message(
+                    {"type": "subscribed", "topics": topics}, websocket
+                )
+            else:
+                # Echo back for heartbeat (through the client's send queue)
+                await connection_manager.send_personal_message({"type": "pong"}, websocket)
     except WebSocketDisconnect:
         connection_manager.disconnect(websocket)
     except Exception as e:
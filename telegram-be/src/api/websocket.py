@@ -1,29 +1,305 @@
 """WebSocket manager for real-time updates."""
 import asyncio
-import json
-from typing import Set
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
 from fastapi import WebSocket
 import logging
+from src.config import config
+from src.api.event_bus import EventBus, create_event_bus
+from src.api.replay import ReplayLog
+from src.utils.serialization import Frame, MSGPACK_SUBPROTOCOL, join_binary, join_text, msgpack_available
 
 logger = logging.getLogger(__name__)
 
+# Sent instead of the dropped backlog when a client falls too far behind
+RESYNC_MARKER = Frame({"type": "resync_required"})
+
+# Server heartbeat; clients answer with {"type": "pong"}
+PING_FRAME = Frame({"type": "ping"})
+
+# Close code for sockets evicted after missing heartbeats
+CLOSE_HEARTBEAT_TIMEOUT = 4408
+
+# Feeds a client can subscribe to besides per-account / per-conversation topics
+FEED_TOPICS = {"tickets", "accounts", "bulk"}
+
+
+def account_topic(account_id: str) -> str:
+    return f"account:{account_id}"
+
+
+def conversation_topic(account_id: str, chat_id: str) -> str:
+    return f"conversation:{account_id}:{chat_id}"
+
+
+def topics_for(message: dict) -> Set[str]:
+    """
+    Topics an event belongs to, derived from its type and payload.
+
+    An empty set means "everyone" (e.g. resync markers).
+    """
+    event_type = message.get("type", "")
+    data = message.get("data") or {}
+    topics: Set[str] = set()
+
+    if event_type == "messages_sent_bulk":
+        for item in data.get("messages", []):
+            topics.add(account_topic(item["account_id"]))
+            topics.add(conversation_topic(item["account_id"], item["chat_id"]))
+        return topics
+
+    if event_type.startswith("ticket_"):
+        topics.add("tickets")
+    elif event_type.startswith("account_"):
+        topics.add("accounts")
+    elif event_type.startswith("bulk_"):
+        topics.add("bulk")
+
+    if data.get("account_id"):
+        topics.add(account_topic(data["account_id"]))
+        if data.get("chat_id"):
+            topics.add(conversation_topic(data["account_id"], data["chat_id"]))
+    return topics
+
+
+def collapse_key(message: dict) -> Optional[tuple]:
+    """Key under which a newer event replaces an older, still unsent one."""
+    event_type = message.get("type")
+    data = message.get("data") or {}
+    if event_type == "ticket_updated" and data.get("id"):
+        return ("ticket", data["id"])
+    if event_type in ("account_status", "account_health") and data.get("account_id"):
+        return (event_type, data["account_id"])
+    return None
+
+
+def coalesce(frames: List[Frame]) -> List[Frame]:
+    """Drop frames superseded by a later frame with the same collapse key."""
+    latest = {frame.collapse_key: i for i, frame in enumerate(frames) if frame.collapse_key}
+    return [
+        frame for i, frame in enumerate(frames)
+        if not frame.collapse_key or latest[frame.collapse_key] == i
+    ]
+
+
+class ClientConnection:
+    """
+    One dashboard socket with its own bounded send queue and writer task.
+    
+    With ``WS_FLUSH_INTERVAL`` set, the writer waits that long after the first
+    queued event, then sends everything queued meanwhile as one array frame,
+    with superseded updates collapsed.
+    """
+    
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager", binary: bool = False, key: str = ""):
+        """Initialize connection.
+        
+        Args:
+            websocket: Accepted WebSocket connection
+            manager: Owning connection manager
+            binary: Send MessagePack frames instead of JSON text
+            key: Client key the per-key connection cap applies to
+        """
+        self.websocket = websocket
+        self.manager = manager
+        self.binary = binary
+        self.key = key
+        self.last_seen = time.monotonic()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=config.WS_SEND_QUEUE_SIZE)
+        self.overflows = 0
+        # None = legacy client that never subscribed: receives everything
+        self.topics: Optional[Set[str]] = None
+        # Live frames parked while a resume replay is being assembled
+        self.held: Optional[List[Frame]] = None
+        self.writer = asyncio.create_task(self._write_loop())
+    
+    def wants(self, topics: Set[str]) -> bool:
+        return not topics or self.topics is None or bool(self.topics & topics)
+    
+    def hold(self) -> None:
+        """Park live frames until ``release`` (keeps replayed events in order)."""
+        self.held = []
+    
+    def release(self, frames: List[Frame]) -> None:
+        """Queue replayed frames, then the live frames that arrived meanwhile."""
+        held, self.held = self.held or [], None
+        last_seq = max((f.payload.get("seq", 0) for f in frames), default=0)
+        for frame in frames + [f for f in held if f.payload.get("seq", 0) > last_seq]:
+            self.enqueue(frame)
+    
+    def enqueue(self, frame: Frame) -> bool:
+        """Queue a frame without waiting. Returns False if the client overflowed."""
+        if self.held is not None:
+            self.held.append(frame)
+            return True
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            pass
+        
+        self.overflows += 1
+        if config.WS_OVERFLOW_POLICY == "disconnect":
+            logger.warning("WebSocket client too slow, disconnecting")
+            self.manager.disconnect(self.websocket)
+            asyncio.create_task(self._close(code=1013))
+            return False
+        
+        # Drop the backlog; the client refetches everything on this marker
+        logger.warning("WebSocket client too slow, asking it to resync")
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC_MARKER)
+        return False
+    
+    async def _write_loop(self) -> None:
+        """Send queued frames in order; a failed send drops the connection."""
+        try:
+            while True:
+                frames = [await self.queue.get()]
+                if config.WS_FLUSH_INTERVAL > 0:
+                    await asyncio.sleep(config.WS_FLUSH_INTERVAL)
+                    while not self.queue.empty():
+                        frames.append(self.queue.get_nowait())
+                    frames = coalesce(frames)
+                
+                if len(frames) == 1:
+                    if self.binary:
+                        await self.websocket.send_bytes(frames[0].binary)
+                    else:
+                        await self.websocket.send_text(frames[0].text)
+                elif self.binary:
+                    await self.websocket.send_bytes(join_binary(frames))
+                else:
+                    await self.websocket.send_text(join_text(frames))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending message to client: {e}")
+            self.manager.disconnect(self.websocket)
+    
+    async def _close(self, code: int = 1000) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+    
+    def stop(self) -> None:
+        self.writer.cancel()
+
 
 class ConnectionManager:
-    """Manage WebSocket connections."""
+    """
+    Manage WebSocket connections.
+    
+    Broadcasting only enqueues onto each client's queue, so a slow dashboard
+    never delays Telegram ingest or the other dashboards.
     
-    def __init__(self):
+    Clients may subscribe to topics (``tickets``, ``accounts``, ``bulk``,
+    ``account:<id>``, ``conversation:<account_id>:<chat_id>``); a topic ->
+    connections index means each event only reaches interested sockets.
+    Clients that never subscribe keep receiving everything.
+    
+    Every broadcast carries a ``seq``; a reconnecting client sends the last
+    one it saw and gets only the missed events (see ``ReplayLog``).
+    
+    Broadcasts go through an ``EventBus`` that numbers them and delivers them
+    to the manager of every API process, so dashboards connected to any
+    uvicorn worker see every event.
+    """
+    
+    def __init__(self, bus: Optional[EventBus] = None):
         """Initialize connection manager."""
-        self.active_connections: Set[WebSocket] = set()
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.subscribers: Dict[str, Set[ClientConnection]] = {}
+        self.firehose: Set[ClientConnection] = set()
+        self.bus = bus or create_event_bus(config.EVENT_BUS_BACKEND, config.EVENT_BUS_POLL_INTERVAL)
+        self.replay = ReplayLog(
+            buffer_size=config.WS_REPLAY_BUFFER_SIZE,
+            retention=config.WS_REPLAY_RETENTION,
+            max_replay=config.WS_REPLAY_MAX,
+            spill=not self.bus.persistent
+        )
+        self.connections_per_key: Counter = Counter()
+        self.rejected = 0
+        self.evicted = 0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+    
+    async def start(self) -> None:
+        """Restore the sequence counter, start spilling, the event bus and heartbeats."""
+        await self.replay.start()
+        await self.bus.start(self._deliver, self.replay.last_seq)
+        if config.WS_PING_INTERVAL > 0:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
     
-    async def connect(self, websocket: WebSocket) -> None:
+    async def stop(self) -> None:
+        """Persist buffered events (so clients can resume after a restart)."""
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+        await self.bus.stop()
+        await self.replay.stop()
+    
+    @staticmethod
+    def client_key(websocket: WebSocket) -> str:
+        """Key for connection caps: the client address (first proxy hop if forwarded)."""
+        forwarded = websocket.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+        return websocket.client.host if websocket.client else "unknown"
+    
+    async def connect(self, websocket: WebSocket) -> bool:
         """Accept a new WebSocket connection.
         
         Args:
             websocket: WebSocket connection
+        
+        Returns:
+            False if the connection was refused (connection caps)
         """
-        await websocket.accept()
-        self.active_connections.add(websocket)
+        key = self.client_key(websocket)
+        if (
+            len(self.active_connections) >= config.WS_MAX_CONNECTIONS
+            or self.connections_per_key[key] >= config.WS_MAX_CONNECTIONS_PER_KEY
+        ):
+            # Closing before accept answers the handshake with 403
+            self.rejected += 1
+            logger.warning(f"Refusing WebSocket from {key}: connection limit reached")
+            await websocket.close(code=1008)
+            return False
+        
+        # Clients may ask for binary MessagePack frames via the subprotocol
+        binary = MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", []) and msgpack_available()
+        await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL if binary else None)
+        connection = ClientConnection(websocket, self, binary=binary, key=key)
+        self.active_connections[websocket] = connection
+        self.connections_per_key[key] += 1
+        self.firehose.add(connection)
+        connection.enqueue(Frame({"type": "hello", "seq": self.replay.last_seq}))
         logger.info(f"Client connected. Total connections: {len(self.active_connections)}")
+        return True
+    
+    def touch(self, websocket: WebSocket) -> None:
+        """Record that a client is alive (it sent something)."""
+        connection = self.active_connections.get(websocket)
+        if connection:
+            connection.last_seen = time.monotonic()
+    
+    async def _heartbeat_loop(self) -> None:
+        """Ping every client; evict the ones silent for longer than the timeout."""
+        while True:
+            await asyncio.sleep(config.WS_PING_INTERVAL)
+            deadline = time.monotonic() - config.WS_PING_TIMEOUT
+            for websocket, connection in list(self.active_connections.items()):
+                if connection.last_seen < deadline:
+                    self.evicted += 1
+                    logger.info(f"Evicting unresponsive WebSocket client {connection.key}")
+                    self.disconnect(websocket)
+                    asyncio.create_task(connection._close(code=CLOSE_HEARTBEAT_TIMEOUT))
+                else:
+                    connection.enqueue(PING_FRAME)
     
     def disconnect(self, websocket: WebSocket) -> None:
         """Remove a WebSocket connection.
@@ -31,31 +307,105 @@ class ConnectionManager:
         Args:
             websocket: WebSocket connection
         """
-        self.active_connections.discard(websocket)
-        logger.info(f"Client disconnected. Total connections: {len(self.active_connections)}")
+        connection = self.active_connections.pop(websocket, None)
+        if connection:
+            self.connections_per_key[connection.key] -= 1
+            if self.connections_per_key[connection.key] <= 0:
+                del self.connections_per_key[connection.key]
+            self._unindex(connection, connection.topics or set())
+            self.firehose.discard(connection)
+            connection.stop()
+            logger.info(f"Client disconnected. Total connections: {len(self.active_connections)}")
     
     async def broadcast(self, message: dict) -> None:
         """Broadcast a message to all connected clients.
         
+        Never waits on a socket: the event is published on the bus, and each
+        process queues it for its clients' writers. The payload is encoded
+        once per wire format, however many clients receive it.
+        
         Args:
             message: Message dictionary to broadcast
         """
-        if not self.active_connections:
+        await self.bus.publish(message, topics_for(message))
+    
+    def _deliver(self, seq: int, message: dict, topics: Set[str]) -> None:
+        """Fan one numbered event out to this process's interested clients."""
+        message = {**message, "seq": seq}
+        frame = Frame(message, collapse_key=collapse_key(message))
+        self.replay.append(seq, frame, topics)
+        
+        for connection in self._targets(topics):
+            connection.enqueue(frame)
+    
+    def _targets(self, topics: Set[str]) -> List[ClientConnection]:
+        if not topics:
+            return list(self.active_connections.values())
+        
+        targets = set(self.firehose)
+        for topic in topics:
+            targets.update(self.subscribers.get(topic, ()))
+        return list(targets)
+    
+    async def resume(self, websocket: WebSocket, last_seq: int) -> None:
+        """Replay events after ``last_seq`` to one client, or ask it to resync."""
+        connection = self.active_connections.get(websocket)
+        if not connection:
             return
         
-        message_str = json.dumps(message)
-        disconnected = set()
+        connection.hold()
+        try:
+            entries = await self.replay.since(last_seq)
+        except Exception as e:
+            logger.error(f"WebSocket replay failed: {e}")
+            entries = None
         
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_str)
-            except Exception as e:
-                logger.error(f"Error sending message to client: {e}")
-                disconnected.add(connection)
+        if entries is None:
+            connection.release([Frame({"type": "resync_required", "seq": self.replay.last_seq})])
+            return
         
-        # Remove disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection)
+        frames = [frame for _, frame, topics in entries if connection.wants(topics)]
+        resumed_at = entries[-1][0] if entries else last_seq
+        connection.release(frames + [Frame({"type": "resumed", "seq": resumed_at})])
+    
+    # --- Subscriptions ---
+    
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str], replace: bool = False) -> List[str]:
+        """Add topics to a client's subscription (or replace it). Returns the current topics."""
+        connection = self.active_connections.get(websocket)
+        if not connection:
+            return []
+        
+        wanted = {t for t in topics if t in FEED_TOPICS or t.startswith(("account:", "conversation:"))}
+        current = connection.topics or set()
+        if replace:
+            self._unindex(connection, current - wanted)
+            current = current & wanted
+        
+        for topic in wanted - current:
+            self.subscribers.setdefault(topic, set()).add(connection)
+        connection.topics = current | wanted
+        self.firehose.discard(connection)
+        return sorted(connection.topics)
+    
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]) -> List[str]:
+        """Remove topics from a client's subscription. Returns the current topics."""
+        connection = self.active_connections.get(websocket)
+        if not connection or connection.topics is None:
+            return []
+        
+        removed = connection.topics & set(topics)
+        self._unindex(connection, removed)
+        connection.topics -= removed
+        return sorted(connection.topics)
+    
+    def _unindex(self, connection: ClientConnection, topics: Iterable[str]) -> None:
+        for topic in topics:
+            connections = self.subscribers.get(topic)
+            if connections:
+                connections.discard(connection)
+                if not connections:
+                    del self.subscribers[topic]
     
     async def send_personal_message(self, message: dict, websocket: WebSocket) -> None:
         """Send a message to a specific client.
@@ -64,10 +414,24 @@ class ConnectionManager:
             message: Message dictionary
             websocket: Target WebSocket connection
         """
-        try:
-            await websocket.send_text(json.dumps(message))
-        except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
+        connection = self.active_connections.get(websocket)
+        if connection:
+            connection.enqueue(Frame(message))
+    
+    def get_metrics(self) -> dict:
+        """Gauges: connection counts, send-queue depths, refusals and evictions."""
+        depths = [c.queue.qsize() for c in self.active_connections.values()]
+        return {
+            "connections": len(depths),
+            "connection_keys": len(self.connections_per_key),
+            "max_connections_per_key": max(self.connections_per_key.values(), default=0),
+            "max_queue_depth": max(depths, default=0),
+            "queued_frames": sum(depths),
+            "overflows": sum(c.overflows for c in self.active_connections.values()),
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "topics": len(self.subscribers)
+        }
 
 
 # Global connection manager
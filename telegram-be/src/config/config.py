@@ -1,4 +1,5 @@
 """Configuration management for the application."""
+import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -6,6 +7,25 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Telegram's upload.getFile: limit must be a multiple of 4 KiB that divides
+# 1 MiB, at most 512 KiB (i.e. a power of two from 4 KiB to 512 KiB)
+MEDIA_CHUNK_MIN = 4096
+MEDIA_CHUNK_MAX = 512 * 1024
+
+
+def _media_chunk_size(value: str) -> int:
+    """Round a requested chunk size down to one Telegram accepts."""
+    requested = int(value)
+    size = MEDIA_CHUNK_MIN
+    while size * 2 <= min(requested, MEDIA_CHUNK_MAX):
+        size *= 2
+    if size != requested:
+        logger.warning(f"MEDIA_CHUNK_SIZE={requested} is not accepted by Telegram, using {size}")
+    return size
+
+
 class Config:
     """Application configuration."""
     
@@ -13,12 +33,107 @@ class Config:
     ENCRYPTION_KEY: str = os.getenv("ENCRYPTION_KEY", "")
     TELEGRAM_SECRET_KEY_SERVICE: str = os.getenv("TELEGRAM_SECRET_KEY_SERVICE", "")
     
+    # Supabase (requests run on a bounded thread pool with a per-call timeout in seconds)
+    SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
+    SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
+    SUPABASE_MAX_WORKERS: int = int(os.getenv("SUPABASE_MAX_WORKERS", "8"))
+    SUPABASE_TIMEOUT: float = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+    
+    # Cached account list (seconds before reloading from Supabase)
+    ACCOUNT_REGISTRY_TTL: float = float(os.getenv("ACCOUNT_REGISTRY_TTL", "60"))
+    
+    # Ticket listings: default and largest page size
+    TICKET_PAGE_SIZE: int = int(os.getenv("TICKET_PAGE_SIZE", "50"))
+    TICKET_PAGE_MAX: int = int(os.getenv("TICKET_PAGE_MAX", "200"))
+    # Pull ticket changes into the local mirror every N seconds (0 = read tickets from Supabase)
+    TICKET_SYNC_INTERVAL: float = float(os.getenv("TICKET_SYNC_INTERVAL", "30"))
+    
+    # Outbox for ticket writes from chats: flush period (seconds), entries per flush, attempts before parking
+    OUTBOX_FLUSH_INTERVAL: float = float(os.getenv("OUTBOX_FLUSH_INTERVAL", "1.0"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "20"))
+    
     # Server
     HOST: str = os.getenv("HOST", "127.0.0.1")
     PORT: int = int(os.getenv("PORT", "8005"))
     
     # Database
     SQLITE_DB_PATH: str = os.getenv("SQLITE_DB_PATH", "./data/messages.db")
+    SQLITE_WRITE_BATCH_SIZE: int = int(os.getenv("SQLITE_WRITE_BATCH_SIZE", "500"))
+    
+    # Media cache
+    MEDIA_CACHE_DIR: str = os.getenv("MEDIA_CACHE_DIR", "./data/media")
+    MEDIA_CACHE_MAX_BYTES: int = int(os.getenv("MEDIA_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+    MEDIA_CHUNK_SIZE: int = _media_chunk_size(os.getenv("MEDIA_CHUNK_SIZE", str(MEDIA_CHUNK_MAX)))
+    MEDIA_DOWNLOAD_TIMEOUT: float = float(os.getenv("MEDIA_DOWNLOAD_TIMEOUT", "600"))
+    
+    # Inbound dispatch
+    INBOUND_WORKERS: int = int(os.getenv("INBOUND_WORKERS", "8"))
+    INBOUND_QUEUE_SIZE: int = int(os.getenv("INBOUND_QUEUE_SIZE", "1000"))
+    INBOUND_OVERFLOW: str = os.getenv("INBOUND_OVERFLOW", "spill")  # spill | shed
+    INBOUND_SPILL_DIR: str = os.getenv("INBOUND_SPILL_DIR", "./data/spill")
+    INBOUND_SPILL_FLUSH_INTERVAL: float = float(os.getenv("INBOUND_SPILL_FLUSH_INTERVAL", "0.2"))  # seconds per fsync
+    
+    # WebSocket fan-out: per-client send queue, and what to do when it overflows
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+    WS_OVERFLOW_POLICY: str = os.getenv("WS_OVERFLOW_POLICY", "resync")  # resync | disconnect
+    # Batch events per client into one array frame every N seconds (0 = send each immediately)
+    WS_FLUSH_INTERVAL: float = float(os.getenv("WS_FLUSH_INTERVAL", "0.05"))
+    
+    # Resumable event stream: events kept in memory / on disk, and the largest replay served
+    WS_REPLAY_BUFFER_SIZE: int = int(os.getenv("WS_REPLAY_BUFFER_SIZE", "1000"))
+    WS_REPLAY_RETENTION: int = int(os.getenv("WS_REPLAY_RETENTION", "50000"))
+    WS_REPLAY_MAX: int = int(os.getenv("WS_REPLAY_MAX", "5000"))
+    
+    # Server heartbeat (seconds; 0 = off), eviction deadline and connection caps
+    WS_PING_INTERVAL: int = int(os.getenv("WS_PING_INTERVAL", "20"))
+    WS_PING_TIMEOUT: int = int(os.getenv("WS_PING_TIMEOUT", "60"))
+    WS_MAX_CONNECTIONS: int = int(os.getenv("WS_MAX_CONNECTIONS", "2000"))
+    WS_MAX_CONNECTIONS_PER_KEY: int = int(os.getenv("WS_MAX_CONNECTIONS_PER_KEY", "20"))
+    
+    # Event bus behind broadcasts: local (one process) | sqlite (several uvicorn workers)
+    EVENT_BUS_BACKEND: str = os.getenv("EVENT_BUS_BACKEND", "local")
+    EVENT_BUS_POLL_INTERVAL: float = float(os.getenv("EVENT_BUS_POLL_INTERVAL", "0.05"))
+    
+    # How often a standby worker retries for the Telegram owner lock (seconds)
+    LEADER_RETRY_INTERVAL: float = float(os.getenv("LEADER_RETRY_INTERVAL", "5"))
+    
+    # Telegram calls and connection state relayed from standby workers to the owner
+    TELEGRAM_BRIDGE_POLL_INTERVAL: float = float(os.getenv("TELEGRAM_BRIDGE_POLL_INTERVAL", "0.05"))
+    TELEGRAM_BRIDGE_STATUS_INTERVAL: float = float(os.getenv("TELEGRAM_BRIDGE_STATUS_INTERVAL", "2"))
+    TELEGRAM_BRIDGE_CALL_TIMEOUT: float = float(os.getenv("TELEGRAM_BRIDGE_CALL_TIMEOUT", "60"))
+    
+    # Album parts (same grouped_id) arriving within this window become one message (seconds)
+    TELEGRAM_ALBUM_WINDOW: float = float(os.getenv("TELEGRAM_ALBUM_WINDOW", "0.5"))
+    
+    # Telegram worker processes (0 or 1 = run all accounts in the API process)
+    TELEGRAM_WORKER_PROCESSES: int = int(os.getenv("TELEGRAM_WORKER_PROCESSES", "0"))
+    TELEGRAM_WORKER_CALL_TIMEOUT: float = float(os.getenv("TELEGRAM_WORKER_CALL_TIMEOUT", "60"))
+    
+    # Idle account hibernation (seconds, 0 = disabled)
+    TELEGRAM_HIBERNATE_AFTER: int = int(os.getenv("TELEGRAM_HIBERNATE_AFTER", "0"))
+    TELEGRAM_HIBERNATE_WAKE_INTERVAL: int = int(os.getenv("TELEGRAM_HIBERNATE_WAKE_INTERVAL", "900"))
+    TELEGRAM_HIBERNATE_CHECK_INTERVAL: int = int(os.getenv("TELEGRAM_HIBERNATE_CHECK_INTERVAL", "60"))
+    
+    # Update state (pts/qts) persistence interval in seconds (0 = disabled)
+    TELEGRAM_UPDATE_STATE_INTERVAL: int = int(os.getenv("TELEGRAM_UPDATE_STATE_INTERVAL", "30"))
+    
+    # Debounce for saving refreshed session strings (seconds, 0 = only on shutdown)
+    TELEGRAM_SESSION_SAVE_INTERVAL: int = int(os.getenv("TELEGRAM_SESSION_SAVE_INTERVAL", "30"))
+    
+    # Outbound rate limiting
+    TELEGRAM_FLOOD_WAIT_MAX: int = int(os.getenv("TELEGRAM_FLOOD_WAIT_MAX", "60"))
+    BULK_SEND_INTERVAL: float = float(os.getenv("BULK_SEND_INTERVAL", "1.0"))
+    BULK_SEND_MAX_RECIPIENTS: int = int(os.getenv("BULK_SEND_MAX_RECIPIENTS", "1000"))
+    
+    # Connection supervisor (seconds, interval 0 = disabled)
+    TELEGRAM_SUPERVISOR_INTERVAL: int = int(os.getenv("TELEGRAM_SUPERVISOR_INTERVAL", "10"))
+    TELEGRAM_PING_INTERVAL: int = int(os.getenv("TELEGRAM_PING_INTERVAL", "60"))
+    TELEGRAM_RECONNECT_BASE_DELAY: float = float(os.getenv("TELEGRAM_RECONNECT_BASE_DELAY", "2"))
+    TELEGRAM_RECONNECT_MAX_DELAY: float = float(os.getenv("TELEGRAM_RECONNECT_MAX_DELAY", "300"))
+    TELEGRAM_RECONNECT_CONCURRENCY: int = int(os.getenv("TELEGRAM_RECONNECT_CONCURRENCY", "2"))
+    TELEGRAM_FLAP_WINDOW: int = int(os.getenv("TELEGRAM_FLAP_WINDOW", "600"))
+    TELEGRAM_FLAP_THRESHOLD: int = int(os.getenv("TELEGRAM_FLAP_THRESHOLD", "5"))
     
     @classmethod
     def validate(cls) -> None:
@@ -26,6 +141,8 @@ class Config:
         required = {
             "ENCRYPTION_KEY": cls.ENCRYPTION_KEY,
             "TELEGRAM_SECRET_KEY_SERVICE": cls.TELEGRAM_SECRET_KEY_SERVICE,
+            "SUPABASE_URL": cls.SUPABASE_URL,
+            "SUPABASE_KEY": cls.SUPABASE_KEY,
         }
         
         missing = [key for key, value in required.items() if not value]
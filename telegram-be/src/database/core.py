@@ -4,7 +4,20 @@ import asyncio
 import logging
 from typing import Any, Optional
 from src.config import config
-from src.database.schema import CREATE_CONVERSATIONS_TABLE, CREATE_MESSAGES_TABLE
+from src.database.schema import (
+    CREATE_CONVERSATIONS_TABLE,
+    CREATE_MESSAGES_TABLE,
+    CREATE_UPDATE_STATE_TABLE,
+    CREATE_MEDIA_CACHE_TABLE,
+    CREATE_WS_EVENTS_TABLE,
+    CREATE_TICKETS_TABLE,
+    CREATE_TICKET_HISTORY_TABLE,
+    CREATE_TICKET_INDEXES,
+    CREATE_SYNC_STATE_TABLE,
+    CREATE_OUTBOX_TABLE,
+    CREATE_TELEGRAM_COMMANDS_TABLE,
+    CREATE_TELEGRAM_STATUS_TABLE
+)
 
 logger = logging.getLogger(__name__)
 
@@ -53,31 +66,83 @@ class DatabaseCore:
         """Create database tables using schema."""
         await self.conn.execute(CREATE_CONVERSATIONS_TABLE)
         await self.conn.execute(CREATE_MESSAGES_TABLE)
+        await self.conn.execute(CREATE_UPDATE_STATE_TABLE)
+        await self.conn.execute(CREATE_MEDIA_CACHE_TABLE)
+        await self.conn.execute(CREATE_WS_EVENTS_TABLE)
+        await self.conn.execute(CREATE_TICKETS_TABLE)
+        await self.conn.execute(CREATE_TICKET_HISTORY_TABLE)
+        for statement in CREATE_TICKET_INDEXES:
+            await self.conn.execute(statement)
+        await self.conn.execute(CREATE_SYNC_STATE_TABLE)
+        await self.conn.execute(CREATE_OUTBOX_TABLE)
+        await self.conn.execute(CREATE_TELEGRAM_COMMANDS_TABLE)
+        await self.conn.execute(CREATE_TELEGRAM_STATUS_TABLE)
         await self.conn.commit()
 
     async def _process_write_queue(self) -> None:
-        """Background task to process write operations sequentially."""
+        """
+        Background task to process write operations sequentially.
+        
+        Everything already queued is drained into one transaction (group
+        commit), so bursts such as a catch-up replay cost one fsync per
+        batch instead of one per row.
+        """
         while self._running:
             try:
-                # Get the next write operation
-                query, args, future = await self.write_queue.get()
+                # Get the next write operation, plus whatever else is waiting
+                batch = [await self.write_queue.get()]
+                while len(batch) < config.SQLITE_WRITE_BATCH_SIZE:
+                    try:
+                        batch.append(self.write_queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
                 
+                results = []
                 try:
-                    cursor = await self.conn.execute(query, args)
-                    await self.conn.commit()
+                    for query, args, future, many in batch:
+                        try:
+                            if query is None:
+                                # Several statements that must land together
+                                await self.conn.execute("SAVEPOINT atomic_write")
+                                try:
+                                    for statement, rows in args:
+                                        await self.conn.executemany(statement, rows)
+                                except Exception:
+                                    await self.conn.execute("ROLLBACK TO atomic_write")
+                                    raise
+                                finally:
+                                    await self.conn.execute("RELEASE atomic_write")
+                                results.append((future, True, None))
+                                continue
+                            if many:
+                                cursor = await self.conn.executemany(query, args)
+                                results.append((future, cursor.rowcount, None))
+                                continue
+                            cursor = await self.conn.execute(query, args)
+                            if "INSERT" in query.upper():
+                                # INSERT OR IGNORE hit the unique key -> nothing inserted
+                                results.append((future, cursor.lastrowid if cursor.rowcount else None, None))
+                            else:
+                                results.append((future, True, None))
+                        except Exception as e:
+                            logger.error(f"Database write error: {e}")
+                            results.append((future, None, e))
                     
-                    # Return result to the caller
-                    if not future.done():
-                        if "INSERT" in query.upper():
-                            future.set_result(cursor.lastrowid)
-                        else:
-                            future.set_result(True)
+                    await self.conn.commit()
                 except Exception as e:
-                    logger.error(f"Database write error: {e}")
-                    if not future.done():
-                        future.set_exception(e)
+                    logger.error(f"Database commit error: {e}")
+                    results = [(future, None, e) for _, _, future, _ in batch]
                 finally:
-                    self.write_queue.task_done()
+                    # Return results to the callers
+                    for future, result, error in results:
+                        if future.done():
+                            continue
+                        if error:
+                            future.set_exception(error)
+                        else:
+                            future.set_result(result)
+                    for _ in batch:
+                        self.write_queue.task_done()
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -88,5 +153,21 @@ class DatabaseCore:
         """Helper to push write op to queue and wait for result."""
         loop = asyncio.get_running_loop()
         future = loop.create_future()
-        await self.write_queue.put((query, args, future))
-        return await future
\ No newline at end of file
+        await self.write_queue.put((query, args, future, False))
+        return await future
+
+    async def _execute_write_many(self, query: str, args_list: list) -> int:
+        """Queue one statement for many parameter sets; returns affected row count."""
+        if not args_list:
+            return 0
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self.write_queue.put((query, args_list, future, True))
+        return await future
+
+    async def _execute_write_atomic(self, statements: list) -> None:
+        """Queue ``(query, args_list)`` pairs that commit all together or not at all."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        await self.write_queue.put((None, statements, future, False))
+        await future
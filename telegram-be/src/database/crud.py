@@ -1,10 +1,33 @@
 """Database CRUD Operations (Create, Read, Update, Delete)."""
+import asyncio
 import logging
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
+from src.utils.serialization import dumps, loads
 
 logger = logging.getLogger(__name__)
 
+# Mirrored ticket columns, and the subset a board card needs
+TICKET_COLUMNS = (
+    "id", "account_id", "chat_id", "status", "priority", "source",
+    "subject", "description", "created_at", "updated_at"
+)
+TICKET_CARD_COLUMNS = (
+    "id", "account_id", "chat_id", "status", "priority", "subject", "created_at", "updated_at"
+)
+TICKET_HISTORY_COLUMNS = (
+    "id", "ticket_id", "changed_by", "field_changed", "old_value", "new_value", "changed_at"
+)
+
+# Tickets whose outbox insert was parked: their later writes are parked too
+FAILED_INSERT_KEYS = "SELECT key FROM outbox WHERE status = 'failed' AND op = 'insert' AND table_name = 'tickets'"
+
+# Bucket start for the ticket summary, formatted like Postgres' date_trunc output
+SUMMARY_BUCKETS = {
+    "day": "date(created_at) || 'T00:00:00+00:00'",
+    "week": "date(created_at, 'weekday 0', '-6 days') || 'T00:00:00+00:00'",
+}
+
 class DatabaseCRUDMixin:
     """Mixin class containing all business logic for the database."""
 
@@ -15,7 +38,8 @@ class DatabaseCRUDMixin:
     telegram_account_id: str, 
     chat_id: str, 
     chat_name: str = None,
-    customer_data: dict = None  # ✅ NEW PARAMETER
+    customer_data: dict = None,  # ✅ NEW PARAMETER
+    timestamp: Optional[datetime] = None
 ) -> int:
         """Get or create a conversation with customer details."""
         # 1. Read (Allowed concurrently)
@@ -25,7 +49,7 @@ class DatabaseCRUDMixin:
         ) as cursor:
             row = await cursor.fetchone()
             
-        timestamp = datetime.now(timezone.utc)
+        timestamp = timestamp or datetime.now(timezone.utc)
         
         if row:
             # 2. Update (Queued)
@@ -102,32 +126,70 @@ class DatabaseCRUDMixin:
         message_id: str,
         direction: str,
         text: str,
-        status: str = "received"
+        status: str = "received",
+        timestamp: Optional[datetime] = None,
+        media: Optional[dict] = None,
+        chat_type: Optional[str] = None
     ) -> Optional[int]:
-        """Save a message to the database."""
+        """
+        Save a message to the database.
+        
+        Duplicates are rejected by the (account, chat, message_id) unique key,
+        so re-delivered messages (catch-up replays) return None.
+        ``chat_type`` is 'private', 'group' or 'channel' (unknown for sends).
+        """
         try:
-            # Check duplicate (Read)
-            async with self.conn.execute(
-                "SELECT id FROM messages WHERE telegram_account_id = ? AND chat_id = ? AND message_id = ?",
-                (telegram_account_id, str(chat_id), str(message_id))
-            ) as cursor:
-                if await cursor.fetchone():
-                    return None
-
-            current_time = datetime.now(timezone.utc)
+            current_time = timestamp or datetime.now(timezone.utc)
+            media = media or {}
 
             return await self._execute_write(
                 """
-                INSERT INTO messages 
-                (telegram_account_id, chat_id, message_id, direction, text, status, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT OR IGNORE INTO messages 
+                (telegram_account_id, chat_id, chat_type, message_id, direction, text, status, timestamp,
+                 media_type, media_mime_type, media_size, media_file_name)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (telegram_account_id, str(chat_id), str(message_id), direction, text, status, current_time)
+                (
+                    telegram_account_id, str(chat_id), chat_type, str(message_id), direction, text, status,
+                    current_time, media.get("type"), media.get("mime_type"), media.get("size"), media.get("file_name")
+                )
             )
         except Exception as e:
             logger.error(f"Error saving message: {e}")
             return None
     
+    async def save_messages_bulk(self, messages: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """
+        Save many messages in one write batch.
+        
+        Each dict takes the same fields as ``save_message``. Duplicates are
+        ignored via the unique key. Returns the row ID of each message, in
+        order (None for one that was already stored).
+        """
+        now = datetime.now(timezone.utc)
+        rows = [
+            (
+                m["telegram_account_id"], str(m["chat_id"]), m.get("chat_type"), str(m["message_id"]),
+                m["direction"], m.get("text"), m.get("status", "received"), m.get("timestamp") or now,
+                (m.get("media") or {}).get("type"), (m.get("media") or {}).get("mime_type"),
+                (m.get("media") or {}).get("size"), (m.get("media") or {}).get("file_name")
+            )
+            for m in messages
+        ]
+        # Queued together, so the writer commits them as one transaction
+        return list(await asyncio.gather(*(
+            self._execute_write(
+                """
+                INSERT OR IGNORE INTO messages 
+                (telegram_account_id, chat_id, chat_type, message_id, direction, text, status, timestamp,
+                 media_type, media_mime_type, media_size, media_file_name)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                row
+            )
+            for row in rows
+        )))
+    
     async def update_message_status(
         self, telegram_account_id: str, chat_id: str, message_id: str, status: str
     ) -> None:
@@ -141,6 +203,63 @@ class DatabaseCRUDMixin:
             (status, telegram_account_id, str(chat_id), str(message_id))
         )
     
+    async def update_message_text(
+        self, telegram_account_id: str, chat_id: str, message_id: str, text: str, edited_at: datetime
+    ) -> bool:
+        """Apply an edit to a stored message. Returns False if the message is unknown."""
+        updated = await self._execute_write_many(
+            """
+            UPDATE messages 
+            SET text = ?, edited_at = ?
+            WHERE telegram_account_id = ? AND chat_id = ? AND message_id = ? AND deleted_at IS NULL
+            """,
+            [(text, edited_at, telegram_account_id, str(chat_id), str(message_id))]
+        )
+        return updated > 0
+    
+    async def soft_delete_messages(
+        self, telegram_account_id: str, message_ids: List[str], chat_id: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Mark messages as deleted in one statement.
+        
+        ``chat_id`` may be omitted (Telegram does not say which chat a
+        private/group deletion belongs to). Those message IDs are unique
+        per account only outside channels, so only private and basic-group
+        chats are matched then; rows without a type (our own sends, rows
+        from before the column existed) take the type of their chat's
+        other messages. Returns the affected ``{"chat_id", "message_id"}``
+        pairs.
+        """
+        if not message_ids:
+            return []
+        
+        placeholders = ", ".join("?" for _ in message_ids)
+        conditions = f"telegram_account_id = ? AND message_id IN ({placeholders}) AND deleted_at IS NULL"
+        params = [telegram_account_id, *[str(m) for m in message_ids]]
+        if chat_id:
+            conditions += " AND chat_id = ?"
+            params.append(str(chat_id))
+        else:
+            conditions += """ AND COALESCE(chat_type, (
+                SELECT typed.chat_type FROM messages AS typed
+                WHERE typed.telegram_account_id = messages.telegram_account_id
+                  AND typed.chat_id = messages.chat_id AND typed.chat_type IS NOT NULL
+                LIMIT 1
+            )) IN ('private', 'group')"""
+        
+        async with self.conn.execute(
+            f"SELECT chat_id, message_id FROM messages WHERE {conditions}", params
+        ) as cursor:
+            affected = [dict(row) for row in await cursor.fetchall()]
+        
+        if affected:
+            await self._execute_write_many(
+                f"UPDATE messages SET deleted_at = ? WHERE {conditions}",
+                [(datetime.now(timezone.utc), *params)]
+            )
+        return affected
+    
     async def delete_conversation(self, conversation_id: int) -> bool:
         """Delete a conversation and its messages."""
         async with self.conn.execute(
@@ -185,11 +304,13 @@ class DatabaseCRUDMixin:
         async with self.conn.execute(
             """
             SELECT m.id, m.telegram_account_id, m.chat_id, m.message_id, 
-                   m.direction, m.text, m.timestamp, m.status
+                   m.direction, m.text, m.timestamp, m.status,
+                   m.media_type, m.media_mime_type, m.media_size, m.media_file_name,
+                   m.edited_at
             FROM messages m
             JOIN conversations c ON m.telegram_account_id = c.telegram_account_id 
                 AND m.chat_id = c.chat_id
-            WHERE c.id = ?
+            WHERE c.id = ? AND m.deleted_at IS NULL
             ORDER BY m.timestamp ASC
             LIMIT ?
             """,
@@ -198,6 +319,57 @@ class DatabaseCRUDMixin:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
     
+    async def get_recent_message_texts(
+        self, account_id: str, chat_id: str, direction: str = "incoming", limit: int = 5
+    ) -> List[str]:
+        """Texts of the latest messages in a chat, oldest first (e.g. for priority detection)."""
+        async with self.conn.execute(
+            """
+            SELECT text FROM messages
+            WHERE telegram_account_id = ? AND chat_id = ? AND direction = ?
+              AND deleted_at IS NULL AND text IS NOT NULL AND text != ''
+            ORDER BY timestamp DESC
+            LIMIT ?
+            """,
+            (account_id, chat_id, direction, limit)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [row["text"] for row in reversed(rows)]
+    
+    async def find_conversations(
+        self,
+        conversation_ids: Optional[List[int]] = None,
+        account_id: Optional[str] = None,
+        since: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """Resolve conversations by IDs and/or a filter in one query."""
+        conditions, params = [], []
+        if conversation_ids:
+            conditions.append(f"id IN ({', '.join('?' for _ in conversation_ids)})")
+            params.extend(conversation_ids)
+        if account_id:
+            conditions.append("telegram_account_id = ?")
+            params.append(account_id)
+        if since:
+            conditions.append("last_message_at >= ?")
+            params.append(since)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+        async with self.conn.execute(
+            f"""
+            SELECT id, telegram_account_id, chat_id, chat_name, last_message_at
+            FROM conversations
+            {where}
+            ORDER BY last_message_at DESC
+            LIMIT ?
+            """,
+            tuple(params)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+    
     async def get_conversation_by_id(self, conversation_id: int) -> Optional[Dict[str, Any]]:
         """Get conversation by ID."""
         async with self.conn.execute(
@@ -205,4 +377,455 @@ class DatabaseCRUDMixin:
             (conversation_id,)
         ) as cursor:
             row = await cursor.fetchone()
-            return dict(row) if row else None
\ No newline at end of file
+            return dict(row) if row else None
+
+    async def get_message_by_id(self, message_row_id: int) -> Optional[Dict[str, Any]]:
+        """Get a single message by its local row ID."""
+        async with self.conn.execute(
+            """
+            SELECT id, telegram_account_id, chat_id, message_id, direction, text, timestamp, status,
+                   media_type, media_mime_type, media_size, media_file_name, media_sha256
+            FROM messages WHERE id = ?
+            """,
+            (message_row_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+    # --- Media Cache ---
+
+    async def record_media_file(self, message_row_id: int, sha256: str, size: int, mime_type: str = None) -> None:
+        """Link a message to a cached file and register the file for LRU."""
+        await self._execute_write(
+            """
+            INSERT INTO media_cache (sha256, size, mime_type, last_accessed_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(sha256) DO UPDATE SET last_accessed_at = CURRENT_TIMESTAMP
+            """,
+            (sha256, size, mime_type)
+        )
+        await self._execute_write(
+            "UPDATE messages SET media_sha256 = ? WHERE id = ?",
+            (sha256, message_row_id)
+        )
+
+    async def touch_media_file(self, sha256: str) -> None:
+        """Mark a cached file as recently used."""
+        await self._execute_write(
+            "UPDATE media_cache SET last_accessed_at = CURRENT_TIMESTAMP WHERE sha256 = ?",
+            (sha256,)
+        )
+
+    async def get_media_cache_size(self) -> int:
+        """Total bytes held in the media cache."""
+        async with self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM media_cache") as cursor:
+            row = await cursor.fetchone()
+            return row[0]
+
+    async def get_lru_media_files(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Least recently used cached files first."""
+        async with self.conn.execute(
+            "SELECT sha256, size FROM media_cache ORDER BY last_accessed_at ASC LIMIT ?",
+            (limit,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+
+    async def delete_media_file(self, sha256: str) -> None:
+        """Forget an evicted file (messages keep their hash and re-download on demand)."""
+        await self._execute_write("DELETE FROM media_cache WHERE sha256 = ?", (sha256,))
+
+    # --- WebSocket replay log ---
+
+    async def save_ws_events(self, events: List[tuple]) -> int:
+        """Persist ``(seq, topics_json, payload_json)`` rows in one batch."""
+        return await self._execute_write_many(
+            "INSERT OR IGNORE INTO ws_events (seq, topics, payload) VALUES (?, ?, ?)",
+            events
+        )
+
+    async def append_ws_event(self, topics: str, payload: str) -> int:
+        """Append one event; its row ID is the global sequence number."""
+        return await self._execute_write(
+            "INSERT INTO ws_events (topics, payload) VALUES (?, ?)",
+            (topics, payload)
+        )
+
+    async def get_ws_events_after(self, seq: int, limit: int) -> List[Dict[str, Any]]:
+        """Events with a sequence number above ``seq``, oldest first."""
+        async with self.conn.execute(
+            "SELECT seq, topics, payload FROM ws_events WHERE seq > ? ORDER BY seq ASC LIMIT ?",
+            (seq, limit)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+
+    async def get_ws_event_bounds(self) -> tuple:
+        """(oldest, newest) persisted sequence numbers, or (None, None)."""
+        async with self.conn.execute("SELECT MIN(seq), MAX(seq) FROM ws_events") as cursor:
+            row = await cursor.fetchone()
+            return (row[0], row[1]) if row else (None, None)
+
+    async def prune_ws_events(self, before_seq: int) -> None:
+        await self._execute_write("DELETE FROM ws_events WHERE seq < ?", (before_seq,))
+
+    # --- Ticket mirror (Supabase is the system of record) ---
+
+    @staticmethod
+    def _ticket_upsert(tickets: List[Dict[str, Any]], force: bool = False) -> tuple:
+        """
+        Statement and rows to insert or refresh mirrored tickets.
+        
+        A row is only overwritten by a version with the same or a newer
+        ``updated_at``, so a slow pull cannot undo a fresher local write.
+        ``force`` skips that check (our own, not yet flushed writes).
+        """
+        updates = ", ".join(f"{column} = excluded.{column}" for column in TICKET_COLUMNS[1:])
+        guard = "" if force else "WHERE COALESCE(excluded.updated_at, '') >= COALESCE(tickets.updated_at, '')"
+        return (
+            f"""
+            INSERT INTO tickets ({", ".join(TICKET_COLUMNS)})
+            VALUES ({", ".join("?" for _ in TICKET_COLUMNS)})
+            ON CONFLICT(id) DO UPDATE SET {updates}
+            {guard}
+            """,
+            [tuple(ticket.get(column) for column in TICKET_COLUMNS) for ticket in tickets]
+        )
+
+    @staticmethod
+    def _ticket_history_insert(entries: List[Dict[str, Any]]) -> tuple:
+        """Statement and rows to insert mirrored history (append-only, duplicates ignored)."""
+        return (
+            f"""
+            INSERT OR IGNORE INTO ticket_history ({", ".join(TICKET_HISTORY_COLUMNS)})
+            VALUES ({", ".join("?" for _ in TICKET_HISTORY_COLUMNS)})
+            """,
+            [tuple(entry.get(column) for column in TICKET_HISTORY_COLUMNS) for entry in entries]
+        )
+
+    async def upsert_tickets(self, tickets: List[Dict[str, Any]]) -> int:
+        """Insert or refresh mirrored tickets in one write batch."""
+        return await self._execute_write_many(*self._ticket_upsert(tickets))
+
+    async def delete_mirrored_tickets(
+        self, ticket_id: Optional[str] = None, account_id: Optional[str] = None
+    ) -> None:
+        """Drop a ticket, or all tickets of an account, with their history."""
+        column, value = ("id", ticket_id) if ticket_id else ("account_id", account_id)
+        await self._execute_write_many(
+            f"DELETE FROM ticket_history WHERE ticket_id IN (SELECT id FROM tickets WHERE {column} = ?)",
+            [(value,)]
+        )
+        await self._execute_write_many(f"DELETE FROM tickets WHERE {column} = ?", [(value,)])
+
+    async def upsert_ticket_history(self, entries: List[Dict[str, Any]]) -> int:
+        return await self._execute_write_many(*self._ticket_history_insert(entries))
+
+    async def get_sync_cursor(self, name: str) -> Optional[str]:
+        """Last synced position for a mirrored table; None if it was never synced."""
+        async with self.conn.execute("SELECT cursor FROM sync_state WHERE name = ?", (name,)) as cursor:
+            row = await cursor.fetchone()
+            return row["cursor"] if row else None
+
+    async def set_sync_cursor(self, name: str, position: str) -> None:
+        await self._execute_write_many(
+            """
+            INSERT INTO sync_state (name, cursor, synced_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET cursor = excluded.cursor, synced_at = excluded.synced_at
+            """,
+            [(name, position, datetime.now(timezone.utc))]
+        )
+
+    async def list_mirrored_tickets(
+        self,
+        status: Optional[str] = None,
+        account_id: Optional[str] = None,
+        after: Optional[tuple] = None,
+        limit: int = 50,
+        card: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Tickets ordered by (updated_at, id) descending, starting after the ``after`` key."""
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if account_id:
+            conditions.append("account_id = ?")
+            params.append(account_id)
+        if after:
+            conditions.append("(updated_at < ? OR (updated_at = ? AND id < ?))")
+            params.extend([after[0], after[0], after[1]])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        columns = TICKET_CARD_COLUMNS if card else TICKET_COLUMNS
+        
+        async with self.conn.execute(
+            f"""
+            SELECT {", ".join(columns)} FROM tickets {where}
+            ORDER BY updated_at DESC, id DESC
+            LIMIT ?
+            """,
+            (*params, limit)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+
+    async def count_mirrored_tickets(self, status: Optional[str] = None, account_id: Optional[str] = None) -> int:
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if account_id:
+            conditions.append("account_id = ?")
+            params.append(account_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        async with self.conn.execute(f"SELECT COUNT(*) FROM tickets {where}", params) as cursor:
+            row = await cursor.fetchone()
+            return row[0]
+
+    async def get_mirrored_ticket(self, ticket_id: str, card: bool = False) -> Optional[Dict[str, Any]]:
+        columns = TICKET_CARD_COLUMNS if card else TICKET_COLUMNS
+        async with self.conn.execute(
+            f"SELECT {', '.join(columns)} FROM tickets WHERE id = ?", (ticket_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+    async def get_mirrored_active_ticket(self, account_id: str, chat_id: str) -> Optional[Dict[str, Any]]:
+        """The open or in-progress ticket of a chat, if any."""
+        async with self.conn.execute(
+            f"""
+            SELECT {", ".join(TICKET_COLUMNS)} FROM tickets
+            WHERE account_id = ? AND chat_id = ? AND status IN ('open', 'in_progress')
+            ORDER BY updated_at DESC
+            LIMIT 1
+            """,
+            (account_id, str(chat_id))
+        ) as cursor:
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+    async def count_mirrored_tickets_grouped(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        account_id: Optional[str] = None,
+        bucket: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Ticket counts per (bucket, status, priority); bucket is None without ``bucket``."""
+        conditions, params = [], []
+        if start_date:
+            conditions.append("created_at >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("created_at <= ?")
+            params.append(end_date)
+        if account_id:
+            conditions.append("account_id = ?")
+            params.append(account_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        bucket_expr = SUMMARY_BUCKETS.get(bucket, "NULL")
+        
+        async with self.conn.execute(
+            f"""
+            SELECT {bucket_expr} AS bucket, status, priority, COUNT(*) AS n
+            FROM tickets {where}
+            GROUP BY 1, 2, 3
+            ORDER BY 1
+            """,
+            params
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+
+    async def get_mirrored_ticket_history(self, ticket_id: str) -> List[Dict[str, Any]]:
+        async with self.conn.execute(
+            f"""
+            SELECT {", ".join(TICKET_HISTORY_COLUMNS)} FROM ticket_history
+            WHERE ticket_id = ?
+            ORDER BY changed_at DESC
+            """,
+            (ticket_id,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+
+    # --- Outbox (pending Supabase writes) ---
+
+    async def add_outbox_entries(
+        self,
+        entries: List[Dict[str, Any]],
+        tickets: List[Dict[str, Any]] = (),
+        history: List[Dict[str, Any]] = ()
+    ) -> None:
+        """
+        Record Supabase writes together with their effect on the local mirror.
+        
+        Each entry has ``op`` ("insert" / "update"), ``table``, ``key`` (the
+        ticket it belongs to; entries of one key are sent in order) and
+        ``payload``. Everything commits in one transaction.
+        """
+        statements = [(
+            f"""
+            INSERT INTO outbox (op, table_name, key, payload, status)
+            VALUES (?, ?, ?, ?, CASE WHEN ? IN ({FAILED_INSERT_KEYS}) THEN 'failed' ELSE 'pending' END)
+            """,
+            [(e["op"], e["table"], e["key"], dumps(e["payload"]), e["key"]) for e in entries]
+        )]
+        if tickets:
+            statements.append(self._ticket_upsert(tickets, force=True))
+        if history:
+            statements.append(self._ticket_history_insert(history))
+        await self._execute_write_atomic(statements)
+
+    async def get_outbox_entries(self, limit: int) -> List[Dict[str, Any]]:
+        """Oldest pending entries (due or not), in write order."""
+        async with self.conn.execute(
+            """
+            SELECT id, op, table_name, key, payload, attempts, next_attempt_at
+            FROM outbox WHERE status = 'pending'
+            ORDER BY id ASC
+            LIMIT ?
+            """,
+            (limit,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [{**dict(row), "payload": loads(row["payload"])} for row in rows]
+
+    async def get_pending_ticket_writes(
+        self, account_id: str, chat_id: str, ticket_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Unsent ticket writes of a chat, in write order.
+        
+        Covers tickets queued for insert for this chat and ``ticket_id``
+        (a ticket Supabase already has), with their queued updates.
+        """
+        async with self.conn.execute(
+            """
+            SELECT op, key, payload FROM outbox
+            WHERE status = 'pending' AND table_name = 'tickets' AND key IN (
+                SELECT key FROM outbox
+                WHERE status = 'pending' AND table_name = 'tickets' AND op = 'insert'
+                  AND json_extract(payload, '$.account_id') = ?
+                  AND json_extract(payload, '$.chat_id') = ?
+                UNION SELECT ?
+            )
+            ORDER BY id ASC
+            """,
+            (account_id, str(chat_id), ticket_id)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [{**dict(row), "payload": loads(row["payload"])} for row in rows]
+
+    async def get_pending_outbox_keys(self) -> set:
+        async with self.conn.execute("SELECT DISTINCT key FROM outbox WHERE status = 'pending'") as cursor:
+            return {row[0] for row in await cursor.fetchall()}
+
+    async def delete_outbox_entries(self, entry_ids: List[int]) -> None:
+        await self._execute_write_many("DELETE FROM outbox WHERE id = ?", [(i,) for i in entry_ids])
+
+    async def retry_outbox_entries(
+        self, entry_ids: List[int], next_attempt_at: float, error: str, max_attempts: int
+    ) -> None:
+        """
+        Count a failed attempt; entries out of attempts are parked as 'failed'.
+        
+        Once a ticket's insert is parked, the later writes of that ticket are
+        parked with it (Supabase has no row to apply them to) and the local
+        row it created is dropped from the mirror.
+        """
+        await self._execute_write_atomic([
+            (
+                """
+                UPDATE outbox
+                SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?,
+                    status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+                WHERE id = ?
+                """,
+                [(next_attempt_at, error, max_attempts, i) for i in entry_ids]
+            ),
+            (
+                f"""
+                UPDATE outbox SET status = 'failed', last_error = 'insert of this ticket failed'
+                WHERE status = 'pending' AND key IN ({FAILED_INSERT_KEYS})
+                """,
+                [()]
+            ),
+            (f"DELETE FROM ticket_history WHERE ticket_id IN ({FAILED_INSERT_KEYS})", [()]),
+            (f"DELETE FROM tickets WHERE id IN ({FAILED_INSERT_KEYS})", [()])
+        ])
+
+    async def get_outbox_stats(self) -> Dict[str, int]:
+        async with self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status") as cursor:
+            counts = {row[0]: row[1] for row in await cursor.fetchall()}
+        return {"pending": counts.get("pending", 0), "failed": counts.get("failed", 0)}
+
+    # --- Telegram command bridge (calls forwarded to the owning worker) ---
+
+    async def add_telegram_command(self, method: str, payload: str, created_at: float) -> int:
+        return await self._execute_write(
+            "INSERT INTO telegram_commands (method, payload, created_at) VALUES (?, ?, ?)",
+            (method, payload, created_at)
+        )
+
+    async def get_telegram_command(self, command_id: int) -> Optional[Dict[str, Any]]:
+        async with self.conn.execute(
+            "SELECT id, method, status, result FROM telegram_commands WHERE id = ?", (command_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+            return dict(row) if row else None
+
+    async def claim_telegram_commands(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Mark the oldest pending commands as running and return them.
+        
+        A command deleted by its caller (timed out) in the meantime is
+        not claimed.
+        """
+        async with self.conn.execute(
+            "SELECT id, method, payload FROM telegram_commands WHERE status = 'pending' ORDER BY id ASC LIMIT ?",
+            (limit,)
+        ) as cursor:
+            rows = [dict(row) for row in await cursor.fetchall()]
+        claimed = await asyncio.gather(*(
+            self._execute_write_many(
+                "UPDATE telegram_commands SET status = 'running' WHERE id = ? AND status = 'pending'",
+                [(row["id"],)]
+            )
+            for row in rows
+        ))
+        return [row for row, count in zip(rows, claimed) if count]
+
+    async def finish_telegram_command(self, command_id: int, result: str) -> None:
+        await self._execute_write(
+            "UPDATE telegram_commands SET status = 'done', result = ? WHERE id = ?",
+            (result, command_id)
+        )
+
+    async def delete_telegram_command(self, command_id: int) -> None:
+        await self._execute_write("DELETE FROM telegram_commands WHERE id = ?", (command_id,))
+
+    async def prune_telegram_commands(self, before: float) -> None:
+        """Drop commands whose caller is gone (it deletes its own row when done)."""
+        await self._execute_write("DELETE FROM telegram_commands WHERE created_at < ?", (before,))
+
+    async def replace_telegram_status(self, rows: List[tuple]) -> None:
+        """Swap in ``(account_id, connected, hibernating, health_json)`` rows."""
+        statements = [("DELETE FROM telegram_status", [()])]
+        if rows:
+            statements.append((
+                "INSERT INTO telegram_status (account_id, connected, hibernating, health) VALUES (?, ?, ?, ?)",
+                rows
+            ))
+        await self._execute_write_atomic(statements)
+
+    async def get_telegram_status(self) -> List[Dict[str, Any]]:
+        async with self.conn.execute(
+            "SELECT account_id, connected, hibernating, health FROM telegram_status"
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [{**dict(row), "health": loads(row["health"]) if row["health"] else None} for row in rows]
+
+    async def drop_running_telegram_commands(self) -> None:
+        """Commands a previous owner was running when it exited; their callers get an error."""
+        await self._execute_write("DELETE FROM telegram_commands WHERE status = 'running'", ())
@@ -21,11 +21,133 @@ CREATE TABLE IF NOT EXISTS messages (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     telegram_account_id TEXT NOT NULL,
     chat_id TEXT NOT NULL,
+    chat_type TEXT,
     message_id TEXT NOT NULL,
     direction TEXT NOT NULL CHECK(direction IN ('incoming', 'outgoing')),
     text TEXT,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     status TEXT NOT NULL DEFAULT 'received' CHECK(status IN ('received', 'sent', 'failed')),
+    media_type TEXT,
+    media_mime_type TEXT,
+    media_size INTEGER,
+    media_file_name TEXT,
+    media_sha256 TEXT,
+    edited_at TIMESTAMP,
+    deleted_at TIMESTAMP,
     UNIQUE(telegram_account_id, chat_id, message_id)
 );
-"""
\ No newline at end of file
+"""
+
+CREATE_MEDIA_CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS media_cache (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mime_type TEXT,
+    last_accessed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+CREATE_UPDATE_STATE_TABLE = """
+CREATE TABLE IF NOT EXISTS telegram_update_state (
+    account_id TEXT NOT NULL,
+    entity_id INTEGER NOT NULL,
+    pts INTEGER NOT NULL,
+    qts INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY(account_id, entity_id)
+);
+"""
+
+CREATE_WS_EVENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS ws_events (
+    seq INTEGER PRIMARY KEY,
+    topics TEXT,
+    payload TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Local mirror of the Supabase tickets / ticket_history tables (Supabase stays
+# the system of record; timestamps are kept as the ISO strings it returns)
+CREATE_TICKETS_TABLE = """
+CREATE TABLE IF NOT EXISTS tickets (
+    id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    status TEXT,
+    priority TEXT,
+    source TEXT,
+    subject TEXT,
+    description TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+"""
+
+CREATE_TICKET_HISTORY_TABLE = """
+CREATE TABLE IF NOT EXISTS ticket_history (
+    id TEXT PRIMARY KEY,
+    ticket_id TEXT NOT NULL,
+    changed_by TEXT,
+    field_changed TEXT,
+    old_value TEXT,
+    new_value TEXT,
+    changed_at TEXT
+);
+"""
+
+CREATE_TICKET_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_tickets_status_updated ON tickets(status, updated_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_updated ON tickets(updated_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_chat ON tickets(account_id, chat_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_ticket_history_ticket ON ticket_history(ticket_id, changed_at DESC)",
+)
+
+# Incremental sync position per mirrored table
+CREATE_SYNC_STATE_TABLE = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    cursor TEXT,
+    synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Supabase writes recorded locally and sent in batches by the outbox flusher
+CREATE_OUTBOX_TABLE = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL CHECK(op IN ('insert', 'update')),
+    table_name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Telegram calls made by API workers that do not own the clients; the owner
+# runs them and writes the result back (payload and result are encrypted)
+CREATE_TELEGRAM_COMMANDS_TABLE = """
+CREATE TABLE IF NOT EXISTS telegram_commands (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'running', 'done')),
+    result TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+# Connection state of each account, published by the owning worker
+CREATE_TELEGRAM_STATUS_TABLE = """
+CREATE TABLE IF NOT EXISTS telegram_status (
+    account_id TEXT PRIMARY KEY,
+    connected INTEGER NOT NULL,
+    hibernating INTEGER NOT NULL,
+    health TEXT
+);
+"""
@@ -1,23 +1,101 @@
 """Supabase client for Telegram account management."""
+import asyncio
+import base64
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import List, Dict, Any, Optional
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions # type: ignore
 from src.config import config
 from src.config.encryption import encryptor
+from src.utils.serialization import dumps, loads
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Account columns safe to list; secrets are only selected to start a client
+ACCOUNT_LIST_COLUMNS = "id, account_label, api_id, is_active, created_at"
+ACCOUNT_SECRET_COLUMNS = "api_hash, session_string"
+
+# Allowed values (mirrors the CHECK constraints in db/supabase_migration.sql)
+TICKET_STATUSES = ("open", "in_progress", "resolved", "closed")
+TICKET_PRIORITIES = ("low", "medium", "high", "urgent")
+
+# Ticket field sets: "card" is what a board card renders, "detail" the full row
+TICKET_FIELDS = {
+    "card": "id, account_id, chat_id, status, priority, subject, created_at, updated_at, telegram_accounts(account_label)",
+    "detail": "*, telegram_accounts(account_label)",
+}
+
+
+def summary_counts(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in zero counts for statuses/priorities with no tickets."""
+    by_status = data.get("by_status") or {}
+    by_priority = data.get("by_priority") or {}
+    return {
+        "total": int(data.get("total") or 0),
+        "by_status": {status: int(by_status.get(status, 0)) for status in TICKET_STATUSES},
+        "by_priority": {priority: int(by_priority.get(priority, 0)) for priority in TICKET_PRIORITIES}
+    }
+
+
+def encode_cursor(ticket: Dict[str, Any]) -> str:
+    """Opaque keyset cursor pointing just after ``ticket`` in (updated_at, id) order."""
+    return base64.urlsafe_b64encode(dumps([ticket["updated_at"], ticket["id"]]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Inverse of ``encode_cursor``; raises ValueError for a malformed cursor.
+
+    Both parts end up inside a PostgREST filter, so they must be exactly a
+    timestamp and a UUID.
+    """
+    try:
+        updated_at, ticket_id = loads(base64.urlsafe_b64decode(cursor.encode()))
+        datetime.fromisoformat(updated_at)
+        ticket_id = str(uuid.UUID(ticket_id))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return updated_at, ticket_id
+
 class SupabaseClient:
-    """Manage Telegram accounts in Supabase."""
+    """
+    Manage Telegram accounts in Supabase.
+    
+    supabase-py's client is synchronous, so every request runs on a small
+    bounded thread pool (``_execute``) instead of the event loop. The
+    underlying HTTP client is shared, so connections are pooled and kept
+    alive across calls.
+    """
     
     def __init__(self):
         """Initialize Supabase client."""
-        self.client: Client = create_client(config.SUPABASE_URL, config.SUPABASE_KEY)
+        self.client: Client = create_client(
+            config.SUPABASE_URL,
+            config.SUPABASE_KEY,
+            options=ClientOptions(postgrest_client_timeout=config.SUPABASE_TIMEOUT)
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.SUPABASE_MAX_WORKERS, thread_name_prefix="supabase"
+        )
         # ✅ FIX: Define BOTH table names here
         self.table_name = "telegram_accounts" 
         self.tickets_table = "tickets"
     
+    async def _execute(self, query, timeout: Optional[float] = None):
+        """Run a query builder's blocking ``execute()`` off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._executor, query.execute),
+            timeout=timeout or config.SUPABASE_TIMEOUT
+        )
+    
+    def close(self) -> None:
+        """Stop the request threads (pending requests are abandoned)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
     async def create_account(
         self,
         account_label: str,
@@ -28,87 +106,111 @@ class SupabaseClient:
         """Create a new Telegram account."""
         encrypted_session = encryptor.encrypt(session_string)
         
-        response = self.client.table(self.table_name).insert({
-            "account_label": account_label,
-            "api_id": api_id,
-            "api_hash": api_hash,
-            "session_string": encrypted_session,
-            "is_active": True
-        }).execute()
+        response = await self._execute(
+            self.client.table(self.table_name).insert({
+                "account_label": account_label,
+                "api_id": api_id,
+                "api_hash": api_hash,
+                "session_string": encrypted_session,
+                "is_active": True
+            })
+        )
         
         return response.data[0] if response.data else None
     
     async def get_active_accounts(self) -> List[Dict[str, Any]]:
-        """Get ONLY active Telegram accounts (for backend startup)."""
-        response = self.client.table(self.table_name).select("*").eq("is_active", True).execute()
-        
-        accounts = []
-        for account in response.data:
-            account_copy = account.copy()
-            if account_copy.get("session_string"):
-                try:
-                    account_copy["session_string"] = encryptor.decrypt(account_copy["session_string"])
-                except Exception:
-                    pass
-            accounts.append(account_copy)
+        """Get ONLY active Telegram accounts with decrypted sessions (for backend startup)."""
+        response = await self._execute(
+            self.client.table(self.table_name)
+            .select(f"{ACCOUNT_LIST_COLUMNS}, {ACCOUNT_SECRET_COLUMNS}")
+            .eq("is_active", True)
+        )
         
-        return accounts
+        return [self._decrypt_session(account) for account in response.data]
 
     async def get_all_accounts(self) -> List[Dict[str, Any]]:
-        """Get ALL accounts (active and inactive) for the dashboard."""
-        response = self.client.table(self.table_name).select("*").order("created_at").execute()
+        """Get ALL accounts (active and inactive) for the dashboard, without secrets."""
+        response = await self._execute(
+            self.client.table(self.table_name).select(ACCOUNT_LIST_COLUMNS).order("created_at")
+        )
         
-        accounts = []
-        for account in response.data:
-            account_copy = account.copy()
-            if account_copy.get("session_string"):
-                try:
-                    account_copy["session_string"] = encryptor.decrypt(account_copy["session_string"])
-                except Exception:
-                    pass
-            accounts.append(account_copy)
-        
-        return accounts
+        return response.data
     
     async def get_account_by_id(self, account_id: str) -> Optional[Dict[str, Any]]:
-        """Get account by ID."""
-        response = self.client.table(self.table_name).select("*").eq("id", account_id).execute()
+        """Get account by ID with its decrypted session (to start a client)."""
+        response = await self._execute(
+            self.client.table(self.table_name)
+            .select(f"{ACCOUNT_LIST_COLUMNS}, {ACCOUNT_SECRET_COLUMNS}")
+            .eq("id", account_id)
+        )
         
         if not response.data:
             return None
         
-        account = response.data[0].copy()
+        return self._decrypt_session(response.data[0])
+    
+    @staticmethod
+    def _decrypt_session(account: Dict[str, Any]) -> Dict[str, Any]:
+        account = account.copy()
         if account.get("session_string"):
             try:
                 account["session_string"] = encryptor.decrypt(account["session_string"])
             except Exception:
                 pass
-        
         return account
     
     async def update_session_string(self, account_id: str, session_string: str) -> None:
         """Update session string for an account."""
         encrypted_session = encryptor.encrypt(session_string)
         
-        self.client.table(self.table_name).update({
-            "session_string": encrypted_session
-        }).eq("id", account_id).execute()
+        await self._execute(
+            self.client.table(self.table_name).update({
+                "session_string": encrypted_session
+            }).eq("id", account_id)
+        )
+    
+    async def update_session_strings(self, sessions: Dict[str, str]) -> None:
+        """Update session strings for many accounts in one round trip."""
+        if not sessions:
+            return
+        
+        payload = [
+            {"id": account_id, "session_string": encryptor.encrypt(session_string)}
+            for account_id, session_string in sessions.items()
+        ]
+        
+        try:
+            await self._execute(
+                self.client.rpc("update_session_strings", {"p_sessions": payload})
+            )
+        except Exception as e:
+            # RPC not migrated yet: fall back to one update per account
+            logger.warning(f"update_session_strings RPC failed, updating one by one: {e}")
+            for row in payload:
+                await self._execute(
+                    self.client.table(self.table_name).update({
+                        "session_string": row["session_string"]
+                    }).eq("id", row["id"])
+                )
     
     async def update_account_label(self, account_id: str, new_label: str) -> Optional[Dict[str, Any]]:
         """Update the label of an account."""
-        response = self.client.table(self.table_name).update({
-            "account_label": new_label
-        }).eq("id", account_id).execute()
+        response = await self._execute(
+            self.client.table(self.table_name).update({
+                "account_label": new_label
+            }).eq("id", account_id)
+        )
         
         return response.data[0] if response.data else None
 
     async def activate_account(self, account_id: str) -> bool:
         """Activate an account (set is_active=True)"""
         try:
-            self.client.table('telegram_accounts')\
-                .update({"is_active": True})\
-                .eq("id", account_id)\
-                .execute()
+            await self._execute(
+                self.client.table('telegram_accounts')
+                .update({"is_active": True})
+                .eq("id", account_id)
+            )
             return True
         except Exception as e:
             logger.error(f"Error activating account: {e}")
@@ -117,10 +219,11 @@ class SupabaseClient:
     async def deactivate_account(self, account_id: str) -> bool:
         """Deactivate an account (set is_active=False)"""
         try:
-            self.client.table('telegram_accounts')\
-                .update({"is_active": False})\
-                .eq("id", account_id)\
-                .execute()
+            await self._execute(
+                self.client.table('telegram_accounts')
+                .update({"is_active": False})
+                .eq("id", account_id)
+            )
             return True
         except Exception as e:
             logger.error(f"Error deactivating account: {e}")
@@ -128,24 +231,38 @@ class SupabaseClient:
 
     async def delete_account(self, account_id: str) -> None:
         """Permanently delete an account."""
-        self.client.table(self.table_name).delete().eq("id", account_id).execute()
+        await self._execute(
+            self.client.table(self.table_name).delete().eq("id", account_id)
+        )
 
-    async def create_ticket(self, ticket_data: dict) -> Dict[str, Any]:
-        """Create a new ticket"""
+    async def create_ticket(self, ticket_data: dict, account_label: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create a new ticket.
+        
+        The insert returns the new row, so with ``account_label`` (from the
+        local account registry) the dashboard shape is built without another
+        request. Without it the row is re-read joined with its account.
+        """
         try:
-            response = self.client.table(self.tickets_table)\
-                .insert(ticket_data)\
-                .execute()
+            response = await self._execute(
+                self.client.table(self.tickets_table)
+                .insert(ticket_data)
+            )
             
             if not response.data:
                 raise Exception("Failed to create ticket")
             
+            ticket = response.data[0]
+            if account_label is not None:
+                return {**ticket, "telegram_accounts": {"account_label": account_label}}
+            
             # Fetch with account label
-            ticket = self.client.table(self.tickets_table)\
-                .select("*, telegram_accounts(account_label)")\
-                .eq("id", response.data[0]['id'])\
-                .single()\
-                .execute()
+            ticket = await self._execute(
+                self.client.table(self.tickets_table)
+                .select(TICKET_FIELDS["detail"])
+                .eq("id", ticket['id'])
+                .single()
+            )
             
             return ticket.data
             
@@ -157,12 +274,13 @@ class SupabaseClient:
         """Check if there is an open ticket for this account+chat combo."""
         try:
             # Filter for tickets that are NOT closed or resolved
-            response = self.client.table(self.tickets_table)\
-                .select("*")\
-                .eq("account_id", account_id)\
-                .eq("chat_id", chat_id)\
-                .in_("status", ["open", "in_progress"])\
-                .execute()
+            response = await self._execute(
+                self.client.table(self.tickets_table)
+                .select("*")
+                .eq("account_id", account_id)
+                .eq("chat_id", chat_id)
+                .in_("status", ["open", "in_progress"])
+            )
             
             return response.data[0] if response.data else None
         except Exception as e:
@@ -171,12 +289,13 @@ class SupabaseClient:
 
     async def get_tickets_for_chat(self, account_id: str, chat_id: str) -> List[Dict[str, Any]]:
         """Get history of all tickets for a specific chat."""
-        response = self.client.table(self.tickets_table)\
-            .select("*")\
-            .eq("account_id", account_id)\
-            .eq("chat_id", chat_id)\
-            .order("created_at", desc=True)\
-            .execute()
+        response = await self._execute(
+            self.client.table(self.tickets_table)
+            .select("*")
+            .eq("account_id", account_id)
+            .eq("chat_id", chat_id)
+            .order("created_at", desc=True)
+        )
         return response.data
     
     async def update_ticket(self, ticket_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -188,10 +307,11 @@ class SupabaseClient:
             # Clean None values so we don't overwrite active data with null
             clean_updates = {k: v for k, v in updates.items() if v is not None}
             
-            response = self.client.table(self.tickets_table)\
-                .update(clean_updates)\
-                .eq("id", ticket_id)\
-                .execute()
+            response = await self._execute(
+                self.client.table(self.tickets_table)
+                .update(clean_updates)
+                .eq("id", ticket_id)
+            )
                 
             return response.data[0] if response.data else None
         except Exception as e:
@@ -201,59 +321,109 @@ class SupabaseClient:
     async def delete_ticket(self, ticket_id: str) -> bool:
         """Permanently delete a ticket."""
         try:
-            self.client.table(self.tickets_table).delete().eq("id", ticket_id).execute()
+            await self._execute(
+                self.client.table(self.tickets_table).delete().eq("id", ticket_id)
+            )
             return True
         except Exception as e:
             logger.error(f"Supabase delete ticket error: {e}")
             return False
 
-    async def list_all_tickets(self, status_filter: str = None) -> List[Dict[str, Any]]:
-        """Get all tickets, optionally filtered by status."""
-        try:
-            # We select related account info to display nicely in dashboard
-            query = self.client.table(self.tickets_table)\
-                .select("*, telegram_accounts(account_label)")\
-                .order("created_at", desc=True)
-                
-            if status_filter:
-                query = query.eq("status", status_filter)
-                
-            response = query.execute()
-            return response.data
-        except Exception as e:
-            logger.error(f"Supabase list tickets error: {e}")
-            return []
+    async def list_all_tickets(
+        self,
+        status_filter: str = None,
+        agent_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: str = "detail",
+        with_count: bool = False
+    ) -> Dict[str, Any]:
+        """
+        One page of tickets, most recently updated first.
+        
+        Keyset pagination on (updated_at, id): pass the returned
+        ``next_cursor`` back as ``cursor`` for the following page (None when
+        there are no more). ``fields`` picks a set from ``TICKET_FIELDS``.
+        ``with_count`` also returns the total number of matching tickets.
+        """
+        # We select related account info to display nicely in dashboard
+        query = self.client.table(self.tickets_table)\
+            .select(TICKET_FIELDS[fields], count="exact" if with_count else None)\
+            .order("updated_at", desc=True)\
+            .order("id", desc=True)\
+            .limit(limit + 1)
+        
+        if status_filter:
+            query = query.eq("status", status_filter)
+        if agent_id:
+            query = query.eq("account_id", agent_id)
+        if cursor:
+            updated_at, ticket_id = decode_cursor(cursor)
+            query = query.or_(
+                f'updated_at.lt."{updated_at}",'
+                f'and(updated_at.eq."{updated_at}",id.lt."{ticket_id}")'
+            )
+        
+        response = await self._execute(query)
+        tickets = response.data[:limit]
+        
+        page = {
+            "tickets": tickets,
+            "next_cursor": encode_cursor(tickets[-1]) if len(response.data) > limit else None
+        }
+        if with_count:
+            page["total"] = response.count
+        return page
 
-    async def get_ticket_summary(self, start_date: str, end_date: str, agent_id: Optional[str] = None):
-        """Get ticket count summary by status and priority"""
+    async def get_ticket_board(self, agent_id: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """First page of card fields (plus a total) for every status column, fetched concurrently."""
+        pages = await asyncio.gather(*[
+            self.list_all_tickets(status, agent_id, limit, fields="card", with_count=True)
+            for status in TICKET_STATUSES
+        ])
+        return dict(zip(TICKET_STATUSES, pages))
+
+    async def get_ticket(self, ticket_id: str, fields: str = "detail") -> Optional[Dict[str, Any]]:
+        """Get a single ticket with its account label."""
+        response = await self._execute(
+            self.client.table(self.tickets_table)
+            .select(TICKET_FIELDS[fields])
+            .eq("id", ticket_id)
+            .limit(1)
+        )
+        return response.data[0] if response.data else None
+
+    async def get_ticket_summary(
+        self,
+        start_date: str,
+        end_date: str,
+        agent_id: Optional[str] = None,
+        bucket: Optional[str] = None
+    ):
+        """
+        Get ticket count summary by status and priority.
+        
+        Counted in Postgres by the ``ticket_summary`` RPC, so the cost does
+        not grow with ticket volume. ``bucket`` ("day" or "week") adds a
+        ``buckets`` list with the same counts per period.
+        """
         try:
-            query = self.client.table(self.tickets_table).select("status, priority")
+            result = await self._execute(
+                self.client.rpc("ticket_summary", {
+                    "p_start": start_date or None,
+                    "p_end": end_date or None,
+                    "p_account_id": agent_id or None,
+                    "p_bucket": bucket
+                })
+            )
+            data = result.data or {}
             
-            if start_date:
-                query = query.gte("created_at", start_date)
-            if end_date:
-                query = query.lte("created_at", end_date)
-            if agent_id:
-                query = query.eq("account_id", agent_id)
-            
-            result = query.execute()
-            tickets = result.data
-            
-            summary = {
-                "total": len(tickets),
-                "by_status": {
-                    "open": len([t for t in tickets if t["status"] == "open"]),
-                    "in_progress": len([t for t in tickets if t["status"] == "in_progress"]),
-                    "resolved": len([t for t in tickets if t["status"] == "resolved"]),
-                    "closed": len([t for t in tickets if t["status"] == "closed"])
-                },
-                "by_priority": {
-                    "low": len([t for t in tickets if t["priority"] == "low"]),
-                    "medium": len([t for t in tickets if t["priority"] == "medium"]),
-                    "high": len([t for t in tickets if t["priority"] == "high"]),
-                    "urgent": len([t for t in tickets if t["priority"] == "urgent"])
-                }
-            }
+            summary = summary_counts(data)
+            if bucket:
+                summary["buckets"] = [
+                    {"start": row["start"], **summary_counts(row)}
+                    for row in data.get("buckets") or []
+                ]
             
             return summary
             
@@ -261,52 +431,55 @@ class SupabaseClient:
             logger.error(f"Error getting ticket summary: {e}")
             raise
 
-    async def get_tickets_by_status(self, status: str, agent_id: Optional[str] = None):
-        """Get all tickets with specific status"""
-        try:
-            query = self.client.table(self.tickets_table)\
-                .select("*, telegram_accounts(account_label)")\
-                .eq("status", status)\
-                .order("updated_at", desc=True)
-            
-            if agent_id:
-                query = query.eq("account_id", agent_id)
-            
-            result = query.execute()
-            return result.data
-            
-        except Exception as e:
-            logger.error(f"Error getting tickets by status: {e}")
-            raise
-    
-    async def get_conversation_by_chat(self, account_id: str, chat_id: str):
-        """Get conversation by account_id and chat_id"""
-        try:
-            result = self.client.table(self.conversations_table)\
-                .select("*")\
-                .eq("telegram_account_id", account_id)\
-                .eq("chat_id", chat_id)\
-                .limit(1)\
-                .execute()
-            
-            return result.data[0] if result.data else None
-        except Exception as e:
-            logger.error(f"Error getting conversation: {e}")
-            return None
+    async def get_rows_changed_since(
+        self,
+        table: str,
+        column: str,
+        since: Optional[str] = None,
+        after: Optional[tuple] = None,
+        limit: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        Rows of ``table`` ordered by (``column``, id) ascending, for mirroring.
+        
+        ``since`` starts at a timestamp (inclusive); ``after`` continues
+        strictly after a (timestamp, id) key from the previous batch.
+        """
+        query = self.client.table(table)\
+            .select("*")\
+            .order(column)\
+            .order("id")\
+            .limit(limit)
+        
+        if after:
+            query = query.or_(
+                f'{column}.gt."{after[0]}",'
+                f'and({column}.eq."{after[0]}",id.gt."{after[1]}")'
+            )
+        elif since:
+            query = query.gte(column, since)
+        
+        response = await self._execute(query)
+        return response.data
 
-    async def get_messages(self, conversation_id: int):
-        """Get messages for a conversation"""
-        try:
-            result = self.client.table(self.messages_table)\
-                .select("*")\
-                .eq("conversation_id", conversation_id)\
-                .order("timestamp", desc=False)\
-                .execute()
-            
-            return result.data
-        except Exception as e:
-            logger.error(f"Error getting messages: {e}")
-            return []
+    async def insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert many rows in one request, idempotently.
+        
+        Rows carry client-generated ``id``s; a retried insert whose rows
+        already landed is ignored (only newly inserted rows are returned).
+        """
+        response = await self._execute(
+            self.client.table(table).upsert(rows, on_conflict="id", ignore_duplicates=True)
+        )
+        return response.data
+
+    async def update_rows(self, table: str, ids: List[str], updates: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Apply the same update to many rows in one request."""
+        response = await self._execute(
+            self.client.table(table).update(updates).in_("id", ids)
+        )
+        return response.data
 
     async def log_ticket_change(
         self, 
@@ -318,25 +491,30 @@ class SupabaseClient:
     ):
         """Log ticket changes for audit trail (manual logging)"""
         try:
-            self.client.table("ticket_history").insert({
-                "ticket_id": ticket_id,
-                "changed_by": changed_by,
-                "field_changed": field,
-                "old_value": str(old_val) if old_val else None,
-                "new_value": str(new_val)
-            }).execute()
+            response = await self._execute(
+                self.client.table("ticket_history").insert({
+                    "ticket_id": ticket_id,
+                    "changed_by": changed_by,
+                    "field_changed": field,
+                    "old_value": str(old_val) if old_val else None,
+                    "new_value": str(new_val)
+                })
+            )
             logger.info(f"✅ Logged change: {field} = {old_val} → {new_val}")
+            return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error logging ticket change: {e}")
+            return None
 
     async def get_ticket_history(self, ticket_id: str):
         """Get change history for a ticket"""
         try:
-            result = self.client.table("ticket_history")\
-                .select("*")\
-                .eq("ticket_id", ticket_id)\
-                .order("changed_at", desc=True)\
-                .execute()
+            result = await self._execute(
+                self.client.table("ticket_history")
+                .select("*")
+                .eq("ticket_id", ticket_id)
+                .order("changed_at", desc=True)
+            )
             
             return result.data
         except Exception as e:
@@ -346,11 +524,12 @@ class SupabaseClient:
     async def get_agent_attributes(self, account_id: str) -> Optional[Dict[str, Any]]:
         """Get agent attributes (persona, knowledge, schedule, etc)"""
         try:
-            response = self.client.table('telegram_accounts')\
-                .select("persona, knowledge, schedule, integration, ticketing_settings")\
-                .eq("id", account_id)\
-                .single()\
-                .execute()
+            response = await self._execute(
+                self.client.table('telegram_accounts')
+                .select("persona, knowledge, schedule, integration, ticketing_settings")
+                .eq("id", account_id)
+                .single()
+            )
             
             return response.data if response.data else None
         except Exception as e:
@@ -381,10 +560,11 @@ class SupabaseClient:
             if not updates:
                 raise ValueError("No valid attributes to update")
             
-            response = self.client.table('telegram_accounts')\
-                .update(updates)\
-                .eq("id", account_id)\
-                .execute()
+            response = await self._execute(
+                self.client.table('telegram_accounts')
+                .update(updates)
+                .eq("id", account_id)
+            )
             
             return response.data[0] if response.data else None
         except Exception as e:
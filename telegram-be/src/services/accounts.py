@@ -0,0 +1,67 @@
+"""In-process registry of Telegram accounts for read-heavy paths."""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from src.config import config
+from src.database.supabase_client import supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+class AccountRegistry:
+    """
+    Cached account list without secrets (see ``ACCOUNT_LIST_COLUMNS``).
+
+    Loaded from Supabase on first use and reloaded when older than
+    ``ACCOUNT_REGISTRY_TTL`` seconds, so edits made outside this process
+    show up eventually. Our own account routes call ``invalidate()`` after
+    every change so the dashboard sees them on the next read. Sessions are
+    never cached here: they are fetched and decrypted only when a client
+    starts (``supabase_client.get_account_by_id``).
+    """
+
+    def __init__(self, ttl: float):
+        """Initialize registry."""
+        self.ttl = ttl
+        self._accounts: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def _ensure_loaded(self) -> None:
+        if self._fresh():
+            return
+        async with self._lock:
+            # Another caller may have reloaded while we waited
+            if self._fresh():
+                return
+            accounts = await supabase_client.get_all_accounts()
+            self._accounts = {str(account["id"]): account for account in accounts}
+            self._loaded_at = time.monotonic()
+            logger.debug(f"Account registry loaded {len(accounts)} accounts")
+
+    def invalidate(self) -> None:
+        """Drop the cache; the next read reloads from Supabase."""
+        self._loaded_at = None
+
+    async def list(self, active_only: bool = False) -> List[Dict[str, Any]]:
+        """Accounts ordered by creation time."""
+        await self._ensure_loaded()
+        return [
+            account for account in self._accounts.values()
+            if account.get("is_active") or not active_only
+        ]
+
+    async def get(self, account_id: str) -> Optional[Dict[str, Any]]:
+        await self._ensure_loaded()
+        return self._accounts.get(str(account_id))
+
+    async def label(self, account_id: str) -> Optional[str]:
+        account = await self.get(account_id)
+        return account.get("account_label") if account else None
+
+
+account_registry = AccountRegistry(config.ACCOUNT_REGISTRY_TTL)
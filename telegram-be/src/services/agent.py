@@ -1,8 +1,9 @@
 """Agent service for handling automated interactions and tickets."""
 import logging
-from src.database.supabase_client import supabase_client
+from src.services.tickets import ticket_store
 from src.telegram import telegram_manager
 from src.api.websocket import connection_manager
+from src.services.accounts import account_registry
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +36,7 @@ async def process_agent_actions(message_data: dict) -> None:
 async def _handle_ticket_submission(account_id: str, chat_id: str, text: str) -> None:
     """Parse text and create a ticket if one doesn't exist."""
     # Check for existing active ticket
-    active_ticket = await supabase_client.get_active_ticket(account_id, chat_id)
+    active_ticket = await ticket_store.get_active_ticket(account_id, chat_id)
     
     if active_ticket:
         short_id = active_ticket['id'].split('-')[0]
@@ -63,7 +64,8 @@ async def _handle_ticket_submission(account_id: str, chat_id: str, text: str) ->
         elif lower_line.startswith("problem:"):
             description = line_clean.split(":", 1)[1].strip()
 
-    ticket = await supabase_client.create_ticket({
+    # Acknowledged from the local store; Supabase is written by the outbox
+    ticket = await ticket_store.submit_ticket({
         "account_id": account_id,
         "chat_id": chat_id,
         "source": "user_command",
@@ -71,7 +73,7 @@ async def _handle_ticket_submission(account_id: str, chat_id: str, text: str) ->
         "subject": subject,
         "description": description,
         "status": "open"
-    })
+    }, account_label=await account_registry.label(account_id))
     
     if ticket:
         short_id = ticket['id'].split('-')[0]
@@ -90,10 +92,10 @@ async def _handle_ticket_submission(account_id: str, chat_id: str, text: str) ->
 
 async def _handle_ticket_closure(account_id: str, chat_id: str) -> None:
     """Close an active ticket if requested by user."""
-    active_ticket = await supabase_client.get_active_ticket(account_id, chat_id)
+    active_ticket = await ticket_store.get_active_ticket(account_id, chat_id)
     
     if active_ticket:
-        await supabase_client.update_ticket(active_ticket['id'], {"status": "closed"})
+        closed_ticket = await ticket_store.queue_ticket_update(active_ticket, {"status": "closed"})
         
         short_id = active_ticket['id'].split('-')[0]
         await telegram_manager.send_message(
@@ -103,5 +105,5 @@ async def _handle_ticket_closure(account_id: str, chat_id: str) -> None:
         
         await connection_manager.broadcast({
             "type": "ticket_updated",
-            "data": {**active_ticket, "status": "closed"}
+            "data": closed_ticket
         })
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""Bulk outbound messaging through rate-limited per-account lanes."""
+import asyncio
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+from src.config import config
+from src.database import db
+from src.telegram import telegram_manager
+from src.api.websocket import connection_manager
+
+logger = logging.getLogger(__name__)
+
+# Persist and broadcast results in batches of this size
+RESULT_BATCH_SIZE = 50
+
+# Running jobs (keeps their tasks referenced until they finish)
+active_jobs: Dict[str, "BulkSendJob"] = {}
+
+
+class BulkSendJob:
+    """
+    Send one text to many conversations.
+
+    Conversations are grouped by account into lanes. Lanes run in parallel,
+    and each lane sends sequentially at ``BULK_SEND_INTERVAL`` so every
+    account stays under Telegram's limits. Results are persisted and
+    broadcast in batches. Progress can be consumed with ``progress()``; the
+    job keeps running if nobody is listening.
+    """
+
+    def __init__(self, conversations: List[Dict[str, Any]], text: str):
+        """Initialize job."""
+        self.id = uuid.uuid4().hex
+        self.conversations = conversations
+        self.text = text
+        self.total = len(conversations)
+        self.sent = 0
+        self.failed = 0
+        self.task: Optional[asyncio.Task] = None
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._results: List[Dict[str, Any]] = []
+
+    def start(self) -> "BulkSendJob":
+        active_jobs[self.id] = self
+        self.task = asyncio.create_task(self._run())
+        self.task.add_done_callback(lambda _: active_jobs.pop(self.id, None))
+        return self
+
+    async def progress(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield progress events until the job finishes."""
+        while True:
+            event = await self._events.get()
+            yield event
+            if event["type"] == "completed":
+                break
+
+    def _summary(self) -> Dict[str, Any]:
+        return {"job_id": self.id, "total": self.total, "sent": self.sent, "failed": self.failed}
+
+    async def _run(self) -> None:
+        lanes = defaultdict(list)
+        for conversation in self.conversations:
+            lanes[conversation["telegram_account_id"]].append(conversation)
+
+        self._events.put_nowait({"type": "started", **self._summary(), "accounts": len(lanes)})
+        logger.info(f"Bulk send {self.id}: {self.total} chats across {len(lanes)} accounts")
+
+        try:
+            await asyncio.gather(*(self._lane(account_id, convs) for account_id, convs in lanes.items()))
+        finally:
+            await self._flush()
+            summary = {"type": "completed", **self._summary()}
+            self._events.put_nowait(summary)
+            await connection_manager.broadcast({"type": "bulk_send_completed", "data": summary})
+            logger.info(f"Bulk send {self.id} done: {self.sent} sent, {self.failed} failed")
+
+    async def _lane(self, account_id: str, conversations: List[Dict[str, Any]]) -> None:
+        """Send to one account's chats, spaced by the per-account interval."""
+        next_slot = 0.0
+        for conversation in conversations:
+            delay = next_slot - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_slot = time.monotonic() + config.BULK_SEND_INTERVAL
+
+            message_id = await telegram_manager.send_message(
+                account_id=account_id,
+                chat_id=conversation["chat_id"],
+                text=self.text
+            )
+            await self._record(conversation, message_id)
+
+    async def _record(self, conversation: Dict[str, Any], message_id: Optional[int]) -> None:
+        status = "sent" if message_id else "failed"
+        if message_id:
+            self.sent += 1
+        else:
+            self.failed += 1
+
+        result = {
+            "conversation_id": conversation["id"],
+            "account_id": conversation["telegram_account_id"],
+            "chat_id": conversation["chat_id"],
+            "message_id": str(message_id) if message_id else f"failed_{self.id}_{conversation['id']}",
+            "text": self.text,
+            "status": status,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        self._results.append(result)
+        self._events.put_nowait({"type": "result", **result})
+
+        if len(self._results) >= RESULT_BATCH_SIZE:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        """Persist and broadcast buffered results in one batch."""
+        if not self._results:
+            return
+
+        batch, self._results = self._results, []
+        # One insert per result (group-committed by the writer), so results
+        # whose Telegram update was already stored and broadcast are skipped
+        saved_ids = await asyncio.gather(*(
+            db.save_message(
+                telegram_account_id=r["account_id"],
+                chat_id=r["chat_id"],
+                message_id=r["message_id"],
+                direction="outgoing",
+                text=r["text"],
+                status=r["status"],
+                timestamp=datetime.fromisoformat(r["timestamp"])
+            )
+            for r in batch
+        ))
+        messages = [{**r, "id": saved_id} for r, saved_id in zip(batch, saved_ids) if saved_id is not None]
+
+        if messages:
+            await connection_manager.broadcast({
+                "type": "messages_sent_bulk",
+                "data": {"job_id": self.id, "messages": messages}
+            })
+        self._events.put_nowait({"type": "progress", **self._summary()})
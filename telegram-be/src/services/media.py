@@ -0,0 +1,124 @@
+"""Content-addressed local cache for Telegram media files."""
+import asyncio
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+from src.config import config
+from src.database import db
+from src.telegram import telegram_manager
+
+logger = logging.getLogger(__name__)
+
+
+class MediaCache:
+    """
+    Fetch media lazily and keep it on disk by SHA-256.
+
+    Files are downloaded in chunks straight to disk, stored under
+    ``<root>/<sha[:2]>/<sha>`` (identical files are stored once), and
+    evicted least-recently-used once the cache exceeds ``max_bytes``.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        """Initialize cache."""
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._downloads: Dict[int, asyncio.Task] = {}
+
+    def path_for(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256
+
+    def cached_path(self, message: Dict[str, Any]) -> Optional[Path]:
+        """Path of the message's file if it is already on disk."""
+        sha256 = message.get("media_sha256")
+        if sha256 and self.path_for(sha256).exists():
+            return self.path_for(sha256)
+        return None
+
+    async def get_file(self, message: Dict[str, Any]) -> Optional[Path]:
+        """
+        Path to the cached file for a message row, downloading it if needed.
+
+        Concurrent requests for the same message share one download.
+        """
+        path = self.cached_path(message)
+        if path:
+            await db.touch_media_file(path.name)
+            return path
+
+        message_row_id = message["id"]
+        if message_row_id not in self._downloads:
+            self._downloads[message_row_id] = asyncio.create_task(self._download(message))
+        try:
+            return await asyncio.shield(self._downloads[message_row_id])
+        finally:
+            task = self._downloads.get(message_row_id)
+            if task and task.done():
+                del self._downloads[message_row_id]
+
+    async def _download(self, message: Dict[str, Any]) -> Optional[Path]:
+        tmp_dir = self.root / "tmp"
+        await asyncio.to_thread(tmp_dir.mkdir, parents=True, exist_ok=True)
+        tmp_path = tmp_dir / uuid.uuid4().hex
+
+        try:
+            result = await telegram_manager.download_media(
+                message["telegram_account_id"],
+                message["chat_id"],
+                message["message_id"],
+                str(tmp_path)
+            )
+            if not result:
+                return None
+
+            final_path = self.path_for(result["sha256"])
+            await asyncio.to_thread(self._store, tmp_path, final_path)
+
+            await db.record_media_file(
+                message["id"], result["sha256"], result["size"], result.get("mime_type")
+            )
+            logger.info(f"Cached media for message {message['id']} ({result['size']} bytes)")
+
+            await self._evict()
+            return final_path
+        finally:
+            await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+
+    @staticmethod
+    def _store(tmp_path: Path, final_path: Path) -> None:
+        """Move a finished download into place (identical files are kept once)."""
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        if final_path.exists():
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, final_path)
+
+    async def _evict(self) -> None:
+        """Remove least recently used files until the cache fits its budget."""
+        total = await db.get_media_cache_size()
+        while total > self.max_bytes:
+            candidates = await db.get_lru_media_files(limit=100)
+            if not candidates:
+                break
+
+            evicted = 0
+            for entry in candidates:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    await asyncio.to_thread(self.path_for(entry["sha256"]).unlink, missing_ok=True)
+                except OSError as e:
+                    logger.error(f"Failed to evict cached media {entry['sha256']}: {e}")
+                    continue
+                await db.delete_media_file(entry["sha256"])
+                total -= entry["size"]
+                evicted += 1
+
+            if not evicted:
+                break
+
+
+# Global media cache
+media_cache = MediaCache(config.MEDIA_CACHE_DIR, config.MEDIA_CACHE_MAX_BYTES)
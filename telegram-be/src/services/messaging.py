@@ -2,6 +2,7 @@
 
 """Service for handling core messaging logic."""
 import logging
+from datetime import datetime
 from src.database import db
 from src.api.websocket import connection_manager
 from src.services.agent import process_agent_actions
@@ -14,41 +15,139 @@ async def handle_incoming_message(message_data: dict) -> None:
     1. Save to Local DB
     2. Broadcast to Dashboard
     3. Trigger Agent Logic
+    
+    Outgoing messages sent from another device on the same account are
+    stored too. Ones we sent ourselves (send_reply) are already saved under
+    the same Telegram message ID, so the unique key drops them without a read.
+    
+    Albums arrive as one message_data with an ``album`` list; all parts are
+    saved in one write batch and broadcast as one event.
     """
     try:
+        outgoing = message_data.get("direction") == "outgoing"
+        
         # ✅ Extract customer data from message_data
         customer_data = message_data.get("customer_data", {})
         
+        # Keep Telegram's timestamp so caught-up messages land in order
+        timestamp = datetime.fromisoformat(message_data["timestamp"])
+        
         # 1. Save to LOCAL Database with customer details
         await db.get_or_create_conversation(
             telegram_account_id=message_data["account_id"],
             chat_id=message_data["chat_id"],
-            chat_name=message_data.get("sender_name"),
-            customer_data=customer_data  # ✅ PASS customer data
+            chat_name=None if outgoing else message_data.get("sender_name"),
+            customer_data=customer_data,  # ✅ PASS customer data
+            timestamp=timestamp
         )
         
-        saved_id = await db.save_message(
-            telegram_account_id=message_data["account_id"],
-            chat_id=message_data["chat_id"],
-            message_id=message_data["message_id"],
-            direction="incoming",
-            text=message_data["text"],
-            status="received"
-        )
+        if message_data.get("album"):
+            # One row per part, one write batch
+            row_ids = await db.save_messages_bulk([
+                {
+                    "telegram_account_id": message_data["account_id"],
+                    "chat_id": message_data["chat_id"],
+                    "chat_type": message_data.get("chat_type"),
+                    "message_id": part["message_id"],
+                    "direction": "outgoing" if outgoing else "incoming",
+                    "text": part["text"],
+                    "status": "sent" if outgoing else "received",
+                    "timestamp": timestamp,
+                    "media": part["media"]
+                }
+                for part in message_data["album"]
+            ])
+            is_new = any(row_id is not None for row_id in row_ids)
+            message_data = {
+                **message_data,
+                "album": [{**part, "id": row_id} for part, row_id in zip(message_data["album"], row_ids)]
+            }
+            saved_id = next(
+                (part["id"] for part in message_data["album"] if part["message_id"] == message_data["message_id"]),
+                None
+            )
+        else:
+            saved_id = await db.save_message(
+                telegram_account_id=message_data["account_id"],
+                chat_id=message_data["chat_id"],
+                message_id=message_data["message_id"],
+                direction="outgoing" if outgoing else "incoming",
+                text=message_data["text"],
+                status="sent" if outgoing else "received",
+                timestamp=timestamp,
+                media=message_data.get("media"),
+                chat_type=message_data.get("chat_type")
+            )
+            is_new = saved_id is not None
         
-        if saved_id:
+        if is_new:
             # 2. Broadcast to WebSocket
             await connection_manager.broadcast({
-                "type": "message_received",
+                "type": "message_sent" if outgoing else "message_received",
                 "data": {
                     **message_data,
+                    "status": "sent" if outgoing else "received",
                     "id": saved_id
                 }
             })
+            if outgoing:
+                return
             logger.info(f"Received message from {message_data.get('sender_name', 'Unknown')}")
 
             # 3. Trigger Agent / Ticket Automation
             await process_agent_actions(message_data)
 
     except Exception as e:
-        logger.error(f"Error handling incoming message: {e}", exc_info=True)
\ No newline at end of file
+        logger.error(f"Error handling incoming message: {e}", exc_info=True)
+
+
+async def handle_message_edited(edit_data: dict) -> None:
+    """Apply an edit locally and push a ``message_edited`` delta."""
+    try:
+        updated = await db.update_message_text(
+            telegram_account_id=edit_data["account_id"],
+            chat_id=edit_data["chat_id"],
+            message_id=edit_data["message_id"],
+            text=edit_data["text"],
+            edited_at=datetime.fromisoformat(edit_data["edited_at"])
+        )
+        
+        # Edits of messages we never stored (or already deleted) are dropped
+        if updated:
+            await connection_manager.broadcast({
+                "type": "message_edited",
+                "data": edit_data
+            })
+    
+    except Exception as e:
+        logger.error(f"Error handling edited message: {e}", exc_info=True)
+
+
+async def handle_message_deleted(delete_data: dict) -> None:
+    """Soft-delete messages locally and push a ``message_deleted`` delta."""
+    try:
+        affected = await db.soft_delete_messages(
+            telegram_account_id=delete_data["account_id"],
+            message_ids=delete_data["message_ids"],
+            chat_id=delete_data.get("chat_id")
+        )
+        if not affected:
+            return
+        
+        # One delta per chat, so clients can patch each open conversation
+        by_chat = {}
+        for row in affected:
+            by_chat.setdefault(row["chat_id"], []).append(row["message_id"])
+        
+        for chat_id, message_ids in by_chat.items():
+            await connection_manager.broadcast({
+                "type": "message_deleted",
+                "data": {
+                    "account_id": delete_data["account_id"],
+                    "chat_id": chat_id,
+                    "message_ids": message_ids
+                }
+            })
+    
+    except Exception as e:
+        logger.error(f"Error handling deleted messages: {e}", exc_info=True)
@@ -0,0 +1,189 @@
+"""Outbox that sends locally recorded writes to Supabase in batches."""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from postgrest.exceptions import APIError # type: ignore
+from src.config import config
+from src.database import db
+from src.database.supabase_client import supabase_client
+from src.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Backoff between attempts of a failing entry (seconds, doubled per attempt)
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 300
+
+# Tickets are inserted before the history rows that reference them
+INSERT_ORDER = {"tickets": 0, "ticket_history": 1}
+
+# How the local mirror is refreshed from the rows Supabase returns
+MIRRORS = {"tickets": db.upsert_tickets, "ticket_history": db.upsert_ticket_history}
+
+
+class SupabaseOutbox:
+    """
+    Supabase writes made from the message-handling path.
+
+    ``enqueue`` commits the writes to the local ``outbox`` table (together
+    with their effect on the ticket mirror) and returns at once. A
+    background flusher sends pending entries as bulk inserts (one request
+    per table) and bulk updates (one request per distinct update), retrying
+    failures with exponential backoff. Inserts carry client-generated IDs
+    and are sent as upserts that ignore duplicates, so a retry after a lost
+    response cannot create a row twice.
+
+    Entries sharing a ``key`` (the ticket ID) are applied in order: while
+    one is waiting for a retry, the later ones wait too. Entries that fail
+    ``OUTBOX_MAX_ATTEMPTS`` times are parked with status 'failed'; a parked
+    ticket insert parks every write of that ticket, later ones included,
+    and removes the ticket from the local mirror (``get_metrics`` counts
+    parked entries).
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int, max_attempts: int):
+        """Initialize outbox."""
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        # Entries left over from the previous run are sent right away
+        self._wake.set()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Final outbox flush failed, entries kept for next start: {e}")
+
+    async def enqueue(
+        self,
+        entries: List[Dict[str, Any]],
+        tickets: List[Dict[str, Any]] = (),
+        history: List[Dict[str, Any]] = ()
+    ) -> None:
+        """Record writes (see ``db.add_outbox_entries``) and wake the flusher."""
+        await db.add_outbox_entries(entries, tickets, history)
+        self._wake.set()
+
+    async def flush(self) -> int:
+        """Send one batch of due entries; returns how many were delivered."""
+        entries = await db.get_outbox_entries(self.batch_size)
+        now = time.time()
+        held, updated = set(), set()
+        inserts: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        updates: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+
+        # Entries after one that cannot go out in this batch are held back too
+        for entry in entries:
+            key = entry["key"]
+            if key in held:
+                continue
+            if entry["next_attempt_at"] > now:
+                held.add(key)
+            elif entry["op"] == "insert":
+                inserts[entry["table_name"]].append(entry)
+            elif key not in updated:
+                updated.add(key)
+                updates[(entry["table_name"], dumps(entry["payload"]))].append(entry)
+            else:
+                # A second update of the same row waits for the next batch
+                held.add(key)
+
+        # Keys whose write failed in this batch; their later writes wait
+        failed = set()
+        sent = 0
+        for table in sorted(inserts, key=lambda name: INSERT_ORDER.get(name, len(INSERT_ORDER))):
+            group = [entry for entry in inserts[table] if entry["key"] not in failed]
+            sent += await self._send(
+                table, group, failed,
+                lambda batch, table=table: supabase_client.insert_rows(table, [e["payload"] for e in batch])
+            )
+        for (table, _), group in updates.items():
+            group = [entry for entry in group if entry["key"] not in failed]
+            sent += await self._send(
+                table, group, failed,
+                lambda batch, table=table: supabase_client.update_rows(
+                    table, [e["key"] for e in batch], batch[0]["payload"]
+                )
+            )
+        return sent
+
+    async def _send(
+        self,
+        table: str,
+        group: List[Dict[str, Any]],
+        failed: set,
+        request: Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+    ) -> int:
+        """
+        Deliver a group in one request.
+        
+        If Supabase rejects the request (e.g. a constraint violation), its
+        entries are retried one by one so a bad entry does not hold back the
+        rest. Transport errors and timeouts retry the whole group later.
+        """
+        if not group:
+            return 0
+        try:
+            rows = await request(group)
+        except Exception as e:
+            if len(group) > 1 and isinstance(e, APIError):
+                sent = 0
+                for entry in group:
+                    sent += await self._send(table, [entry], failed, request)
+                return sent
+            await self._retry(group, e)
+            failed.update(entry["key"] for entry in group)
+            return 0
+
+        await db.delete_outbox_entries([entry["id"] for entry in group])
+        if rows and table in MIRRORS:
+            try:
+                await MIRRORS[table](rows)
+            except Exception as e:
+                logger.warning(f"Failed to mirror flushed {table} rows: {e}")
+        return len(group)
+
+    async def _retry(self, group: List[Dict[str, Any]], error: Exception) -> None:
+        attempts = max(entry["attempts"] for entry in group) + 1
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+        if attempts >= self.max_attempts:
+            logger.error(f"Giving up on outbox entries {[e['id'] for e in group]} after {attempts} attempts: {error}")
+        else:
+            logger.warning(f"Outbox write failed (attempt {attempts}), retrying in {delay}s: {error}")
+        await db.retry_outbox_entries(
+            [entry["id"] for entry in group], time.time() + delay, str(error), self.max_attempts
+        )
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                # Keep going while full batches are being delivered
+                while await self.flush() >= self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox flush failed: {e}")
+
+    async def get_metrics(self) -> Dict[str, int]:
+        return await db.get_outbox_stats()
+
+
+outbox = SupabaseOutbox(config.OUTBOX_FLUSH_INTERVAL, config.OUTBOX_BATCH_SIZE, config.OUTBOX_MAX_ATTEMPTS)
@@ -0,0 +1,326 @@
+"""Ticket reads served from a local SQLite mirror of Supabase."""
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from src.config import config
+from src.database import db
+from src.database.supabase_client import (
+    supabase_client,
+    TICKET_STATUSES,
+    encode_cursor,
+    decode_cursor,
+    summary_counts
+)
+from src.services.accounts import account_registry
+from src.services.outbox import outbox
+
+logger = logging.getLogger(__name__)
+
+# Rows per incremental pull request
+PULL_BATCH = 1000
+
+# Re-read this far behind the sync cursor, so rows committed out of
+# timestamp order by concurrent writers are not skipped
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Supabase stamps tickets with NOW() AT TIME ZONE 'Asia/Jakarta' in timestamptz
+# columns: Jakarta wall-clock time labelled UTC. Local stamps follow suit.
+JAKARTA = timezone(timedelta(hours=7))
+
+
+def _server_now() -> str:
+    return datetime.now(JAKARTA).replace(tzinfo=timezone.utc).isoformat()
+
+
+def _rewind(position: str) -> Optional[str]:
+    if not position:
+        return None
+    try:
+        return (datetime.fromisoformat(position) - SYNC_OVERLAP).isoformat()
+    except ValueError:
+        return position
+
+
+class TicketStore:
+    """
+    Tickets and ticket history, read locally and written to Supabase.
+
+    Supabase stays the system of record: every write goes there first and
+    the returned row is then upserted into the SQLite mirror. Changes made
+    elsewhere (other processes, the Supabase dashboard, audit triggers) are
+    pulled incrementally by ``updated_at`` / ``changed_at`` every
+    ``TICKET_SYNC_INTERVAL`` seconds, and right after our own writes.
+
+    Until the first full pull has completed (ever, not per process) reads
+    fall through to Supabase. Deletions made outside this API are not seen
+    by the incremental pull.
+
+    Writes made while handling chat messages (``submit_ticket``,
+    ``queue_ticket_update``) go through the outbox instead: they are
+    applied to the mirror at once and reach Supabase shortly after. Pulls
+    leave rows with unsent outbox entries alone, and reads served by
+    Supabase see a chat's unsent writes through ``get_active_ticket``.
+    """
+
+    def __init__(self, sync_interval: float):
+        """Initialize store."""
+        self.sync_interval = sync_interval
+        self.ready = False
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._mirrors = (
+            ("tickets", "updated_at", db.upsert_tickets),
+            ("ticket_history", "changed_at", db.upsert_ticket_history),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sync_interval > 0
+
+    async def start(self, sync: bool = True) -> None:
+        """
+        Serve reads from the mirror and, with ``sync``, keep it up to date.
+        
+        Only one process pulls (see ``leader_lock``); the others read the
+        shared mirror once a first pull has completed.
+        """
+        if not self.enabled:
+            logger.info("Ticket mirror disabled, reading tickets from Supabase")
+            return
+        if self._task:
+            return
+        # A mirror from a previous run can serve reads while we catch up
+        await self._check_ready()
+        self._task = asyncio.create_task(self._sync_loop() if sync else self._wait_ready_loop())
+
+    async def _check_ready(self) -> None:
+        cursors = [await db.get_sync_cursor(table) for table, _, _ in self._mirrors]
+        self.ready = all(position is not None for position in cursors)
+
+    async def _wait_ready_loop(self) -> None:
+        """Without a sync loop of our own: switch to the mirror once it is filled."""
+        while not self.ready:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self._check_ready()
+            except Exception as e:
+                logger.warning(f"Could not check ticket mirror state: {e}")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def promote(self) -> None:
+        """Start pulling (this process now owns ticket sync)."""
+        await self.stop()
+        await self.start()
+
+    def request_sync(self) -> None:
+        """Pull soon (e.g. history rows written by Supabase triggers)."""
+        self._wake.set()
+
+    async def sync(self) -> None:
+        """Pull everything changed since the last sync."""
+        for table, column, save in self._mirrors:
+            position = await db.get_sync_cursor(table)
+            since, after, newest = _rewind(position), None, position or ""
+            while True:
+                rows = await supabase_client.get_rows_changed_since(table, column, since, after, PULL_BATCH)
+                if rows:
+                    if table == "tickets":
+                        pending = await db.get_pending_outbox_keys()
+                        await save([row for row in rows if row["id"] not in pending])
+                    else:
+                        await save(rows)
+                    after = (rows[-1][column], rows[-1]["id"])
+                    newest = max(newest, after[0] or "")
+                if len(rows) < PULL_BATCH:
+                    break
+            await db.set_sync_cursor(table, newest)
+        self.ready = True
+
+    async def _sync_loop(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ticket mirror sync failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.sync_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _mirror(self, ticket: Optional[Dict[str, Any]]) -> None:
+        if not ticket or not self.enabled:
+            return
+        try:
+            row = {key: value for key, value in ticket.items() if key != "telegram_accounts"}
+            await db.upsert_tickets([row])
+        except Exception as e:
+            # The next pull repairs the mirror
+            logger.warning(f"Failed to mirror ticket {ticket.get('id')}: {e}")
+        self.request_sync()
+
+    async def _with_labels(self, tickets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach ``telegram_accounts.account_label`` like the Supabase join does."""
+        try:
+            labels = {str(a["id"]): a.get("account_label") for a in await account_registry.list()}
+        except Exception as e:
+            logger.warning(f"Account labels unavailable: {e}")
+            labels = {}
+        for ticket in tickets:
+            label = labels.get(str(ticket["account_id"]))
+            ticket["telegram_accounts"] = {"account_label": label} if label is not None else None
+        return tickets
+
+    # --- Writes (Supabase first, then the mirror) ---
+
+    async def create_ticket(self, ticket_data: dict, account_label: Optional[str] = None) -> Dict[str, Any]:
+        ticket = await supabase_client.create_ticket(ticket_data, account_label=account_label)
+        await self._mirror(ticket)
+        return ticket
+
+    async def update_ticket(self, ticket_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ticket = await supabase_client.update_ticket(ticket_id, updates)
+        await self._mirror(ticket)
+        return ticket
+
+    async def delete_ticket(self, ticket_id: str) -> bool:
+        deleted = await supabase_client.delete_ticket(ticket_id)
+        if deleted and self.enabled:
+            await db.delete_mirrored_tickets(ticket_id=ticket_id)
+        return deleted
+
+    async def forget_account(self, account_id: str) -> None:
+        """Drop an account's tickets (Supabase cascades the delete)."""
+        if self.enabled:
+            await db.delete_mirrored_tickets(account_id=account_id)
+
+    # --- Queued writes (outbox: acknowledged locally, sent in the background) ---
+
+    async def submit_ticket(self, ticket_data: dict, account_label: Optional[str] = None) -> Dict[str, Any]:
+        """Open a ticket without waiting for Supabase; returns the local row."""
+        ticket = {"id": str(uuid.uuid4()), **ticket_data}
+        now = _server_now()
+        local = {**ticket, "created_at": now, "updated_at": now}
+        await outbox.enqueue(
+            [{"op": "insert", "table": "tickets", "key": ticket["id"], "payload": ticket}],
+            tickets=[local] if self.enabled else ()
+        )
+        return {**local, "telegram_accounts": {"account_label": account_label} if account_label is not None else None}
+
+    async def queue_ticket_update(self, ticket: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Update a ticket without waiting for Supabase; returns the updated local row."""
+        updated = {**ticket, **updates, "updated_at": _server_now()}
+        await outbox.enqueue(
+            [{"op": "update", "table": "tickets", "key": ticket["id"], "payload": updates}],
+            tickets=[updated] if self.enabled else ()
+        )
+        return updated
+
+    # --- Reads (mirror once synced, Supabase before that) ---
+
+    async def list_all_tickets(
+        self,
+        status_filter: str = None,
+        agent_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: str = "detail",
+        with_count: bool = False
+    ) -> Dict[str, Any]:
+        """Same pages (and cursors) as ``SupabaseClient.list_all_tickets``."""
+        if not self.ready:
+            return await supabase_client.list_all_tickets(status_filter, agent_id, limit, cursor, fields, with_count)
+
+        after = decode_cursor(cursor) if cursor else None
+        rows = await db.list_mirrored_tickets(status_filter, agent_id, after, limit + 1, card=fields == "card")
+        tickets = await self._with_labels(rows[:limit])
+
+        page = {
+            "tickets": tickets,
+            "next_cursor": encode_cursor(tickets[-1]) if len(rows) > limit else None
+        }
+        if with_count:
+            page["total"] = await db.count_mirrored_tickets(status_filter, agent_id)
+        return page
+
+    async def get_ticket_board(self, agent_id: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        if not self.ready:
+            return await supabase_client.get_ticket_board(agent_id, limit)
+        return {
+            status: await self.list_all_tickets(status, agent_id, limit, fields="card", with_count=True)
+            for status in TICKET_STATUSES
+        }
+
+    async def get_ticket(self, ticket_id: str, fields: str = "detail") -> Optional[Dict[str, Any]]:
+        if not self.ready:
+            return await supabase_client.get_ticket(ticket_id, fields)
+        ticket = await db.get_mirrored_ticket(ticket_id, card=fields == "card")
+        return (await self._with_labels([ticket]))[0] if ticket else None
+
+    async def get_active_ticket(self, account_id: str, chat_id: str) -> Optional[Dict[str, Any]]:
+        if self.ready:
+            return await db.get_mirrored_active_ticket(account_id, chat_id)
+        
+        # Supabase does not have the writes still waiting in the outbox yet
+        ticket = await supabase_client.get_active_ticket(account_id, chat_id)
+        tickets = {ticket["id"]: ticket} if ticket else {}
+        for entry in await db.get_pending_ticket_writes(account_id, chat_id, ticket["id"] if ticket else None):
+            if entry["op"] == "insert":
+                tickets[entry["key"]] = entry["payload"]
+            elif entry["key"] in tickets:
+                tickets[entry["key"]] = {**tickets[entry["key"]], **entry["payload"]}
+        
+        active = [t for t in tickets.values() if t.get("status", "open") in ("open", "in_progress")]
+        return active[-1] if active else None
+
+    async def get_ticket_history(self, ticket_id: str) -> List[Dict[str, Any]]:
+        if not self.ready:
+            return await supabase_client.get_ticket_history(ticket_id)
+        return await db.get_mirrored_ticket_history(ticket_id)
+
+    async def get_ticket_summary(
+        self,
+        start_date: str,
+        end_date: str,
+        agent_id: Optional[str] = None,
+        bucket: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Same shape as ``SupabaseClient.get_ticket_summary``."""
+        if not self.ready:
+            return await supabase_client.get_ticket_summary(start_date, end_date, agent_id, bucket)
+
+        rows = await db.count_mirrored_tickets_grouped(start_date, end_date, agent_id, bucket)
+
+        def fold(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+            by_status, by_priority = defaultdict(int), defaultdict(int)
+            for row in group:
+                by_status[row["status"]] += row["n"]
+                by_priority[row["priority"]] += row["n"]
+            return summary_counts({
+                "total": sum(row["n"] for row in group),
+                "by_status": by_status,
+                "by_priority": by_priority
+            })
+
+        summary = fold(rows)
+        if bucket:
+            buckets = defaultdict(list)
+            for row in rows:
+                buckets[row["bucket"]].append(row)
+            summary["buckets"] = [
+                {"start": start, **fold(group)} for start, group in buckets.items()
+            ]
+        return summary
+
+
+ticket_store = TicketStore(config.TICKET_SYNC_INTERVAL)
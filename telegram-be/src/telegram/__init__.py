@@ -1,5 +1,14 @@
 """Telegram module entry point."""
+from src.config import config
+from src.telegram.bridge import TelegramBridge
 from src.telegram.manager import TelegramClientManager
+from src.telegram.sharding import ShardedTelegramManager
 
-# Global client manager instance
-telegram_manager = TelegramClientManager()
\ No newline at end of file
+# Global client manager instance (behind the bridge to the owning uvicorn worker)
+if config.TELEGRAM_WORKER_PROCESSES > 1:
+    telegram_manager = TelegramBridge(ShardedTelegramManager(
+        config.TELEGRAM_WORKER_PROCESSES,
+        call_timeout=config.TELEGRAM_WORKER_CALL_TIMEOUT
+    ))
+else:
+    telegram_manager = TelegramBridge(TelegramClientManager())
@@ -0,0 +1,215 @@
+"""Telegram calls and connection state shared between uvicorn workers."""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config import config
+from src.config.encryption import encryptor
+from src.database import db
+from src.utils.leader import leader_lock
+from src.utils.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Manager methods a standby worker hands to the owner
+FORWARDED_METHODS = {
+    "add_client", "remove_client", "send_message", "download_media", "start_login", "complete_login"
+}
+
+# Commands claimed per poll by the owner
+COMMAND_BATCH_SIZE = 32
+
+
+class TelegramBridge:
+    """
+    The ``telegram_manager`` of every API worker.
+
+    Only the worker holding ``leader_lock`` runs Telegram clients; there the
+    calls go straight to the manager. Other workers write them to the
+    ``telegram_commands`` table (encrypted: logins and sessions pass through
+    it) and wait for the owner to write back the result. The owner also
+    publishes each account's connection state to ``telegram_status`` for
+    the other workers' health and account endpoints. Anything else
+    (handler registration, ``start``, ``disconnect_all``) is the local
+    manager's.
+    """
+
+    def __init__(self, manager):
+        """Initialize bridge (nothing runs until ``start_bridge``)."""
+        self.manager = manager
+        self._status: Dict[str, dict] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._running: set = set()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.manager, name)
+
+    # --- Forwarded calls ---
+
+    async def add_client(
+        self, account_id: str, api_id: int, api_hash: str, session_string: Optional[str] = None
+    ) -> None:
+        await self._call(
+            "add_client", account_id=account_id, api_id=api_id, api_hash=api_hash, session_string=session_string
+        )
+
+    async def remove_client(self, account_id: str) -> None:
+        await self._call("remove_client", account_id=account_id)
+
+    async def send_message(self, account_id: str, chat_id: str, text: str) -> Optional[int]:
+        return await self._call("send_message", account_id=account_id, chat_id=chat_id, text=text)
+
+    async def download_media(
+        self, account_id: str, chat_id: str, message_id: str, dest_path: str
+    ) -> Optional[dict]:
+        # Same host, so the owner writes straight to dest_path
+        return await self._call(
+            "download_media",
+            timeout=config.MEDIA_DOWNLOAD_TIMEOUT,
+            account_id=account_id, chat_id=chat_id, message_id=message_id, dest_path=dest_path
+        )
+
+    async def start_login(self, api_id: int, api_hash: str, phone: str) -> dict:
+        return await self._call("start_login", api_id=api_id, api_hash=api_hash, phone=phone)
+
+    async def complete_login(self, phone: str, code: str) -> str:
+        return await self._call("complete_login", phone=phone, code=code)
+
+    async def _call(self, method: str, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a manager method here if this worker owns Telegram, else on the owner."""
+        if leader_lock.held:
+            result = await getattr(self.manager, method)(**kwargs)
+            return None if method == "add_client" else result
+
+        command_id = await db.add_telegram_command(method, encryptor.encrypt(dumps(kwargs)), time.time())
+        deadline = time.monotonic() + (timeout or config.TELEGRAM_BRIDGE_CALL_TIMEOUT)
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(config.TELEGRAM_BRIDGE_POLL_INTERVAL)
+                command = await db.get_telegram_command(command_id)
+                if not command:
+                    raise RuntimeError(f"Telegram owner stopped while running {method}")
+                if command["status"] != "done":
+                    continue
+                outcome = loads(encryptor.decrypt(command["result"]))
+                if "error" in outcome:
+                    # ValueError is the manager's "bad request" (e.g. no pending login)
+                    error_type = ValueError if outcome["error_type"] == "ValueError" else RuntimeError
+                    raise error_type(outcome["error"])
+                return outcome["result"]
+            raise TimeoutError(f"Telegram owner did not answer {method} in time")
+        finally:
+            await db.delete_telegram_command(command_id)
+
+    # --- Connection state ---
+
+    def get_account_ids(self) -> List[str]:
+        if leader_lock.held:
+            return self.manager.get_account_ids()
+        return list(self._status.keys())
+
+    def is_connected(self, account_id: str) -> bool:
+        if leader_lock.held:
+            return self.manager.is_connected(account_id)
+        return bool(self._status.get(account_id, {}).get("connected"))
+
+    def is_hibernating(self, account_id: str) -> bool:
+        if leader_lock.held:
+            return self.manager.is_hibernating(account_id)
+        return bool(self._status.get(account_id, {}).get("hibernating"))
+
+    def get_health(self) -> Dict[str, dict]:
+        if leader_lock.held:
+            return self.manager.get_health()
+        return {account_id: s["health"] for account_id, s in self._status.items() if s.get("health")}
+
+    # --- Background loops ---
+
+    async def start_bridge(self) -> None:
+        """Serve commands (owner) or follow the owner's state (standby); call again after a takeover."""
+        await self.stop_bridge()
+        if config.EVENT_BUS_BACKEND != "sqlite":
+            # Single worker: it owns Telegram, there is nobody to relay for
+            return
+        if leader_lock.held:
+            await db.drop_running_telegram_commands()
+            self._tasks = [
+                asyncio.create_task(self._serve_loop()),
+                asyncio.create_task(self._publish_loop())
+            ]
+        else:
+            self._tasks = [asyncio.create_task(self._follow_loop())]
+
+    async def stop_bridge(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if leader_lock.held and config.EVENT_BUS_BACKEND == "sqlite":
+            # Nothing is connected once the owner is gone
+            await db.replace_telegram_status([])
+
+    async def _serve_loop(self) -> None:
+        """Owner: claim pending commands and run each as its own task."""
+        while True:
+            try:
+                for command in await db.claim_telegram_commands(COMMAND_BATCH_SIZE):
+                    task = asyncio.create_task(self._execute(command))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error polling Telegram commands: {e}")
+            await asyncio.sleep(config.TELEGRAM_BRIDGE_POLL_INTERVAL)
+
+    async def _execute(self, command: Dict[str, Any]) -> None:
+        method = command["method"]
+        try:
+            if method not in FORWARDED_METHODS:
+                raise ValueError(f"Unknown Telegram command: {method}")
+            kwargs = loads(encryptor.decrypt(command["payload"]))
+            result = await getattr(self.manager, method)(**kwargs)
+            outcome = {"result": None if method == "add_client" else result}
+        except Exception as e:
+            logger.error(f"Forwarded {method} failed: {e}")
+            outcome = {"error": str(e), "error_type": type(e).__name__}
+        try:
+            await db.finish_telegram_command(command["id"], encryptor.encrypt(dumps(outcome)))
+        except Exception as e:
+            logger.error(f"Could not store result of {method}: {e}")
+
+    async def _publish_loop(self) -> None:
+        """Owner: snapshot connection state for the other workers."""
+        # Callers delete their own rows; anything older was left by a crashed worker
+        max_age = 2 * max(config.TELEGRAM_BRIDGE_CALL_TIMEOUT, config.MEDIA_DOWNLOAD_TIMEOUT)
+        while True:
+            try:
+                health = self.manager.get_health()
+                await db.replace_telegram_status([
+                    (
+                        account_id,
+                        self.manager.is_connected(account_id),
+                        self.manager.is_hibernating(account_id),
+                        dumps(health[account_id]) if account_id in health else None
+                    )
+                    for account_id in self.manager.get_account_ids()
+                ])
+                await db.prune_telegram_commands(time.time() - max_age)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error publishing Telegram status: {e}")
+            await asyncio.sleep(config.TELEGRAM_BRIDGE_STATUS_INTERVAL)
+
+    async def _follow_loop(self) -> None:
+        """Standby: refresh the owner's connection state."""
+        while True:
+            try:
+                self._status = {row["account_id"]: row for row in await db.get_telegram_status()}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reading Telegram status: {e}")
+            await asyncio.sleep(config.TELEGRAM_BRIDGE_STATUS_INTERVAL)
@@ -0,0 +1,273 @@
+"""Ordered, per-chat concurrent dispatch of inbound Telegram events."""
+import asyncio
+import json
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class InboundDispatcher:
+    """
+    Bounded worker pool for inbound events.
+
+    Events are partitioned by ``(account_id, chat_id)`` so that every chat is
+    always handled by the same worker (order preserved within a chat) while
+    different chats proceed in parallel.
+
+    When a worker queue is full the event is either shed (dropped) or spilled
+    to a per-worker JSONL file on disk and replayed once the worker catches up.
+    Once a partition starts spilling, every later event for it goes to disk as
+    well until the file is drained, so ordering survives overload.
+
+    Spilled events are buffered in memory and appended (with one fsync) every
+    ``spill_flush_interval`` seconds in a thread, so the event loop never
+    waits on the disk. To drain, a worker renames the file aside and replays
+    it; the file is removed only after its events were handled.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[None]],
+        workers: int = 8,
+        queue_size: int = 1000,
+        overflow: str = "spill",
+        spill_dir: Optional[str] = None,
+        spill_flush_interval: float = 0.2
+    ):
+        """Initialize dispatcher (workers are started by ``start``)."""
+        if overflow not in ("spill", "shed"):
+            raise ValueError(f"Invalid overflow policy: {overflow}")
+
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_flush_interval = spill_flush_interval
+
+        self.queues: List[asyncio.Queue] = []
+        self.tasks: List[asyncio.Task] = []
+        self._spilling: List[bool] = [False] * self.workers
+
+        # Spilled lines not yet on disk, and a lock per spill file
+        self._spill_buffers: List[List[str]] = [[] for _ in range(self.workers)]
+        self._spill_locks: List[asyncio.Lock] = []
+        self._spill_task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.processed = 0
+        self.failed = 0
+        self.shed = 0
+        self.spilled = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self.tasks)
+
+    async def start(self) -> None:
+        """Start the worker tasks and replay anything left on disk."""
+        if self.running:
+            return
+
+        if self.overflow == "spill" and self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self._spill_task = asyncio.create_task(self._spill_loop())
+
+        self.queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._spill_locks = [asyncio.Lock() for _ in range(self.workers)]
+        for index in range(self.workers):
+            # Events spilled before a restart are replayed first
+            self._spilling[index] = bool(self.spill_dir) and (
+                self._spill_path(index).exists() or self._replay_path(index).exists()
+            )
+            self.tasks.append(asyncio.create_task(self._worker(index)))
+
+        logger.info(f"Inbound dispatcher started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Drain queued events and stop the workers."""
+        if not self.running:
+            return
+
+        for queue in self.queues:
+            await queue.join()
+
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        # Whatever is still spilled waits on disk for the next start
+        if self._spill_task:
+            self._spill_task.cancel()
+            await asyncio.gather(self._spill_task, return_exceptions=True)
+            self._spill_task = None
+        for index in range(self.workers):
+            await self._flush_spill(index)
+        logger.info("Inbound dispatcher stopped")
+
+    def partition(self, account_id: str, chat_id: str) -> int:
+        """Stable worker index for a chat."""
+        key = f"{account_id}:{chat_id}".encode()
+        return zlib.crc32(key) % self.workers
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """
+        Enqueue an event without blocking.
+
+        Returns:
+            False if the event was shed, True otherwise
+        """
+        index = self.partition(event.get("account_id", ""), event.get("chat_id", ""))
+
+        if self._spilling[index]:
+            self._spill(index, event)
+            return True
+
+        try:
+            self.queues[index].put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            if self.overflow == "spill" and self.spill_dir:
+                self._spilling[index] = True
+                self._spill(index, event)
+                logger.warning(f"Dispatcher worker {index} overloaded, spilling to disk")
+                return True
+
+            self.shed += 1
+            logger.warning(f"Dispatcher worker {index} overloaded, dropping event")
+            return False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth and throughput counters."""
+        depths = [queue.qsize() for queue in self.queues]
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depths": depths,
+            "queued_total": sum(depths),
+            "spilling_workers": [i for i, spilling in enumerate(self._spilling) if spilling],
+            "spill_buffered": sum(len(lines) for lines in self._spill_buffers),
+            "processed": self.processed,
+            "failed": self.failed,
+            "shed": self.shed,
+            "spilled": self.spilled,
+        }
+
+    # --- Internals ---
+
+    def _spill_path(self, index: int) -> Path:
+        return self.spill_dir / f"inbound_{index}.jsonl"
+
+    def _replay_path(self, index: int) -> Path:
+        return self.spill_dir / f"inbound_{index}.replay.jsonl"
+
+    def _spill(self, index: int, event: Dict[str, Any]) -> None:
+        """Buffer an event for the worker's spill file (written by ``_spill_loop``)."""
+        try:
+            self._spill_buffers[index].append(json.dumps(event, default=str) + "\n")
+            self.spilled += 1
+        except Exception as e:
+            self.shed += 1
+            logger.error(f"Failed to spill inbound event: {e}")
+
+    async def _spill_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.spill_flush_interval)
+            for index in range(self.workers):
+                if self._spill_buffers[index]:
+                    await self._flush_spill(index)
+
+    async def _flush_spill(self, index: int) -> None:
+        """Append the buffered lines to the spill file in a thread."""
+        async with self._spill_locks[index]:
+            lines, self._spill_buffers[index] = self._spill_buffers[index], []
+            if not lines:
+                return
+            try:
+                await asyncio.to_thread(self._append_lines, self._spill_path(index), lines)
+            except Exception as e:
+                self.shed += len(lines)
+                logger.error(f"Failed to write {len(lines)} spilled inbound events: {e}")
+
+    @staticmethod
+    def _append_lines(path: Path, lines: List[str]) -> None:
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rotate_spill(self, index: int) -> Optional[Path]:
+        """Move the spill file aside for replay (a leftover replay file goes first)."""
+        replay = self._replay_path(index)
+        if not replay.exists():
+            try:
+                os.replace(self._spill_path(index), replay)
+            except FileNotFoundError:
+                return None
+        return replay
+
+    @staticmethod
+    def _read_lines(path: Path) -> List[Dict[str, Any]]:
+        events = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    logger.error("Skipping corrupt line in inbound spill file")
+        return events
+
+    async def _drain_spilled(self, index: int) -> None:
+        """
+        Replay the oldest spilled events: the file on disk, then the buffer.
+
+        The spilling flag is cleared only when both are empty, while holding
+        the file lock, so no event can slip into the in-memory queue ahead
+        of spilled ones.
+        """
+        async with self._spill_locks[index]:
+            replay = await asyncio.to_thread(self._rotate_spill, index)
+            if replay is None:
+                lines, self._spill_buffers[index] = self._spill_buffers[index], []
+                if not lines:
+                    self._spilling[index] = False
+                    return
+
+        if replay is None:
+            for line in lines:
+                await self._run(json.loads(line))
+            return
+
+        for event in await asyncio.to_thread(self._read_lines, replay):
+            await self._run(event)
+        await asyncio.to_thread(os.remove, replay)
+
+    async def _run(self, event: Dict[str, Any]) -> None:
+        try:
+            await self.handler(event)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Inbound handler error: {e}", exc_info=True)
+
+    async def _worker(self, index: int) -> None:
+        """Process one partition sequentially."""
+        queue = self.queues[index]
+        while True:
+            try:
+                if self._spilling[index] and queue.empty():
+                    await self._drain_spilled(index)
+                    continue
+
+                event = await queue.get()
+                try:
+                    await self._run(event)
+                finally:
+                    queue.task_done()
+            except asyncio.CancelledError:
+                break
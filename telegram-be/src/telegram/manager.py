@@ -1,41 +1,195 @@
 """Telegram client manager implementation."""
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Optional, Callable 
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Callable, Tuple
 from telethon import TelegramClient, events # type: ignore
+from telethon.errors import FloodWaitError # type: ignore
 from telethon.sessions import StringSession # type: ignore
 from telethon.tl.types import PeerUser, PeerChat, PeerChannel  # type: ignore
+from telethon.tl.types.updates import State # type: ignore
+from src.config import config
+from src.telegram.dispatcher import InboundDispatcher
+from src.telegram.state_store import UpdateStateStore
+from src.telegram.supervisor import ConnectionSupervisor
 
 logger = logging.getLogger(__name__)
 
+# Private / basic-group message IDs remembered per account, so deletions
+# (which do not name the chat there) are queued behind the message itself
+RECENT_MESSAGE_CHATS = 10000
+
 class TelegramClientManager:
     """Manage multiple Telegram clients."""
     
-    def __init__(self):
+    def __init__(self, spill_dir: Optional[str] = None):
         """Initialize client manager."""
         self.clients: Dict[str, TelegramClient] = {}
         self.message_handlers: list = []
+        self.edit_handlers: list = []
+        self.delete_handlers: list = []
+        self.session_handlers: list = []
+        self.dispatcher = InboundDispatcher(
+            self._run_handlers,
+            workers=config.INBOUND_WORKERS,
+            queue_size=config.INBOUND_QUEUE_SIZE,
+            overflow=config.INBOUND_OVERFLOW,
+            spill_dir=spill_dir or config.INBOUND_SPILL_DIR,
+            spill_flush_interval=config.INBOUND_SPILL_FLUSH_INTERVAL
+        )
+        
+        # Hibernation (opt-in): idle accounts are disconnected and woken on demand
+        self.hibernate_after = config.TELEGRAM_HIBERNATE_AFTER
+        self.credentials: Dict[str, Tuple[int, str]] = {}
+        self.last_activity: Dict[str, float] = {}
+        self.hibernated: Dict[str, dict] = {}
+        self._wake_tasks: Dict[str, asyncio.Task] = {}
+        self._background_tasks: List[asyncio.Task] = []
+        
+        # Album parts buffered by (account_id, chat_id, grouped_id) until the window
+        # closes, and albums whose window closed that are still being dispatched
+        self._albums: Dict[Tuple[str, int, int], list] = {}
+        self._album_tasks: Dict[Tuple[str, int, int], asyncio.Task] = {}
+        self._album_flushes: Dict[Tuple[str, int, int], asyncio.Task] = {}
+        
+        # (account_id, message_id) -> chat_id of recent non-channel messages
+        self._recent_chats: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        
+        # Persistent update state, so restarts catch up instead of losing messages
+        self.state_store: Optional[UpdateStateStore] = None
+        
+        # Session strings as last persisted, and changes waiting to be saved
+        self.persisted_sessions: Dict[str, str] = {}
+        self.dirty_sessions: Dict[str, str] = {}
+        
+        # Reconnects dead clients and keeps per-account health scores
+        self.supervisor = ConnectionSupervisor(self)
+    
+    async def start(self) -> None:
+        """Start background processing (dispatcher, update state, hibernation)."""
+        await self.dispatcher.start()
+        
+        if config.TELEGRAM_UPDATE_STATE_INTERVAL > 0 and self.state_store is None:
+            self.state_store = UpdateStateStore(config.SQLITE_DB_PATH)
+            await self.state_store.connect()
+            self._background_tasks.append(asyncio.create_task(self._update_state_loop()))
+        
+        if config.TELEGRAM_SUPERVISOR_INTERVAL > 0:
+            self._background_tasks.append(asyncio.create_task(self.supervisor.run()))
+        
+        if config.TELEGRAM_SESSION_SAVE_INTERVAL > 0:
+            self._background_tasks.append(asyncio.create_task(self._session_persistence_loop()))
+        
+        if self.hibernate_after > 0:
+            self._background_tasks.append(asyncio.create_task(self._hibernation_loop()))
+            logger.info(f"Account hibernation enabled (idle after {self.hibernate_after}s)")
     
     async def add_client(
         self,
         account_id: str,
         api_id: int,
         api_hash: str,
-        session_string: Optional[str] = None
+        session_string: Optional[str] = None,
+        update_states: Optional[list] = None
     ) -> TelegramClient:
         """Add and start a Telegram client."""
         if account_id in self.clients:
-            return self.clients[account_id]
+            existing = self.clients[account_id]
+            if existing.is_connected():
+                return existing
+            
+            # Dead client: replace it, keeping its (possibly newer) session
+            logger.warning(f"Replacing dead client for account {account_id}")
+            session_string = existing.session.save() or session_string
+            del self.clients[account_id]
+            try:
+                await existing.disconnect()
+            except Exception:
+                pass
+        
+        if account_id in self.hibernated or account_id in self._wake_tasks:
+            return await self.wake(account_id)
         
+        return await self._start_client(account_id, api_id, api_hash, session_string, update_states)
+    
+    async def _start_client(
+        self,
+        account_id: str,
+        api_id: int,
+        api_hash: str,
+        session_string: Optional[str] = None,
+        update_states: Optional[list] = None
+    ) -> TelegramClient:
+        """Create, connect and register a client."""
+        self._require_handlers()
         session = StringSession(session_string) if session_string else StringSession()
-        client = TelegramClient(session, api_id, api_hash)
         
-        # Register message handler
-        @client.on(events.NewMessage(incoming=True))
+        if update_states is None and self.state_store:
+            try:
+                update_states = await self.state_store.load(account_id)
+            except Exception as e:
+                logger.warning(f"Could not load update state for account {account_id}: {e}")
+        
+        # Restore update state (pts/qts/date) so the client can catch up on what it missed
+        for entity_id, state in update_states or []:
+            session.set_update_state(entity_id, state)
+        
+        # Updates are handled one at a time, in the order Telegram sent them:
+        # handlers await (sender lookups, album flushes) before handing the
+        # event to the dispatcher, and concurrent handlers could reorder a
+        # chat's messages, or a message and its edit
+        client = TelegramClient(session, api_id, api_hash, catch_up=True, sequential_updates=True)
+        
+        # Register message handler (both directions: replies sent from the
+        # Telegram apps on this account must show up in the timeline too)
+        @client.on(events.NewMessage())
         async def handle_new_message(event):
-            await self._handle_incoming_message(account_id, event)
+            self.last_activity[account_id] = time.monotonic()
+            self.supervisor.record_update(account_id, event.message.date)
+            chat_id = self._extract_chat_id(event)
+            if self._chat_type(event) != "channel":
+                self._remember_chat(account_id, event.message.id, chat_id)
+            # Albums still buffered for this chat came first
+            await self._flush_chat_albums(account_id, chat_id, event.message.grouped_id)
+            if event.message.grouped_id:
+                self._buffer_album_part(account_id, event)
+            else:
+                await self._handle_new_message(account_id, event)
+        
+        @client.on(events.MessageEdited())
+        async def handle_message_edited(event):
+            self.last_activity[account_id] = time.monotonic()
+            # The edited message may still be in an album buffer
+            await self._flush_chat_albums(account_id, self._extract_chat_id(event))
+            await self._handle_message_edited(account_id, event)
+        
+        @client.on(events.MessageDeleted())
+        async def handle_message_deleted(event):
+            self.last_activity[account_id] = time.monotonic()
+            await self._handle_message_deleted(account_id, event)
         
         await client.start()
         self.clients[account_id] = client
+        self.credentials[account_id] = (api_id, api_hash)
+        if not account_id.startswith("temp_"):
+            self.supervisor.track(account_id)
+        
+        # Login or DC migration during start() may already have changed the session
+        if session_string:
+            self.persisted_sessions[account_id] = session_string
+        self._track_session(account_id, client.session.save())
+        self.last_activity[account_id] = time.monotonic()
+        
+        if update_states:
+            # Missed messages are replayed through the normal handlers;
+            # the messages unique key makes re-delivery harmless
+            try:
+                await client.catch_up()
+                logger.info(f"Caught up on missed updates for account {account_id}")
+            except Exception as e:
+                logger.warning(f"Catch-up failed for account {account_id}: {e}")
         
         # Populate entity cache by getting recent dialogs
         try:
@@ -47,93 +201,322 @@ class TelegramClientManager:
         logger.info(f"Started Telegram client for account {account_id}")
         return client
     
-    async def _handle_incoming_message(self, account_id: str, event):
-        """Handle incoming Telegram message."""
+    async def _handle_new_message(self, account_id: str, event):
+        """Handle a new Telegram message (incoming, or outgoing from another device)."""
         try:
-            # Get sender information
-            sender = await event.get_sender()
-            
-            # Extract chat ID - use sender_id for private chats
-            if event.is_private:
-                chat_id = event.sender_id
-            else:
-                # For groups/channels
-                peer = event.message.peer_id
-                if isinstance(peer, PeerUser):
-                    chat_id = peer.user_id
-                elif isinstance(peer, PeerChat):
-                    chat_id = peer.chat_id
-                elif isinstance(peer, PeerChannel):
-                    chat_id = peer.channel_id
-                else:
-                    chat_id = event.chat_id
-            
-            # ✅ NEW: Extract customer details
-            customer_data = {}
-            if sender:
-                customer_data['user_id'] = sender.id if hasattr(sender, 'id') else None
-                customer_data['first_name'] = getattr(sender, 'first_name', None)
-                customer_data['last_name'] = getattr(sender, 'last_name', None)
-                customer_data['username'] = getattr(sender, 'username', None)
-                customer_data['phone'] = getattr(sender, 'phone', None)
-            
-            # Get sender name (for backward compatibility)
-            sender_name = None
-            if sender:
-                if hasattr(sender, 'first_name'):
-                    sender_name = sender.first_name
-                    if hasattr(sender, 'last_name') and sender.last_name:
-                        sender_name += f" {sender.last_name}"
-                elif hasattr(sender, 'title'):
-                    sender_name = sender.title
-            
-            message_data = {
+            await self._dispatch(await self._build_message_data(account_id, event))
+        except Exception as e:
+            logger.error(f"Error handling incoming message: {e}", exc_info=True)
+    
+    async def _build_message_data(self, account_id: str, event) -> dict:
+        """Normalize a NewMessage event into the message_data handlers receive."""
+        # Get sender information (for outgoing messages that is us)
+        sender = None if event.out else await event.get_sender()
+        
+        chat_id = self._extract_chat_id(event)
+        
+        # ✅ NEW: Extract customer details
+        customer_data = {}
+        if sender:
+            customer_data['user_id'] = sender.id if hasattr(sender, 'id') else None
+            customer_data['first_name'] = getattr(sender, 'first_name', None)
+            customer_data['last_name'] = getattr(sender, 'last_name', None)
+            customer_data['username'] = getattr(sender, 'username', None)
+            customer_data['phone'] = getattr(sender, 'phone', None)
+        
+        # Get sender name (for backward compatibility)
+        sender_name = None
+        if sender:
+            if hasattr(sender, 'first_name'):
+                sender_name = sender.first_name
+                if hasattr(sender, 'last_name') and sender.last_name:
+                    sender_name += f" {sender.last_name}"
+            elif hasattr(sender, 'title'):
+                sender_name = sender.title
+        
+        message_data = {
+            "account_id": account_id,
+            "chat_id": str(chat_id),
+            "chat_type": self._chat_type(event),
+            "message_id": str(event.message.id),
+            "direction": "outgoing" if event.out else "incoming",
+            "text": event.message.text or "",
+            "timestamp": event.message.date.isoformat(),
+            "sender_id": str(event.sender_id) if event.sender_id else None,
+            "sender_name": sender_name,
+            "customer_data": customer_data,  # ✅ ADD customer data
+            "media": self._media_metadata(event.message)
+        }
+        return message_data
+    
+    # --- Albums ---
+    
+    def _buffer_album_part(self, account_id: str, event) -> None:
+        """Hold album parts until the group is complete (no new part within the window)."""
+        key = (account_id, self._extract_chat_id(event), event.message.grouped_id)
+        self._albums.setdefault(key, []).append(event)
+        
+        task = self._album_tasks.get(key)
+        if task:
+            task.cancel()
+        self._album_tasks[key] = asyncio.create_task(self._flush_album_later(key))
+    
+    async def _flush_album_later(self, key: Tuple[str, int, int]) -> None:
+        try:
+            await asyncio.sleep(config.TELEGRAM_ALBUM_WINDOW)
+        except asyncio.CancelledError:
+            return
+        self._album_tasks.pop(key, None)
+        task = asyncio.current_task()
+        self._album_flushes[key] = task
+        try:
+            await self._flush_album(key)
+        finally:
+            if self._album_flushes.get(key) is task:
+                del self._album_flushes[key]
+    
+    async def _flush_chat_albums(self, account_id: str, chat_id: int, keep: Optional[int] = None) -> None:
+        """Dispatch a chat's buffered albums (except ``keep``) before a later message."""
+        for key in [k for k in self._albums if k[:2] == (account_id, chat_id) and k[2] != keep]:
+            task = self._album_tasks.pop(key, None)
+            if task:
+                task.cancel()
+            await self._flush_album(key)
+        
+        # Albums whose window just closed may not have reached the dispatcher yet
+        flushing = [
+            task for key, task in self._album_flushes.items()
+            if key[:2] == (account_id, chat_id) and key[2] != keep
+        ]
+        if flushing:
+            await asyncio.wait(flushing)
+    
+    async def _flush_album(self, key: Tuple[str, int, int]) -> None:
+        """Dispatch a buffered album as one logical message."""
+        parts = sorted(self._albums.pop(key, []), key=lambda e: e.message.id)
+        if not parts:
+            return
+        
+        try:
+            message_data = await self._build_message_data(key[0], parts[0])
+            message_data["grouped_id"] = str(key[2])
+            message_data["text"] = next((e.message.text for e in parts if e.message.text), "")
+            message_data["album"] = [
+                {
+                    "message_id": str(e.message.id),
+                    "text": e.message.text or "",
+                    "media": self._media_metadata(e.message)
+                }
+                for e in parts
+            ]
+            await self._dispatch(message_data)
+        except Exception as e:
+            logger.error(f"Error handling album: {e}", exc_info=True)
+    
+    async def _flush_albums(self, account_id: Optional[str] = None) -> None:
+        """Dispatch pending albums now (all, or one account's) instead of dropping them."""
+        for key in [k for k in self._albums if account_id is None or k[0] == account_id]:
+            task = self._album_tasks.pop(key, None)
+            if task:
+                task.cancel()
+            await self._flush_album(key)
+    
+    @staticmethod
+    def _extract_chat_id(event) -> int:
+        """Chat ID as stored locally (the other party's user ID in private chats)."""
+        # Private chats: the peer is the other party, whoever sent the message
+        if event.is_private:
+            return event.chat_id
+        
+        # For groups/channels
+        peer = event.message.peer_id
+        if isinstance(peer, PeerUser):
+            return peer.user_id
+        elif isinstance(peer, PeerChat):
+            return peer.chat_id
+        elif isinstance(peer, PeerChannel):
+            return peer.channel_id
+        return event.chat_id
+    
+    def _remember_chat(self, account_id: str, message_id: int, chat_id: int) -> None:
+        self._recent_chats[(account_id, str(message_id))] = chat_id
+        if len(self._recent_chats) > RECENT_MESSAGE_CHATS:
+            self._recent_chats.popitem(last=False)
+    
+    @staticmethod
+    def _chat_type(event) -> str:
+        """'private', 'group' (basic group) or 'channel' (incl. supergroups)."""
+        if event.is_private:
+            return "private"
+        peer = event.message.peer_id
+        if isinstance(peer, PeerChannel):
+            return "channel"
+        if isinstance(peer, PeerChat):
+            return "group"
+        return "private"
+    
+    async def _handle_message_edited(self, account_id: str, event):
+        """Turn an edit into a small delta event."""
+        try:
+            edit_date = event.message.edit_date or event.message.date
+            await self._dispatch({
+                "event": "message_edited",
                 "account_id": account_id,
-                "chat_id": str(chat_id),
+                "chat_id": str(self._extract_chat_id(event)),
                 "message_id": str(event.message.id),
                 "text": event.message.text or "",
-                "timestamp": event.message.date.isoformat(),
-                "sender_id": str(event.sender_id) if event.sender_id else None,
-                "sender_name": sender_name,
-                "customer_data": customer_data  # ✅ ADD customer data
-            }
+                "edited_at": edit_date.isoformat()
+            })
+        except Exception as e:
+            logger.error(f"Error handling edited message: {e}", exc_info=True)
+    
+    async def _handle_message_deleted(self, account_id: str, event):
+        """Turn a deletion into a small delta event."""
+        try:
+            # Telegram only says which chat for channels; private/group
+            # message IDs are unique per account anyway
+            channel_id = getattr(event.original_update, "channel_id", None)
+            if channel_id:
+                by_chat = {channel_id: [str(message_id) for message_id in event.deleted_ids]}
+            else:
+                # Recent messages go to their chat's partition, behind their insert
+                by_chat = {}
+                for message_id in event.deleted_ids:
+                    chat_id = self._recent_chats.get((account_id, str(message_id)))
+                    by_chat.setdefault(chat_id, []).append(str(message_id))
             
-            # Call all registered handlers
-            for handler in self.message_handlers:
-                await handler(message_data)
-        
+            for chat_id, message_ids in by_chat.items():
+                if chat_id is not None:
+                    await self._flush_chat_albums(account_id, chat_id)
+                await self._dispatch({
+                    "event": "message_deleted",
+                    "account_id": account_id,
+                    "chat_id": str(chat_id) if chat_id is not None else None,
+                    "message_ids": message_ids
+                })
         except Exception as e:
-            logger.error(f"Error handling incoming message: {e}", exc_info=True)
+            logger.error(f"Error handling deleted messages: {e}", exc_info=True)
+    
+    async def _dispatch(self, payload: dict) -> None:
+        """Hand off to the dispatcher (ordered per chat, parallel across chats)."""
+        if self.dispatcher.running:
+            self.dispatcher.submit(payload)
+        else:
+            await self._run_handlers(payload)
+    
+    @staticmethod
+    def _media_metadata(message) -> Optional[dict]:
+        """Describe a message's file (bytes are fetched lazily on first view)."""
+        file = message.file
+        if not message.media or file is None:
+            return None
+        
+        if message.photo:
+            media_type = "photo"
+        elif message.voice:
+            media_type = "voice"
+        elif message.video_note:
+            media_type = "video_note"
+        elif message.gif:
+            media_type = "gif"
+        elif message.video:
+            media_type = "video"
+        elif message.audio:
+            media_type = "audio"
+        elif message.sticker:
+            media_type = "sticker"
+        else:
+            media_type = "document"
+        
+        return {
+            "type": media_type,
+            "mime_type": file.mime_type,
+            "size": file.size,
+            "file_name": file.name
+        }
+    
+    async def _run_handlers(self, payload: dict) -> None:
+        """Call all registered handlers for one inbound event."""
+        event_type = payload.get("event", "message")
+        if event_type == "message_edited":
+            handlers = self.edit_handlers
+        elif event_type == "message_deleted":
+            handlers = self.delete_handlers
+        else:
+            handlers = self.message_handlers
+        
+        for handler in handlers:
+            await handler(payload)
+    
+    def _require_handlers(self) -> None:
+        """
+        Refuse to start clients before the message handler is registered.
+        
+        Clients replay missed updates (``catch_up``) while starting; with no
+        handlers those messages would be dropped without a trace.
+        """
+        if not self.message_handlers:
+            raise RuntimeError("Register message handlers before starting Telegram clients")
     
     def register_message_handler(self, handler: Callable) -> None:
         """Register a message handler callback."""
         self.message_handlers.append(handler)
     
+    def register_edit_handler(self, handler: Callable) -> None:
+        """Register a callback for ``message_edited`` deltas."""
+        self.edit_handlers.append(handler)
+    
+    def register_delete_handler(self, handler: Callable) -> None:
+        """Register a callback for ``message_deleted`` deltas."""
+        self.delete_handlers.append(handler)
+    
+    def register_status_handler(self, handler: Callable) -> None:
+        """Register a callback receiving account health dicts when they change."""
+        self.supervisor.status_handlers.append(handler)
+    
+    def get_health(self) -> Dict[str, dict]:
+        """Health score, RTT, disconnects and last update age per account."""
+        return self.supervisor.get_health()
+    
+    def register_session_handler(self, handler: Callable) -> None:
+        """
+        Register a session persistence callback.
+        
+        The handler receives a dict of ``account_id -> session_string`` with
+        every session that changed since the last successful save.
+        """
+        self.session_handlers.append(handler)
+    
     async def send_message(
         self, account_id: str, chat_id: str, text: str
     ) -> Optional[int]:
         """Send a message using a specific account."""
+        if account_id in self.hibernated:
+            try:
+                await self.wake(account_id)
+            except Exception as e:
+                logger.error(f"Could not wake account {account_id}: {e}")
+                return None
+        
         client = self.clients.get(account_id)
         if not client:
             logger.error(f"Client not found for account {account_id}")
             return None
         
         try:
-            # Convert chat_id to integer
-            chat_id_int = int(chat_id)
-            
-            # Get the entity first (this resolves the user/chat)
-            try:
-                entity = await client.get_entity(chat_id_int)
-            except Exception as e:
-                logger.error(f"Could not get entity for chat_id {chat_id_int}: {e}")
-                # Try to get dialogs to populate entity cache
-                await client.get_dialogs()
-                # Retry getting entity
-                entity = await client.get_entity(chat_id_int)
+            entity = await self._resolve_entity(client, chat_id)
             
             # Send message using the resolved entity
-            message = await client.send_message(entity, text)
+            try:
+                message = await client.send_message(entity, text)
+            except FloodWaitError as e:
+                # Short flood waits are cheaper to sit out than to fail
+                if e.seconds > config.TELEGRAM_FLOOD_WAIT_MAX:
+                    raise
+                logger.warning(f"Flood wait of {e.seconds}s for account {account_id}, retrying")
+                await asyncio.sleep(e.seconds)
+                message = await client.send_message(entity, text)
+            self.last_activity[account_id] = time.monotonic()
             return message.id
         except ValueError as e:
             logger.error(f"Invalid chat_id format: {e}")
@@ -142,8 +525,71 @@ class TelegramClientManager:
             logger.error(f"Error sending message: {e}")
             return None
     
+    async def _resolve_entity(self, client: TelegramClient, chat_id: str):
+        """Resolve a stored chat_id to an entity, refreshing the cache if needed."""
+        # Convert chat_id to integer
+        chat_id_int = int(chat_id)
+        
+        # Get the entity first (this resolves the user/chat)
+        try:
+            return await client.get_entity(chat_id_int)
+        except Exception as e:
+            logger.error(f"Could not get entity for chat_id {chat_id_int}: {e}")
+            # Try to get dialogs to populate entity cache
+            await client.get_dialogs()
+            # Retry getting entity
+            return await client.get_entity(chat_id_int)
+    
+    async def download_media(
+        self, account_id: str, chat_id: str, message_id: str, dest_path: str
+    ) -> Optional[dict]:
+        """
+        Stream a message's file to ``dest_path`` in chunks.
+        
+        Returns:
+            ``{"size", "sha256", "mime_type"}`` or None if there is no media
+        """
+        if account_id in self.hibernated:
+            await self.wake(account_id)
+        
+        client = self.clients.get(account_id)
+        if not client:
+            logger.error(f"Client not found for account {account_id}")
+            return None
+        
+        entity = await self._resolve_entity(client, chat_id)
+        message = await client.get_messages(entity, ids=int(message_id))
+        if not message or not message.media:
+            return None
+        
+        digest = hashlib.sha256()
+        size = 0
+        
+        def write(chunk: bytes) -> None:
+            f.write(chunk)
+            digest.update(chunk)
+        
+        # Disk writes and hashing run in a thread, off the event loop
+        f = await asyncio.to_thread(open, dest_path, "wb")
+        try:
+            async for chunk in client.iter_download(message.media, request_size=config.MEDIA_CHUNK_SIZE):
+                await asyncio.to_thread(write, chunk)
+                size += len(chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+        
+        self.last_activity[account_id] = time.monotonic()
+        return {
+            "size": size,
+            "sha256": digest.hexdigest(),
+            "mime_type": message.file.mime_type if message.file else None
+        }
+    
     async def get_session_string(self, account_id: str) -> Optional[str]:
         """Get session string for an account."""
+        if account_id in self.hibernated:
+            return self.hibernated[account_id]["session_string"]
+        
         client = self.clients.get(account_id)
         if not client:
             return None
@@ -152,16 +598,264 @@ class TelegramClientManager:
     
     async def remove_client(self, account_id: str) -> None:
         """Remove and disconnect a client."""
+        await self._flush_albums(account_id)
+        self.hibernated.pop(account_id, None)
+        self.credentials.pop(account_id, None)
+        self.last_activity.pop(account_id, None)
+        self.supervisor.forget(account_id)
+        
         client = self.clients.get(account_id)
         if client:
             await client.disconnect()
             del self.clients[account_id]
+            await self._save_update_state(account_id, client)
+            if not account_id.startswith("temp_"):
+                self._track_session(account_id, client.session.save())
             logger.info(f"Removed client for account {account_id}")
-    
+
+    async def start_login(self, api_id: int, api_hash: str, phone: str) -> dict:
+        """
+        Start logging a new account in.
+
+        Returns:
+            ``{"session_string"}`` if the session is already authorized,
+            otherwise ``{"phone_code_hash"}`` after sending the code
+        """
+        client = TelegramClient(StringSession(), api_id, api_hash)
+        await client.connect()
+        try:
+            if await client.is_user_authorized():
+                session_string = client.session.save()
+                await client.disconnect()
+                return {"session_string": session_string}
+
+            sent_code = await client.send_code_request(phone)
+        except Exception:
+            await client.disconnect()
+            raise
+
+        # Kept until complete_login
+        self.clients[f"temp_{phone}"] = client
+        return {"phone_code_hash": sent_code.phone_code_hash}
+
+    async def complete_login(self, phone: str, code: str) -> str:
+        """
+        Sign in with the code sent by ``start_login``; returns the session string.
+
+        Raises ValueError when there is no pending login or 2FA is required.
+        """
+        temp_id = f"temp_{phone}"
+        client = self.clients.get(temp_id)
+        if not client:
+            raise ValueError("No pending verification for this phone.")
+
+        try:
+            await client.sign_in(phone, code)
+        except Exception as e:
+            if "password" in str(e).lower() or "2fa" in str(e).lower():
+                raise ValueError("2FA password required. Not supported in Phase 1.")
+            raise
+
+        session_string = client.session.save()
+        await client.disconnect()
+        del self.clients[temp_id]
+        return session_string
+
     async def disconnect_all(self) -> None:
-        """Disconnect all clients."""
+        """Disconnect all clients and drain pending inbound events."""
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._background_tasks = []
+        
+        await self._flush_albums()
         for account_id in list(self.clients.keys()):
             await self.remove_client(account_id)
+        self.hibernated.clear()
+        await self.flush_sessions()
+        await self.dispatcher.stop()
+        
+        if self.state_store:
+            await self.state_store.close()
+            self.state_store = None
+    
+    # --- Session persistence ---
+    
+    def _track_session(self, account_id: str, session_string: str) -> None:
+        """Mark a session as dirty if it differs from the persisted one."""
+        if session_string and session_string != self.persisted_sessions.get(account_id):
+            self.dirty_sessions[account_id] = session_string
+    
+    async def flush_sessions(self) -> None:
+        """Save all changed sessions in one batch."""
+        for account_id, client in self.clients.items():
+            if not account_id.startswith("temp_"):
+                self._track_session(account_id, client.session.save())
+        
+        if not self.dirty_sessions or not self.session_handlers:
+            return
+        
+        batch = dict(self.dirty_sessions)
+        try:
+            for handler in self.session_handlers:
+                await handler(batch)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(batch)} session(s), will retry: {e}")
+            return
+        
+        for account_id, session_string in batch.items():
+            self.persisted_sessions[account_id] = session_string
+            if self.dirty_sessions.get(account_id) == session_string:
+                del self.dirty_sessions[account_id]
+        logger.info(f"Persisted {len(batch)} refreshed session(s)")
+    
+    async def _session_persistence_loop(self) -> None:
+        """Detect session changes and save them on a debounce interval."""
+        while True:
+            try:
+                await asyncio.sleep(config.TELEGRAM_SESSION_SAVE_INTERVAL)
+                await self.flush_sessions()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in session persistence loop: {e}")
+    
+    # --- Update state ---
+    
+    def _snapshot_update_states(self, client: TelegramClient) -> List[Tuple[int, State]]:
+        """Current update state of a client as ``(entity_id, State)`` pairs."""
+        # While connected the live state is in the client's message box;
+        # after disconnect Telethon has flushed it into the session
+        message_box = getattr(client, "_message_box", None)
+        if client.is_connected() and message_box is not None:
+            ss, cs = message_box.session_state()
+            if ss.get("pts"):
+                states = [(0, State(**ss, unread_count=0))]
+                states.extend(
+                    (channel_id, State(pts=pts, qts=0, date=ss["date"], seq=0, unread_count=0))
+                    for channel_id, pts in cs.items()
+                )
+                return states
+        
+        return list(client.session.get_update_states())
+    
+    async def _save_update_state(self, account_id: str, client: TelegramClient) -> None:
+        """Persist a client's update state."""
+        if not self.state_store or account_id.startswith("temp_"):
+            return
+        
+        try:
+            await self.state_store.save(account_id, self._snapshot_update_states(client))
+        except Exception as e:
+            logger.error(f"Failed to save update state for account {account_id}: {e}")
+    
+    async def _update_state_loop(self) -> None:
+        """Periodically persist update state of all running clients."""
+        while True:
+            try:
+                await asyncio.sleep(config.TELEGRAM_UPDATE_STATE_INTERVAL)
+                for account_id, client in list(self.clients.items()):
+                    await self._save_update_state(account_id, client)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in update state loop: {e}")
+    
+    # --- Hibernation ---
+    
+    async def hibernate(self, account_id: str) -> None:
+        """Save session and update state, then disconnect an idle client."""
+        client = self.clients.get(account_id)
+        if not client or account_id.startswith("temp_"):
+            return
+        
+        # Buffered album parts need the client (sender lookups) to be dispatched
+        await self._flush_albums(account_id)
+        
+        # Disconnecting flushes the client's update state into the session
+        del self.clients[account_id]
+        self.supervisor.forget(account_id)
+        await client.disconnect()
+        await self._save_update_state(account_id, client)
+        
+        self._track_session(account_id, client.session.save())
+        self.hibernated[account_id] = {
+            "session_string": client.session.save(),
+            "update_states": list(client.session.get_update_states()),
+            "hibernated_at": time.monotonic()
+        }
+        logger.info(f"Account {account_id} hibernated")
+    
+    async def wake(self, account_id: str) -> Optional[TelegramClient]:
+        """Reconnect a hibernated account and catch up on missed updates."""
+        if account_id in self._wake_tasks:
+            return await asyncio.shield(self._wake_tasks[account_id])
+        
+        task = asyncio.create_task(self._wake(account_id))
+        self._wake_tasks[account_id] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._wake_tasks.pop(account_id, None)
+    
+    async def _wake(self, account_id: str) -> Optional[TelegramClient]:
+        state = self.hibernated.pop(account_id, None)
+        if state is None:
+            return self.clients.get(account_id)
+        
+        api_id, api_hash = self.credentials[account_id]
+        try:
+            client = await self._start_client(
+                account_id, api_id, api_hash,
+                session_string=state["session_string"],
+                update_states=state["update_states"]
+            )
+        except Exception:
+            self.hibernated[account_id] = state
+            raise
+        
+        logger.info(f"Account {account_id} woken from hibernation")
+        return client
+    
+    def is_hibernating(self, account_id: str) -> bool:
+        """Check if an account is hibernated (disconnected but wakeable)."""
+        return account_id in self.hibernated
+    
+    async def _hibernation_loop(self) -> None:
+        """Hibernate idle accounts and periodically wake them to catch up."""
+        while True:
+            try:
+                await asyncio.sleep(config.TELEGRAM_HIBERNATE_CHECK_INTERVAL)
+                now = time.monotonic()
+                
+                for account_id in list(self.clients.keys()):
+                    idle = now - self.last_activity.get(account_id, now)
+                    if idle >= self.hibernate_after:
+                        try:
+                            await self.hibernate(account_id)
+                        except Exception as e:
+                            logger.error(f"Failed to hibernate account {account_id}: {e}")
+                
+                wake_interval = config.TELEGRAM_HIBERNATE_WAKE_INTERVAL
+                for account_id, state in list(self.hibernated.items()):
+                    if wake_interval > 0 and now - state["hibernated_at"] >= wake_interval:
+                        try:
+                            await self.wake(account_id)
+                            # Stay up for one check interval, then hibernate again if still idle
+                            self.last_activity[account_id] = (
+                                now - self.hibernate_after + config.TELEGRAM_HIBERNATE_CHECK_INTERVAL
+                            )
+                        except Exception as e:
+                            logger.error(f"Scheduled wake failed for account {account_id}: {e}")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in hibernation loop: {e}")
+    
+    def get_account_ids(self) -> List[str]:
+        """Accounts with a running or hibernated client."""
+        running = [account_id for account_id in self.clients if not account_id.startswith("temp_")]
+        return running + list(self.hibernated.keys())
     
     def is_connected(self, account_id: str) -> bool:
         """Check if a client is connected."""
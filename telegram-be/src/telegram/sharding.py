@@ -0,0 +1,412 @@
+"""Multi-process sharding of Telegram accounts across worker processes."""
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Set
+
+from src.config import config
+from src.telegram.manager import TelegramClientManager
+
+logger = logging.getLogger(__name__)
+
+# Commands a worker process will execute on behalf of the API process
+WORKER_COMMANDS = {"add_client", "remove_client", "send_message", "get_session_string", "download_media"}
+
+# How often worker liveness (API process) and hibernated accounts (workers) are checked (seconds)
+WORKER_CHECK_INTERVAL = 1.0
+
+
+def shard_for(account_id: str, shards: int) -> int:
+    """Stable shard index for an account (same on every boot)."""
+    return zlib.crc32(str(account_id).encode()) % shards
+
+
+def _worker_main(index: int, commands, events) -> None:
+    """Entry point of a worker process."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - shard-{index} - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        asyncio.run(_serve(index, commands, events))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve(index: int, commands, events) -> None:
+    """Run a local TelegramClientManager and answer commands from the API process."""
+    manager = TelegramClientManager(
+        spill_dir=os.path.join(config.INBOUND_SPILL_DIR, f"shard-{index}")
+    )
+
+    # Forward normalized message_data to the API process
+    async def forward(message_data: dict) -> None:
+        events.put(("message", message_data))
+
+    manager.register_message_handler(forward)
+    manager.register_edit_handler(forward)
+    manager.register_delete_handler(forward)
+
+    # Changed sessions are batched again in the API process
+    async def forward_sessions(sessions: dict) -> None:
+        events.put(("sessions", sessions))
+
+    manager.register_session_handler(forward_sessions)
+
+    async def forward_health(health: dict) -> None:
+        events.put(("health", health))
+
+    manager.register_status_handler(forward_health)
+
+    # Handlers first: clients replay missed updates as soon as they start
+    await manager.start()
+
+    async def execute(request_id: int, method: str, kwargs: Dict[str, Any]) -> None:
+        result, error = None, None
+        try:
+            if method not in WORKER_COMMANDS:
+                raise ValueError(f"Unknown worker command: {method}")
+            result = await getattr(manager, method)(**kwargs)
+            if method == "add_client":
+                result = None  # TelegramClient is not picklable
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Worker command {method} failed: {e}")
+
+        # Status first, so the API process sees it before the call returns
+        account_id = kwargs.get("account_id")
+        if method in ("add_client", "remove_client") and account_id:
+            events.put(("status", account_id, manager.is_connected(account_id)))
+
+        events.put(("result", request_id, result, error))
+
+    # Accounts hibernate inside the worker; tell the API process which ones sleep
+    async def report_hibernated() -> None:
+        reported: Set[str] = set()
+        while True:
+            await asyncio.sleep(WORKER_CHECK_INTERVAL)
+            hibernated = set(manager.hibernated)
+            if hibernated != reported:
+                events.put(("hibernated", index, sorted(hibernated)))
+                reported = hibernated
+
+    reporter = asyncio.create_task(report_hibernated())
+    loop = asyncio.get_running_loop()
+    pending = set()
+    logger.info(f"Telegram worker {index} ready")
+
+    while True:
+        command = await loop.run_in_executor(None, commands.get)
+        if command is None:
+            break
+        request_id, method, kwargs = command
+        task = asyncio.create_task(execute(request_id, method, kwargs))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    reporter.cancel()
+    await manager.disconnect_all()
+    logger.info(f"Telegram worker {index} stopped")
+
+
+class ShardedTelegramManager(TelegramClientManager):
+    """
+    Run Telegram accounts in N worker processes.
+
+    Accounts are assigned to a worker by a stable hash of ``account_id``.
+    Workers forward normalized ``message_data`` events over a multiprocessing
+    queue, and commands (send, add, remove) are routed back to the owning
+    worker. Message handlers and the inbound dispatcher stay in this process.
+
+    ``self.clients`` keeps working for local, short-lived clients (the
+    phone-code login flow).
+
+    A worker that dies is respawned: its pending calls fail at once and its
+    accounts are started again with their latest session (and update state
+    from the shared store, so they catch up).
+    """
+
+    def __init__(self, processes: int, call_timeout: float = 60.0):
+        """Initialize sharded manager (processes are spawned by ``start``)."""
+        super().__init__()
+        self.processes = processes
+        self.call_timeout = call_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers: List[multiprocessing.Process] = []
+        self._command_queues: list = []
+        self._events = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._pending_shards: Dict[int, int] = {}
+        self._owned: Dict[str, int] = {}
+        self._connected: Dict[str, bool] = {}
+        self._hibernated: Set[str] = set()
+        self._health: Dict[str, dict] = {}
+
+    async def start(self) -> None:
+        """Start the dispatcher, worker processes and the event reader."""
+        await super().start()
+        if self._workers:
+            return
+
+        self._events = self._ctx.Queue()
+        for index in range(self.processes):
+            self._spawn(index)
+
+        self._reader_task = asyncio.create_task(self._read_events())
+        self._monitor_task = asyncio.create_task(self._monitor_workers())
+        logger.info(f"Started {self.processes} Telegram worker processes")
+
+    def _spawn(self, index: int) -> None:
+        """Start worker ``index`` (or replace a dead one) with a fresh command queue."""
+        commands = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, commands, self._events),
+            name=f"telegram-shard-{index}",
+            daemon=True
+        )
+        process.start()
+        if index < len(self._workers):
+            self._command_queues[index] = commands
+            self._workers[index] = process
+        else:
+            self._command_queues.append(commands)
+            self._workers.append(process)
+
+    async def _monitor_workers(self) -> None:
+        """Respawn worker processes that exited."""
+        while True:
+            await asyncio.sleep(WORKER_CHECK_INTERVAL)
+            for index, process in enumerate(self._workers):
+                if process.is_alive():
+                    continue
+                try:
+                    await self._respawn(index, process.exitcode)
+                except Exception as e:
+                    logger.error(f"Could not restart Telegram worker {index}: {e}")
+
+    async def _respawn(self, index: int, exitcode: Optional[int]) -> None:
+        """Fail the dead worker's calls, start a new one and re-add its accounts."""
+        logger.error(f"Telegram worker {index} exited (code {exitcode}), restarting")
+        for request_id, shard in list(self._pending_shards.items()):
+            if shard != index:
+                continue
+            del self._pending_shards[request_id]
+            future = self._pending.pop(request_id, None)
+            if future and not future.done():
+                future.set_exception(RuntimeError(f"Telegram worker {index} exited"))
+
+        accounts = [account_id for account_id, shard in self._owned.items() if shard == index]
+        for account_id in accounts:
+            self._connected[account_id] = False
+            self._health.pop(account_id, None)
+            self._hibernated.discard(account_id)
+
+        self._spawn(index)
+
+        async def restart(account_id: str) -> None:
+            api_id, api_hash = self.credentials[account_id]
+            session_string = self.dirty_sessions.get(account_id) or self.persisted_sessions.get(account_id)
+            try:
+                await self._call(
+                    account_id, "add_client",
+                    api_id=api_id, api_hash=api_hash, session_string=session_string
+                )
+            except Exception as e:
+                logger.error(f"Could not restart account {account_id} in shard {index}: {e}")
+
+        await asyncio.gather(*(restart(account_id) for account_id in accounts))
+        logger.info(f"Telegram worker {index} restarted with {len(accounts)} accounts")
+
+    async def _read_events(self) -> None:
+        """Pump events from worker processes into this event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                event = await loop.run_in_executor(None, self._events.get)
+                if event is None:
+                    break
+
+                kind = event[0]
+                if kind == "message":
+                    self.dispatcher.submit(event[1])
+                elif kind == "result":
+                    _, request_id, result, error = event
+                    future = self._pending.pop(request_id, None)
+                    if future and not future.done():
+                        if error:
+                            future.set_exception(RuntimeError(error))
+                        else:
+                            future.set_result(result)
+                elif kind == "sessions":
+                    self.dirty_sessions.update(event[1])
+                elif kind == "status":
+                    _, account_id, connected = event
+                    self._connected[account_id] = connected
+                elif kind == "hibernated":
+                    _, index, account_ids = event
+                    self._hibernated = {
+                        account_id for account_id in self._hibernated
+                        if shard_for(account_id, self.processes) != index
+                    } | set(account_ids)
+                elif kind == "health":
+                    health = event[1]
+                    if health["account_id"] in self._owned:
+                        self._health[health["account_id"]] = health
+                        self._connected[health["account_id"]] = health["connected"]
+                    for handler in self.supervisor.status_handlers:
+                        await handler(health)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error reading worker event: {e}")
+
+    async def _call(
+        self, account_id: str, method: str, timeout: Optional[float] = None, **kwargs
+    ) -> Any:
+        """Send a command to the worker owning ``account_id`` and await its result."""
+        if not self._workers:
+            raise RuntimeError("Sharded manager not started")
+
+        shard = shard_for(account_id, self.processes)
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._pending_shards[request_id] = shard
+        self._command_queues[shard].put((request_id, method, {"account_id": account_id, **kwargs}))
+
+        try:
+            return await asyncio.wait_for(future, timeout=timeout or self.call_timeout)
+        finally:
+            self._pending.pop(request_id, None)
+            self._pending_shards.pop(request_id, None)
+
+    async def add_client(
+        self,
+        account_id: str,
+        api_id: int,
+        api_hash: str,
+        session_string: Optional[str] = None,
+        update_states: Optional[list] = None
+    ) -> None:
+        """Start a client in its owning worker process."""
+        if self._connected.get(account_id):
+            return None
+        self._require_handlers()
+
+        await self._call(
+            account_id, "add_client",
+            api_id=api_id, api_hash=api_hash, session_string=session_string, update_states=update_states
+        )
+        self._owned[account_id] = shard_for(account_id, self.processes)
+        # Kept to restart the account if its worker dies
+        self.credentials[account_id] = (api_id, api_hash)
+        if session_string:
+            self.persisted_sessions.setdefault(account_id, session_string)
+        logger.info(f"Started Telegram client for account {account_id} in shard {self._owned[account_id]}")
+        return None
+
+    async def send_message(
+        self, account_id: str, chat_id: str, text: str
+    ) -> Optional[int]:
+        """Send a message through the owning worker."""
+        if account_id not in self._owned:
+            logger.error(f"Client not found for account {account_id}")
+            return None
+
+        try:
+            return await self._call(account_id, "send_message", chat_id=chat_id, text=text)
+        except Exception as e:
+            logger.error(f"Error sending message: {e}")
+            return None
+
+    async def download_media(
+        self, account_id: str, chat_id: str, message_id: str, dest_path: str
+    ) -> Optional[dict]:
+        """Let the owning worker stream the file to ``dest_path`` (same filesystem)."""
+        if account_id not in self._owned:
+            logger.error(f"Client not found for account {account_id}")
+            return None
+
+        return await self._call(
+            account_id, "download_media",
+            timeout=config.MEDIA_DOWNLOAD_TIMEOUT,
+            chat_id=chat_id, message_id=message_id, dest_path=dest_path
+        )
+
+    async def get_session_string(self, account_id: str) -> Optional[str]:
+        """Get session string from the owning worker."""
+        if account_id not in self._owned:
+            return None
+        return await self._call(account_id, "get_session_string")
+
+    async def remove_client(self, account_id: str) -> None:
+        """Remove a client (local temp client or one owned by a worker)."""
+        if account_id in self.clients:
+            await super().remove_client(account_id)
+            return
+
+        if account_id in self._owned:
+            await self._call(account_id, "remove_client")
+            del self._owned[account_id]
+            self.credentials.pop(account_id, None)
+            self._connected.pop(account_id, None)
+            self._hibernated.discard(account_id)
+            self._health.pop(account_id, None)
+
+    async def disconnect_all(self) -> None:
+        """Stop all workers (they disconnect their clients) and drain events."""
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            await asyncio.gather(self._monitor_task, return_exceptions=True)
+            self._monitor_task = None
+
+        for commands in self._command_queues:
+            commands.put(None)
+
+        loop = asyncio.get_running_loop()
+        for process in self._workers:
+            await loop.run_in_executor(None, process.join, 30)
+            if process.is_alive():
+                process.terminate()
+
+        if self._events is not None:
+            self._events.put(None)
+        if self._reader_task:
+            await self._reader_task
+
+        self._workers = []
+        self._command_queues = []
+        self._owned.clear()
+        self._connected.clear()
+        self._hibernated.clear()
+        self._health.clear()
+
+        # Local clients, sessions reported by workers on shutdown, dispatcher
+        await super().disconnect_all()
+
+    def is_connected(self, account_id: str) -> bool:
+        """Check if a client is connected (local or in a worker)."""
+        if account_id in self.clients:
+            return super().is_connected(account_id)
+        return self._connected.get(account_id, False)
+
+    def is_hibernating(self, account_id: str) -> bool:
+        """Check if an account is hibernated in its worker."""
+        return account_id in self._hibernated
+
+    def get_health(self) -> Dict[str, dict]:
+        """Latest health reported by the workers."""
+        return dict(self._health)
+
+    def get_account_ids(self) -> List[str]:
+        """Accounts with a running client."""
+        return list(self._owned.keys())
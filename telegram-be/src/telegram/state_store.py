@@ -0,0 +1,80 @@
+"""Persistent Telegram update state (pts/qts/date/seq) per account."""
+import aiosqlite # type: ignore
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from telethon.tl.types.updates import State # type: ignore
+from src.database.schema import CREATE_UPDATE_STATE_TABLE
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateStateStore:
+    """
+    Store update state in the local SQLite file.
+
+    Uses its own connection so it also works inside Telegram worker
+    processes, which do not run the main database writer.
+    """
+
+    def __init__(self, db_path: str):
+        """Initialize store."""
+        self.db_path = db_path
+        self.conn: Optional[aiosqlite.Connection] = None
+
+    async def connect(self) -> None:
+        """Open the connection and ensure the table exists."""
+        self.conn = await aiosqlite.connect(self.db_path)
+        await self.conn.execute("PRAGMA journal_mode=WAL;")
+        await self.conn.execute("PRAGMA busy_timeout=5000;")
+        await self.conn.execute(CREATE_UPDATE_STATE_TABLE)
+        await self.conn.commit()
+
+    async def close(self) -> None:
+        """Close the connection."""
+        if self.conn:
+            await self.conn.close()
+            self.conn = None
+
+    async def load(self, account_id: str) -> List[Tuple[int, State]]:
+        """Load saved update states for an account as ``(entity_id, State)`` pairs."""
+        async with self.conn.execute(
+            "SELECT entity_id, pts, qts, date, seq FROM telegram_update_state WHERE account_id = ?",
+            (account_id,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        return [
+            (
+                row[0],
+                State(
+                    pts=row[1],
+                    qts=row[2],
+                    date=datetime.fromtimestamp(row[3], tz=timezone.utc),
+                    seq=row[4],
+                    unread_count=0
+                )
+            )
+            for row in rows
+        ]
+
+    async def save(self, account_id: str, states: List[Tuple[int, State]]) -> None:
+        """Upsert update states for an account in one transaction."""
+        if not states:
+            return
+
+        rows = [
+            (account_id, entity_id, state.pts, state.qts, int(state.date.timestamp()), state.seq)
+            for entity_id, state in states
+        ]
+        await self.conn.executemany(
+            """
+            INSERT INTO telegram_update_state (account_id, entity_id, pts, qts, date, seq, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(account_id, entity_id) DO UPDATE SET
+                pts = excluded.pts, qts = excluded.qts, date = excluded.date,
+                seq = excluded.seq, updated_at = CURRENT_TIMESTAMP
+            """,
+            rows
+        )
+        await self.conn.commit()
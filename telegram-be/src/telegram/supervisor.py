@@ -0,0 +1,242 @@
+"""Connection supervisor: reconnects dead clients and scores account health."""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional
+from telethon.tl import functions # type: ignore
+from src.config import config
+
+if TYPE_CHECKING:
+    from src.telegram.manager import TelegramClientManager
+
+logger = logging.getLogger(__name__)
+
+
+class AccountHealth:
+    """Rolling connection health of one account."""
+
+    def __init__(self, account_id: str):
+        """Initialize health record."""
+        self.account_id = account_id
+        self.connected = True
+        self.rtt_ms: Optional[float] = None
+        self.update_latency_ms: Optional[float] = None
+        self.last_update_at: Optional[float] = None
+        self.disconnects: Deque[float] = deque()
+        self.ping_failures = 0
+        self.reconnect_attempts = 0
+        self.next_retry_at = 0.0
+        self.reconnecting = False
+
+    def record_rtt(self, rtt_ms: float) -> None:
+        """Exponentially weighted moving average of ping round trips."""
+        self.rtt_ms = rtt_ms if self.rtt_ms is None else 0.7 * self.rtt_ms + 0.3 * rtt_ms
+        self.ping_failures = 0
+
+    def record_update(self, message_date: Optional[datetime]) -> None:
+        """Note an update and how late it arrived."""
+        self.last_update_at = time.monotonic()
+        if message_date:
+            latency = (datetime.now(timezone.utc) - message_date).total_seconds() * 1000
+            self.update_latency_ms = max(0.0, latency)
+
+    def record_disconnect(self) -> None:
+        self.disconnects.append(time.monotonic())
+
+    def recent_disconnects(self) -> int:
+        """Disconnects inside the flapping window."""
+        cutoff = time.monotonic() - config.TELEGRAM_FLAP_WINDOW
+        while self.disconnects and self.disconnects[0] < cutoff:
+            self.disconnects.popleft()
+        return len(self.disconnects)
+
+    @property
+    def flapping(self) -> bool:
+        return self.recent_disconnects() >= config.TELEGRAM_FLAP_THRESHOLD
+
+    @property
+    def score(self) -> int:
+        """0 (dead) .. 100 (healthy)."""
+        score = 100.0
+        if not self.connected:
+            score -= 50
+        if self.rtt_ms is not None:
+            score -= min(20.0, self.rtt_ms / 50)
+        score -= min(30, 10 * self.recent_disconnects())
+        score -= min(20, 5 * self.ping_failures)
+        if self.update_latency_ms is not None and self.update_latency_ms > 5000:
+            score -= 10
+        return max(0, int(round(score)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "account_id": self.account_id,
+            "connected": self.connected,
+            "score": self.score,
+            "rtt_ms": round(self.rtt_ms, 1) if self.rtt_ms is not None else None,
+            "update_latency_ms": round(self.update_latency_ms) if self.update_latency_ms is not None else None,
+            "last_update_age_s": round(now - self.last_update_at) if self.last_update_at else None,
+            "recent_disconnects": self.recent_disconnects(),
+            "reconnect_attempts": self.reconnect_attempts,
+            "flapping": self.flapping,
+        }
+
+
+class ConnectionSupervisor:
+    """
+    Watch every client of a TelegramClientManager.
+
+    Dead clients are reconnected with jittered exponential backoff. Accounts
+    that flap (many disconnects inside ``TELEGRAM_FLAP_WINDOW``) are held at
+    the maximum backoff, and reconnects share a small semaphore, so a few bad
+    accounts cannot monopolize the event loop.
+    """
+
+    def __init__(self, manager: "TelegramClientManager"):
+        """Initialize supervisor."""
+        self.manager = manager
+        self.health: Dict[str, AccountHealth] = {}
+        self.status_handlers: List[Callable] = []
+        self._reconnect_slots = asyncio.Semaphore(config.TELEGRAM_RECONNECT_CONCURRENCY)
+        self._ping_slots = asyncio.Semaphore(10)
+        self._published: Dict[str, tuple] = {}
+        self._last_ping = 0.0
+        self._tasks: set = set()
+
+    def track(self, account_id: str) -> AccountHealth:
+        """Start (or keep) tracking an account."""
+        if account_id not in self.health:
+            self.health[account_id] = AccountHealth(account_id)
+        self.health[account_id].connected = True
+        return self.health[account_id]
+
+    def forget(self, account_id: str) -> None:
+        self.health.pop(account_id, None)
+        self._published.pop(account_id, None)
+
+    def record_update(self, account_id: str, message_date: Optional[datetime]) -> None:
+        health = self.health.get(account_id)
+        if health:
+            health.record_update(message_date)
+
+    def get_health(self) -> Dict[str, Dict[str, Any]]:
+        return {account_id: health.to_dict() for account_id, health in self.health.items()}
+
+    async def run(self) -> None:
+        """Supervisor loop."""
+        while True:
+            try:
+                await asyncio.sleep(config.TELEGRAM_SUPERVISOR_INTERVAL)
+                await self._check_all()
+            except asyncio.CancelledError:
+                for task in self._tasks:
+                    task.cancel()
+                break
+            except Exception as e:
+                logger.error(f"Error in connection supervisor: {e}")
+
+    async def _check_all(self) -> None:
+        now = time.monotonic()
+        do_ping = now - self._last_ping >= config.TELEGRAM_PING_INTERVAL
+        if do_ping:
+            self._last_ping = now
+
+        pings = []
+        for account_id, client in list(self.manager.clients.items()):
+            health = self.health.get(account_id)
+            if not health:
+                continue
+
+            if client.is_connected():
+                if do_ping:
+                    pings.append(self._ping(health, client))
+                continue
+
+            if health.connected:
+                health.connected = False
+                health.record_disconnect()
+                health.next_retry_at = now + self._backoff(health)
+                logger.warning(f"Account {account_id} disconnected, reconnecting in "
+                               f"{health.next_retry_at - now:.1f}s")
+
+            if not health.reconnecting and now >= health.next_retry_at:
+                self._spawn(self._reconnect(health, client))
+
+        if pings:
+            await asyncio.gather(*pings)
+
+        for health in list(self.health.values()):
+            await self._publish(health)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _backoff(self, health: AccountHealth) -> float:
+        """Jittered exponential backoff; flapping accounts get the maximum."""
+        if health.flapping:
+            delay = config.TELEGRAM_RECONNECT_MAX_DELAY
+        else:
+            delay = min(
+                config.TELEGRAM_RECONNECT_MAX_DELAY,
+                config.TELEGRAM_RECONNECT_BASE_DELAY * (2 ** health.reconnect_attempts)
+            )
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _reconnect(self, health: AccountHealth, client) -> None:
+        health.reconnecting = True
+        try:
+            async with self._reconnect_slots:
+                # Client may have been removed or hibernated while waiting
+                if self.manager.clients.get(health.account_id) is not client:
+                    return
+
+                await asyncio.wait_for(client.connect(), timeout=30)
+                health.connected = True
+                health.reconnect_attempts = 0
+                logger.info(f"Account {health.account_id} reconnected")
+
+                # Fetch whatever arrived while we were gone
+                try:
+                    await client.catch_up()
+                except Exception as e:
+                    logger.warning(f"Catch-up after reconnect failed for {health.account_id}: {e}")
+        except Exception as e:
+            health.reconnect_attempts += 1
+            health.next_retry_at = time.monotonic() + self._backoff(health)
+            logger.warning(f"Reconnect failed for account {health.account_id} "
+                           f"(attempt {health.reconnect_attempts}): {e}")
+        finally:
+            health.reconnecting = False
+
+    async def _ping(self, health: AccountHealth, client) -> None:
+        async with self._ping_slots:
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(
+                    client(functions.PingRequest(ping_id=random.getrandbits(63))),
+                    timeout=10
+                )
+                health.record_rtt((time.monotonic() - started) * 1000)
+            except Exception as e:
+                health.ping_failures += 1
+                logger.warning(f"Ping failed for account {health.account_id}: {e}")
+
+    async def _publish(self, health: AccountHealth) -> None:
+        """Notify status handlers when connectivity or score changes noticeably."""
+        data = health.to_dict()
+        previous = self._published.get(health.account_id)
+        if previous and previous[0] == data["connected"] and abs(previous[1] - data["score"]) < 5:
+            return
+
+        self._published[health.account_id] = (data["connected"], data["score"])
+        for handler in self.status_handlers:
+            try:
+                await handler(data)
+            except Exception as e:
+                logger.error(f"Account health handler error: {e}")
@@ -0,0 +1,54 @@
+"""Pick the one API process that owns Telegram, the outbox and ticket sync."""
+import fcntl
+import logging
+import os
+from typing import Optional
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """
+    Non-blocking exclusive ``flock`` on a file next to the SQLite database.
+
+    With ``uvicorn --workers N`` exactly one worker holds it. The kernel
+    drops the lock when the holder exits (crashes included), so a waiting
+    worker takes over on its next ``acquire``.
+    """
+
+    def __init__(self, path: str):
+        """Initialize lock (nothing is opened until ``acquire``)."""
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """Take the lock if it is free; returns whether this process holds it."""
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # For operators: which process is the leader
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        logger.info(f"Process {os.getpid()} owns Telegram ({self.path})")
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+leader_lock = LeaderLock(f"{config.SQLITE_DB_PATH}.leader.lock")
@@ -0,0 +1,82 @@
+"""Fast payload encoding shared by the WebSocket layer and REST responses."""
+from typing import Any, List, Optional
+import struct
+import orjson # type: ignore
+
+try:
+    import msgpack # type: ignore
+except ImportError:  # optional: only needed for the binary WebSocket subprotocol
+    msgpack = None
+
+# WebSocket subprotocol name for binary MessagePack frames
+MSGPACK_SUBPROTOCOL = "msgpack"
+
+
+def dumps(obj: Any) -> str:
+    """Encode to a JSON string (datetimes, UUIDs and dataclasses included)."""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def loads(data: Any) -> Any:
+    return orjson.loads(data)
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """Encode types MessagePack lacks the same way the JSON frames do."""
+    return orjson.loads(orjson.dumps(obj))
+
+
+class Frame:
+    """
+    One outbound WebSocket payload, encoded at most once per format.
+
+    The same Frame is queued for every subscriber, so fan-out to N sockets
+    costs one JSON encode (and one MessagePack encode if any client asked
+    for the binary subprotocol).
+    """
+
+    __slots__ = ("payload", "collapse_key", "_text", "_binary")
+
+    def __init__(self, payload: Any, collapse_key: Optional[tuple] = None):
+        """Initialize frame.
+
+        ``collapse_key``: frames with the same key supersede each other when
+        batched (only the latest is sent).
+        """
+        self.payload = payload
+        self.collapse_key = collapse_key
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = dumps(self.payload)
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = msgpack.packb(self.payload, default=_msgpack_default)
+        return self._binary
+
+
+def join_text(frames: List[Frame]) -> str:
+    """A JSON array of already-encoded frames (no re-encoding)."""
+    return "[" + ",".join(frame.text for frame in frames) + "]"
+
+
+def join_binary(frames: List[Frame]) -> bytes:
+    """A MessagePack array of already-encoded frames (no re-encoding)."""
+    count = len(frames)
+    if count < 16:
+        header = bytes([0x90 | count])
+    elif count < 0x10000:
+        header = b"\xdc" + struct.pack(">H", count)
+    else:
+        header = b"\xdd" + struct.pack(">I", count)
+    return header + b"".join(frame.binary for frame in frames)
@@ -13,6 +13,17 @@ async function request(endpoint, options = {}) {
   }
 }
 
+// Ticket listings are paged: follow next_cursor until the last page
+async function requestAllTickets(endpoint) {
+  let page = await request(endpoint);
+  const tickets = [...page.tickets];
+  while (page.next_cursor) {
+    page = await request(`${endpoint}?cursor=${encodeURIComponent(page.next_cursor)}`);
+    tickets.push(...page.tickets);
+  }
+  return { ...page, tickets, next_cursor: null };
+}
+
 export const api = {
   // Conversations
   getConversations: () => request("/conversations"),
@@ -25,7 +36,7 @@ export const api = {
     }),
 
   // Tickets
-  getTickets: () => request("/tickets"),
+  getTickets: () => requestAllTickets("/tickets"),
   createTicket: (payload) =>
     request("/tickets/create", {
       method: "POST",
@@ -44,7 +55,7 @@ export const api = {
     }),
 
   // Kanban Board (NEW)
-  getTicketsByStatus: (status) => request(`/tickets/by-status/${status}`),
+  getTicketsByStatus: (status) => requestAllTickets(`/tickets/by-status/${status}`),
   getTicketSummary: (startDate, endDate, agentId) => {
     let url = "/tickets/summary";
     const params = new URLSearchParams();
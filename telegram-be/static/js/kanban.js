@@ -1,6 +1,7 @@
 // telegram-be/static/js/kanban.js
 const kanban = {
   sortables: {},
+  cursors: {},
   currentTicket: null,
   currentTicketInSidebar: null,
   filters: {
@@ -73,41 +74,53 @@ const kanban = {
   },
 
   async loadBoard() {
+    const statuses = ["open", "in_progress", "resolved", "closed"];
+    this.cursors = {};
+
     // If status filter active, only load that status
     if (this.filters.status) {
       try {
-        let url = `/api/tickets/by-status/${this.filters.status}`;
-        if (this.filters.agent) url += `?agent_id=${this.filters.agent}`;
+        let url = `/api/tickets/by-status/${this.filters.status}?fields=card`;
+        if (this.filters.agent) url += `&agent_id=${this.filters.agent}`;
 
         const res = await fetch(url).then((r) => r.json());
 
         // Clear all columns
-        ["open", "in_progress", "resolved", "closed"].forEach((s) =>
-          this.renderColumn(s, [])
-        );
+        statuses.forEach((s) => this.renderColumn(s, { tickets: [] }));
         // Render only filtered status
-        this.renderColumn(this.filters.status, res.tickets);
+        this.renderColumn(this.filters.status, res);
       } catch (e) {
         console.error("Error loading filtered tickets:", e);
       }
     } else {
-      // Load all statuses
-      const statuses = ["open", "in_progress", "resolved", "closed"];
-      for (const status of statuses) {
-        try {
-          let url = `/api/tickets/by-status/${status}`;
-          if (this.filters.agent) url += `?agent_id=${this.filters.agent}`;
-
-          const res = await fetch(url).then((r) => r.json());
-          this.renderColumn(status, res.tickets);
-        } catch (e) {
-          console.error(`Error loading ${status}:`, e);
-        }
+      // First page of every column in one request
+      try {
+        let url = "/api/tickets/board";
+        if (this.filters.agent) url += `?agent_id=${this.filters.agent}`;
+
+        const res = await fetch(url).then((r) => r.json());
+        statuses.forEach((s) => this.renderColumn(s, res.columns[s]));
+      } catch (e) {
+        console.error("Error loading board:", e);
       }
     }
   },
 
-  renderColumn(status, tickets) {
+  async loadMore(status) {
+    const cursor = this.cursors[status];
+    if (!cursor) return;
+    try {
+      let url = `/api/tickets/by-status/${status}?fields=card&cursor=${encodeURIComponent(cursor)}`;
+      if (this.filters.agent) url += `&agent_id=${this.filters.agent}`;
+
+      const res = await fetch(url).then((r) => r.json());
+      this.renderColumn(status, res, true);
+    } catch (e) {
+      console.error(`Error loading more ${status}:`, e);
+    }
+  },
+
+  renderColumn(status, page, append = false) {
     const columnMap = {
       open: "Open",
       in_progress: "InProgress",
@@ -123,10 +136,23 @@ const kanban = {
     const count = document.querySelector(`#boardView #${countId}`);
 
     if (!column) return;
-    count.textContent = tickets.length;
-    column.innerHTML = tickets
-      .map((ticket) => this.createCard(ticket))
-      .join("");
+    const tickets = page.tickets || [];
+    this.cursors[status] = page.next_cursor || null;
+
+    column.querySelector(".kanban-load-more")?.remove();
+    const cards = tickets.map((ticket) => this.createCard(ticket)).join("");
+    if (append) {
+      column.insertAdjacentHTML("beforeend", cards);
+    } else {
+      column.innerHTML = cards;
+      count.textContent = page.total ?? tickets.length;
+    }
+    if (page.next_cursor) {
+      column.insertAdjacentHTML(
+        "beforeend",
+        `<button class="kanban-load-more w-full text-xs text-gray-500 py-2" onclick="kanban.loadMore('${status}')">Load more</button>`
+      );
+    }
   },
 
   createCard(ticket) {
@@ -161,6 +187,8 @@ const kanban = {
       this.sortables[column.id] = new Sortable(column, {
         group: "kanban",
         animation: 150,
+        filter: ".kanban-load-more",
+        preventOnFilter: false,
         ghostClass: "sortable-ghost",
         dragClass: "sortable-drag",
         onEnd: async (evt) => {
@@ -193,8 +221,8 @@ const kanban = {
 
   async openDetail(ticketId) {
     try {
-      const res = await fetch("/api/tickets").then((r) => r.json());
-      const ticket = res.tickets.find((t) => t.id === ticketId);
+      const res = await fetch(`/api/tickets/${ticketId}`);
+      const ticket = res.ok ? (await res.json()).ticket : null;
       if (!ticket) {
         if (window.showToast)
           window.showToast("error", "Error", "Ticket not found");
@@ -2,7 +2,7 @@
 import { state, setState } from "./state.js";
 import { api } from "./api.js";
 import * as ui from "./ui.js";
-import { connectWebSocket } from "./socket.js";
+import { connectWebSocket, syncSubscriptions } from "./socket.js";
 import { showToast } from "./utils.js";
 
 const app = {
@@ -29,6 +29,7 @@ const app = {
       state.conversations = convData.conversations;
       state.allTickets = ticketData.tickets;
       state.agents = accountData.accounts;
+      syncSubscriptions();
 
       state.activeTickets = {};
       state.allTickets.forEach((t) => {
@@ -8,18 +8,62 @@ import {
   renderTicketsList,
 } from "./ui.js";
 
+let socket = null;
+let refreshPending = false;
+// Last event sequence number seen; lets a reconnect replay only what we missed
+let lastSeq = null;
+// Events parked while a resume is in flight: live events can reach us before
+// the replay, and must not push lastSeq past the events being replayed
+let resumeBuffer = null;
+
+// One refetch per batch of events instead of one per event
+function scheduleRefresh() {
+  if (refreshPending) return;
+  refreshPending = true;
+  setTimeout(() => {
+    refreshPending = false;
+    window.app.refreshData();
+  }, 0);
+}
+
+// Topics this dashboard needs: the ticket/account feeds plus every account shown
+function wantedTopics() {
+  return [
+    "tickets",
+    "accounts",
+    "bulk",
+    ...state.agents.map((agent) => `account:${agent.id}`),
+  ];
+}
+
+export function syncSubscriptions() {
+  if (!socket || socket.readyState !== WebSocket.OPEN) return;
+  socket.send(
+    JSON.stringify({ type: "subscribe", topics: wantedTopics(), replace: true })
+  );
+}
+
 export function connectWebSocket() {
   const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
   const ws = new WebSocket(`${protocol}//${window.location.host}/api/ws`);
+  socket = ws;
 
   ws.onopen = () => {
     document.getElementById("wsStatus").innerHTML =
       '<span class="flex items-center gap-1 text-green-200 text-xs">● Connected</span>';
+    if (state.agents.length) syncSubscriptions();
+    resumeBuffer = null;
+    if (lastSeq !== null) {
+      resumeBuffer = [];
+      ws.send(JSON.stringify({ type: "resume", last_seq: lastSeq }));
+    }
   };
 
   ws.onmessage = (event) => {
     const data = JSON.parse(event.data);
-    handleWebSocketMessage(data);
+    // Batched frames are arrays of events
+    if (Array.isArray(data)) data.forEach(handleWebSocketMessage);
+    else handleWebSocketMessage(data);
   };
 
   ws.onclose = () => {
@@ -31,11 +75,51 @@ export function connectWebSocket() {
 
 function handleWebSocketMessage(payload) {
   console.log("WS:", payload);
-  const { type, data } = payload;
+  const { type, data, seq } = payload;
+
+  // Server heartbeat
+  if (type === "ping") {
+    if (socket && socket.readyState === WebSocket.OPEN)
+      socket.send(JSON.stringify({ type: "pong" }));
+    return;
+  }
 
-  if (type === "message_received" || type === "message_sent") {
+  // Stream bookkeeping: skip replayed duplicates, remember where we are
+  if (type === "hello") {
+    if (lastSeq === null) lastSeq = seq;
+    return;
+  }
+  if (resumeBuffer && seq !== undefined) {
+    if (type === "resumed") {
+      // Replay is in: apply everything parked in sequence order (duplicates skip below)
+      const parked = resumeBuffer.sort((a, b) => a.seq - b.seq);
+      resumeBuffer = null;
+      parked.forEach(handleWebSocketMessage);
+      lastSeq = Math.max(lastSeq, seq);
+      return;
+    }
+    if (type !== "resync_required") {
+      resumeBuffer.push(payload);
+      return;
+    }
+    // Too far behind to replay: the refetch covers whatever was parked
+    resumeBuffer = null;
+  }
+  if (type === "resumed") {
+    lastSeq = Math.max(lastSeq, seq);
+    return;
+  }
+  if (seq !== undefined) {
+    if (type !== "resync_required" && lastSeq !== null && seq <= lastSeq) return;
+    lastSeq = seq;
+  }
+
+  if (type === "resync_required") {
+    // We fell behind and the server dropped our backlog: refetch everything
+    scheduleRefresh();
+  } else if (type === "message_received" || type === "message_sent") {
     const convId = data.conversation_id || data.id;
-    window.app.refreshData();
+    scheduleRefresh();
 
     if (
       state.currentConversation &&
@@ -50,6 +134,7 @@ function handleWebSocketMessage(payload) {
       );
       if (!exists) {
         state.messages[state.currentConversation.id].push({
+          message_id: data.message_id,
           text: data.text,
           direction: type === "message_received" ? "incoming" : "outgoing",
           timestamp: data.timestamp,
@@ -58,6 +143,30 @@ function handleWebSocketMessage(payload) {
         renderMessages(state.currentConversation.id);
       }
     }
+  } else if (type === "message_edited" || type === "message_deleted") {
+    // Deltas: patch the open conversation in place, no refetch
+    const conv = state.currentConversation;
+    if (
+      !conv ||
+      conv.telegram_account_id !== data.account_id ||
+      conv.chat_id !== data.chat_id ||
+      !state.messages[conv.id]
+    )
+      return;
+
+    if (type === "message_edited") {
+      const message = state.messages[conv.id].find(
+        (m) => m.message_id === data.message_id
+      );
+      if (!message) return;
+      message.text = data.text;
+      message.edited_at = data.edited_at;
+    } else {
+      state.messages[conv.id] = state.messages[conv.id].filter(
+        (m) => !data.message_ids.includes(m.message_id)
+      );
+    }
+    renderMessages(conv.id);
   } else if (
     type === "ticket_created" ||
     type === "ticket_updated" ||